@@ -0,0 +1,95 @@
+"""Время отбора пользователей сегмента аудитории по снимку.
+
+Снимок заполняется случайными данными колонками NumPy, строковые колонки и pk не заполняются (разреженные файлы),
+так как при отборе не читаются.
+
+Запуск: `PYTHONPATH=src python benchmarks/audience_segments.py [количество пользователей]`
+"""
+import datetime
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from notifications.domain.audience import AudienceSegment, AudienceSnapshot
+from notifications.domain.audience.constants import SNAPSHOT_META_FILE
+from notifications.domain.audience.enums import ActivityFlag
+from notifications.domain.audience.snapshots import COLUMN_DTYPES, OFFSETS_DTYPE, Column, StringColumn
+
+USERS_COUNT = 50_000_000
+BATCH_SIZE = 5_000_000
+
+FIRST_REGISTRATION_DATE = datetime.date(2010, 1, 1)
+LAST_REGISTRATION_DATE = datetime.date(2023, 1, 1)
+ROLES = ["viewers", "subscribers"]
+DOMAINS = [f"domain{index}.com" for index in range(1_000)]
+
+SEGMENTS = {
+    "all": AudienceSegment(),
+    "role": AudienceSegment(roles=["subscribers"]),
+    "role + window": AudienceSegment(
+        roles=["subscribers"],
+        registration_date_from=datetime.date(2018, 1, 1),
+        registration_date_to=datetime.date(2020, 1, 1),
+    ),
+    "flags + domains": AudienceSegment(
+        required_flags=ActivityFlag.EMAIL_CONFIRMED,
+        excluded_flags=ActivityFlag.HAS_SUBSCRIPTION,
+        allowed_domains=DOMAINS[:100],
+        denied_domains=DOMAINS[:10],
+    ),
+}
+
+
+def write_snapshot(path: Path, users_count: int) -> None:
+    rng = np.random.default_rng(0)
+    days = (LAST_REGISTRATION_DATE - FIRST_REGISTRATION_DATE).days
+    registration_dates = np.datetime64(FIRST_REGISTRATION_DATE) + np.sort(rng.integers(0, days, users_count))
+    generators = {
+        Column.REGISTRATION_DATE: lambda start, end: registration_dates[start:end],
+        Column.ROLE: lambda start, end: rng.integers(0, len(ROLES), end - start),
+        Column.ACTIVITY_FLAGS: lambda start, end: rng.integers(0, 8, end - start),
+        Column.EMAIL_DOMAIN: lambda start, end: rng.zipf(1.5, end - start) % len(DOMAINS),
+    }
+    for column in Column:
+        with open(path / column.path, "wb") as column_file:
+            if column not in generators:
+                column_file.truncate(users_count * COLUMN_DTYPES[column].itemsize)
+                continue
+            for start in range(0, users_count, BATCH_SIZE):
+                values = generators[column](start, min(start + BATCH_SIZE, users_count))
+                column_file.write(values.astype(COLUMN_DTYPES[column]).tobytes())
+    for column in StringColumn:
+        with open(path / column.offsets_path, "wb") as column_file:
+            column_file.truncate((users_count + 1) * OFFSETS_DTYPE.itemsize)
+        (path / column.heap_path).touch()
+    meta = {
+        "users_count": users_count,
+        "heap_sizes": {column.value: 0 for column in StringColumn},
+        "synced_until": LAST_REGISTRATION_DATE.isoformat(),
+        "roles": ROLES,
+        "timezones": [None],
+        "domains": DOMAINS,
+    }
+    (path / SNAPSHOT_META_FILE).write_text(json.dumps(meta))
+
+
+def main() -> None:
+    users_count = int(sys.argv[1]) if len(sys.argv) > 1 else USERS_COUNT
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        write_snapshot(Path(snapshot_dir), users_count)
+        snapshot = AudienceSnapshot(Path(snapshot_dir))
+        print(f"{users_count:_} users")
+        print(f"{'segment':<20}{'users':>14}{'select, s':>12}")
+        for name, segment in SEGMENTS.items():
+            started_at = time.perf_counter()
+            indexes = snapshot.select(segment, FIRST_REGISTRATION_DATE, LAST_REGISTRATION_DATE)
+            duration = time.perf_counter() - started_at
+            print(f"{name:<20}{len(indexes):>14_}{duration:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Сравнение размера и времени декодирования данных подписчика в задаче дайджеста.
+
+Текущий формат: словарь `UserDetail.dict()` с валидацией `UserDetail(**payload)`, новый: запись `DigestRecipient`.
+
+Запуск: `PYTHONPATH=src python benchmarks/digest_payload.py`
+"""
+import datetime
+import timeit
+import uuid
+
+from notifications.core.serializers import dumps, loads
+from notifications.domain.periodic_tasks.types import DigestRecipient
+from notifications.integrations.auth.types import UserDetail
+
+NUMBER = 20_000
+
+USER = UserDetail(
+    pk=uuid.uuid4(),
+    email="john.doe@gmail.com",
+    first_name="John",
+    last_name="Doe",
+    role="subscriber",
+    registration_date=datetime.date(2022, 5, 17),
+)
+FILM_PKS = [uuid.uuid4() for _ in range(10)]
+
+
+def decode_user_detail(body: bytes) -> UserDetail:
+    user_payload, _ = loads(body)
+    return UserDetail(**user_payload)
+
+
+def decode_digest_recipient(body: bytes) -> DigestRecipient:
+    recipient, _ = loads(body)
+    return DigestRecipient(*recipient)
+
+
+def main() -> None:
+    cases = {
+        "dict + UserDetail": (dumps((USER.dict(), FILM_PKS)), decode_user_detail),
+        "DigestRecipient": (dumps((DigestRecipient.from_user(USER), FILM_PKS)), decode_digest_recipient),
+    }
+    print(f"{'payload':<20}{'bytes':>8}{'decode, us':>12}")
+    for name, (body, decode) in cases.items():
+        decode_time = timeit.timeit(lambda: decode(body), number=NUMBER)
+        print(f"{name:<20}{len(body):>8}{decode_time / NUMBER * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
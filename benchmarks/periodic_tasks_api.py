@@ -0,0 +1,101 @@
+"""Задержка конкурентных запросов создания периодических задач и метрики пула соединений с БД.
+
+Запросы отправляются в запущенный сервис. API не позволяет удалять задачи, поэтому созданные задачи и их расписания
+удаляются после бенчмарка напрямую из БД Beat (`BEAT_DB_URL` из настроек сервиса). Бенчмарк нужно запускать только
+на стенде со стабами (`NN_USE_STUBS=true`).
+
+Запуск: `PYTHONPATH=src python benchmarks/periodic_tasks_api.py [адрес сервиса] [количество запросов]`
+"""
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+
+import httpx
+from celery_sqlalchemy_scheduler.models import CrontabSchedule, PeriodicTask, PeriodicTaskChanged
+from sqlalchemy import create_engine, delete
+
+from notifications.core.config import get_settings
+
+BASE_URL = "http://localhost:8000/api/v1"
+REQUESTS_COUNT = 500
+CONCURRENCY_LEVELS = (1, 10, 50, 100)
+
+TASK_NAME = "periodic.periodic_tasks.tasks.send_emails_with_template"
+TEMPLATE = {"name": "Benchmark", "slug": "benchmark-periodic-tasks", "content": "<p>Benchmark</p>"}
+CRONTAB = {"minute": "0", "hour": "0", "day_of_month": "1", "month_of_year": "1"}
+TASK_NAME_PREFIX = f"benchmark-{uuid.uuid4()}-"
+
+
+def make_periodic_task() -> dict:
+    periodic_task = {
+        "task": TASK_NAME,
+        "name": f"{TASK_NAME_PREFIX}{uuid.uuid4()}",
+        "description": "Benchmark",
+        "crontab": CRONTAB,
+        "kwargs": {"template_slug": TEMPLATE["slug"], "email_subject": "Benchmark"},
+        "one_off": True,
+    }
+    return periodic_task
+
+
+async def run(client: httpx.AsyncClient, *, requests_count: int, concurrency: int) -> tuple[list[float], float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def create_periodic_task() -> None:
+        async with semaphore:
+            started_at = time.perf_counter()
+            response = await client.post("/periodic-tasks", json=make_periodic_task())
+            latencies.append(time.perf_counter() - started_at)
+            response.raise_for_status()
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(create_periodic_task() for _ in range(requests_count)))
+    return latencies, time.perf_counter() - started_at
+
+
+def delete_periodic_tasks() -> int:
+    engine = create_engine(get_settings().BEAT_DB_URL)
+    with engine.begin() as connection:
+        schedule_ids = connection.scalars(
+            delete(PeriodicTask)
+            .where(PeriodicTask.name.startswith(TASK_NAME_PREFIX))
+            .returning(PeriodicTask.crontab_id),
+        ).all()
+        connection.execute(delete(CrontabSchedule).where(CrontabSchedule.id.in_(set(schedule_ids))))
+        PeriodicTaskChanged.update_changed(None, connection, None)
+    engine.dispose()
+    return len(schedule_ids)
+
+
+async def main() -> None:
+    base_url = sys.argv[1] if len(sys.argv) > 1 else BASE_URL
+    requests_count = int(sys.argv[2]) if len(sys.argv) > 2 else REQUESTS_COUNT
+    limits = httpx.Limits(max_connections=max(CONCURRENCY_LEVELS))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await client.post("/templates", json=TEMPLATE)
+        print(
+            f"{'concurrency':>12}{'rps':>10}{'p50, ms':>10}{'p99, ms':>10}"
+            f"{'checkouts':>11}{'waits':>8}{'wait, s':>10}{'max checkout, ms':>18}",
+        )
+        try:
+            for concurrency in CONCURRENCY_LEVELS:
+                stats_before = (await client.get("/metrics/db-pool")).json()
+                latencies, duration = await run(client, requests_count=requests_count, concurrency=concurrency)
+                stats = (await client.get("/metrics/db-pool")).json()
+                quantiles = statistics.quantiles(latencies, n=100)
+                print(
+                    f"{concurrency:>12}{requests_count / duration:>10.0f}"
+                    f"{quantiles[49] * 1000:>10.1f}{quantiles[98] * 1000:>10.1f}"
+                    f"{stats['checkouts'] - stats_before['checkouts']:>11}{stats['waits'] - stats_before['waits']:>8}"
+                    f"{stats['wait_time_total'] - stats_before['wait_time_total']:>10.2f}"
+                    f"{stats['checkout_time_max'] * 1000:>18.1f}",
+                )
+        finally:
+            print(f"Deleted {delete_periodic_tasks()} benchmark periodic tasks.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
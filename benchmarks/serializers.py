@@ -0,0 +1,66 @@
+"""Сравнение размера и скорости сериализации сообщений Celery: json, pickle и msgpack-ext.
+
+Запуск: `PYTHONPATH=src python benchmarks/serializers.py`
+"""
+import dataclasses
+import datetime
+import timeit
+import uuid
+
+from kombu.exceptions import EncodeError
+from kombu.serialization import dumps, loads
+
+from notifications.core.serializers import MSGPACK_SERIALIZER, register_msgpack_serializer
+from notifications.domain.periodic_tasks.chunks import DateChunk
+
+NUMBER = 20_000
+
+CHUNK = DateChunk(
+    start=datetime.date(2022, 1, 1),
+    size=datetime.timedelta(days=14),
+    end=datetime.date(2022, 10, 1),
+    lane=1,
+    run_id="notifications.domain.periodic_tasks.tasks.send_weekly_digest_to_subscribers:Qm9vb29vb29vb29vb:2022-10-07",
+)
+USER_PAYLOAD = {
+    "pk": uuid.uuid4(),
+    "email": "john.doe@gmail.com",
+    "first_name": "John",
+    "last_name": "Doe",
+    "role": "subscriber",
+    "registration_date": datetime.date(2022, 5, 17),
+}
+NOTIFICATION_PAYLOAD = {
+    "subject": "Weekly digest",
+    "recipient_list": ["john.doe@gmail.com"],
+    "content": "<html><body>" + "<p>Recommended film</p>" * 20 + "</body></html>",
+}
+
+MESSAGES = {
+    "chunk": ((), {"chunk": dataclasses.asdict(CHUNK), "template_slug": "news"}, {}),
+    "user": ((USER_PAYLOAD, [str(uuid.uuid4()) for _ in range(10)]), {}, {}),
+    "notification": ((NOTIFICATION_PAYLOAD, ), {}, {}),
+}
+
+
+def main() -> None:
+    register_msgpack_serializer()
+    print(f"{'message':<14}{'serializer':<14}{'bytes':>8}{'dumps, us':>12}{'loads, us':>12}")
+    for name, message in MESSAGES.items():
+        for serializer in ("json", "pickle", MSGPACK_SERIALIZER):
+            try:
+                content_type, content_encoding, body = dumps(message, serializer=serializer)
+            except EncodeError as exc:
+                print(f"{name:<14}{serializer:<14}  not supported: {exc}")
+                continue
+            dumps_time = timeit.timeit(lambda: dumps(message, serializer=serializer), number=NUMBER)
+            loads_time = timeit.timeit(
+                lambda: loads(body, content_type, content_encoding, accept=[content_type]), number=NUMBER)
+            print(
+                f"{name:<14}{serializer:<14}{len(body):>8}"
+                f"{dumps_time / NUMBER * 1e6:>12.2f}{loads_time / NUMBER * 1e6:>12.2f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,14 @@ from http import HTTPStatus
 
 from dependency_injector.wiring import Provide, inject
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 
 from notifications.containers import Container
+from notifications.core.compression import CompressionStats, MessageCompressor
+from notifications.domain.campaigns import Campaign, CampaignService
 from notifications.domain.periodic_tasks import TaskService
-from notifications.domain.periodic_tasks.types import CeleryPeriodicTask, CeleryTask
+from notifications.domain.periodic_tasks.types import CeleryPeriodicTask, CeleryTask, RunProgress
+from notifications.infrastructure.db.postgres import AsyncDatabase, DatabasePoolStats
 
 router = APIRouter(
     tags=["Dashboard"],
@@ -31,3 +34,95 @@ async def create_new_periodic_task(
 ):
     """Создание новой периодической задачи с отложенным запуском."""
     await task_service.create_new_periodic(periodic_task)
+
+
+@router.post(
+    "/periodic-tasks/bulk",
+    summary="Создание нескольких периодических задач",
+    status_code=HTTPStatus.NO_CONTENT,
+)
+@inject
+async def create_many_periodic_tasks(
+    periodic_tasks: list[CeleryPeriodicTask], *,
+    task_service: TaskService = Depends(Provide[Container.task_service]),
+):
+    """Создание нескольких периодических задач в одной транзакции.
+
+    Если хотя бы одна задача не прошла проверку, то не создается ни одна.
+    """
+    await task_service.create_many_periodic(periodic_tasks)
+
+
+@router.get("/periodic-tasks/runs", response_model=list[RunProgress], summary="Прогресс последних запусков")
+@inject
+async def get_recent_runs(
+    *,
+    task_service: TaskService = Depends(Provide[Container.task_service]),
+):
+    """Получение счетчиков, скорости и оценки оставшегося времени последних запусков периодических задач."""
+    return task_service.get_recent_runs()
+
+
+@router.get("/periodic-tasks/runs/{run_id}", response_model=RunProgress, summary="Прогресс запуска")
+@inject
+async def get_run_progress(
+    run_id: str, *,
+    task_service: TaskService = Depends(Provide[Container.task_service]),
+):
+    """Получение счетчиков, скорости и оценки оставшегося времени запуска периодической задачи."""
+    return task_service.get_run_progress(run_id)
+
+
+@router.post(
+    "/campaigns",
+    response_model=Campaign,
+    summary="Рассылка по загруженному списку получателей",
+    status_code=HTTPStatus.ACCEPTED,
+)
+@inject
+async def upload_campaign(
+    request: Request,
+    template_slug: str,
+    email_subject: str, *,
+    campaign_service: CampaignService = Depends(Provide[Container.campaign_service]),
+):
+    """Загрузка получателей потоком в формате CSV или NDJSON и рассылка им писем по шаблону.
+
+    Отправка писем начинается во время загрузки, прогресс доступен по идентификатору кампании.
+    """
+    return await campaign_service.upload(
+        request.stream(),
+        content_type=request.headers.get("content-type", ""),
+        template_slug=template_slug,
+        email_subject=email_subject,
+    )
+
+
+@router.get("/campaigns/{campaign_id}", response_model=Campaign, summary="Прогресс рассылки")
+@inject
+async def get_campaign(
+    campaign_id: str, *,
+    campaign_service: CampaignService = Depends(Provide[Container.campaign_service]),
+):
+    """Получение прогресса загрузки получателей и отправки писем кампании."""
+    return await campaign_service.get(campaign_id)
+
+
+@router.get("/metrics/db-pool", response_model=DatabasePoolStats, summary="Метрики пула соединений БД")
+@inject
+async def get_db_pool_stats(
+    *,
+    db: AsyncDatabase = Depends(Provide[Container.db]),
+):
+    """Получение состояния пула соединений с БД, количества и времени ожидания соединений."""
+    return db.get_pool_stats()
+
+
+@router.get("/metrics/compression", response_model=CompressionStats, summary="Метрики сжатия сообщений Celery")
+@inject
+async def get_compression_stats(
+    *,
+    message_compressor: MessageCompressor = Depends(Provide[Container.message_compressor]),
+):
+    """Получение статистики сжатия сообщений Celery, отправленных процессом API."""
+    return message_compressor.get_stats()
@@ -1,13 +1,15 @@
 from http import HTTPStatus
 
 from dependency_injector.wiring import Provide, inject
+from pydantic import EmailStr
 
 from fastapi import APIRouter, Depends
 
 from notifications.containers import Container
 from notifications.domain.messages import NotificationDispatcherService
+from notifications.domain.suppressions import SuppressionService
 
-from ..schemas import NotificationIn, NotificationShortDetails
+from ..schemas import NotificationIn, NotificationShortDetails, SuppressionIn
 
 router = APIRouter(
     tags=["M2M"],
@@ -29,3 +31,23 @@ async def send_notification(
 ):
     """Отправка одного уведомления пользователю."""
     return await notification_dispatcher.dispatch_notification(notification)
+
+
+@router.post("/suppressions", summary="Подавление отправки писем", status_code=HTTPStatus.NO_CONTENT)
+@inject
+async def suppress_recipients(
+    suppression: SuppressionIn, *,
+    suppression_service: SuppressionService = Depends(Provide[Container.suppression_service]),
+):
+    """Добавление адресов в список подавления: отказы доставки, жалобы и отписки."""
+    await suppression_service.suppress(suppression.recipient_list, reason=suppression.reason)
+
+
+@router.delete("/suppressions/{email}", summary="Возобновление отправки писем", status_code=HTTPStatus.NO_CONTENT)
+@inject
+async def unsuppress_recipient(
+    email: EmailStr, *,
+    suppression_service: SuppressionService = Depends(Provide[Container.suppression_service]),
+):
+    """Удаление адреса из списка подавления."""
+    await suppression_service.unsuppress([email])
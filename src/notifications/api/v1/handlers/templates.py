@@ -7,21 +7,22 @@ from fastapi import APIRouter, Depends
 from notifications.containers import Container
 from notifications.domain.templates import Template, TemplateService
 
-from ..schemas import TemplateIn, TemplateList, TemplateUpdate
+from ..schemas import TemplateDetail, TemplateIn, TemplateList, TemplateUpdate
 
 router = APIRouter(
     tags=["Templates"],
 )
 
 
-@router.post("", response_model=Template, summary="Создание шаблона", status_code=HTTPStatus.CREATED)
+@router.post("", response_model=TemplateDetail, summary="Создание шаблона", status_code=HTTPStatus.CREATED)
 @inject
 async def create_template(
     template: TemplateIn, *,
     template_service: TemplateService = Depends(Provide[Container.template_service]),
 ):
     """Создание нового шаблона уведомления."""
-    return await template_service.create_new(Template(**template.dict()))
+    new_template = await template_service.create_new(Template(**template.dict()))
+    return _get_template_detail(new_template, template_service=template_service)
 
 
 @router.get("", response_model=list[TemplateList], summary="Список шаблонов")
@@ -34,14 +35,15 @@ async def get_templates(
     return await template_service.get_all()
 
 
-@router.patch("/{template_slug}", response_model=Template, summary="Обновление шаблона")
+@router.patch("/{template_slug}", response_model=TemplateDetail, summary="Обновление шаблона")
 @inject
 async def update_template_content(
     template_slug: str, template: TemplateUpdate, *,
     template_service: TemplateService = Depends(Provide[Container.template_service]),
 ):
     """Обновление шаблона по его слагу."""
-    return await template_service.update_by_slug(template_slug, updated_template=template)
+    updated_template = await template_service.update_by_slug(template_slug, updated_template=template)
+    return _get_template_detail(updated_template, template_service=template_service)
 
 
 @router.delete("/{template_slug}", summary="Удаление шаблона", status_code=HTTPStatus.NO_CONTENT)
@@ -52,3 +54,9 @@ async def delete_template(
 ):
     """Удаление шаблона по его слагу."""
     return await template_service.delete_by_slug(template_slug)
+
+
+def _get_template_detail(template: Template, /, *, template_service: TemplateService) -> TemplateDetail:
+    """Получение шаблона со списком переменных контекста."""
+    variables = sorted(template_service.get_template_variables(template))
+    return TemplateDetail(**template.dict(exclude={"variables"}), variables=variables)
@@ -2,8 +2,10 @@ from typing import Any
 
 from pydantic import BaseModel, EmailStr, Field, root_validator
 
+from notifications.domain.messages.constants import DEFAULT_COALESCING_CATEGORY
 from notifications.domain.messages.enums import NotificationPriority, NotificationType
 from notifications.domain.messages.types import Queue
+from notifications.domain.suppressions.enums import SuppressionReason
 
 from .exceptions import MissingContentError
 
@@ -18,6 +20,8 @@ class NotificationIn(BaseModel):
     content: str | None = None
     template_slug: str | None = None
     context: dict[str, Any] | None = Field(default_factory=dict)
+    category: str = DEFAULT_COALESCING_CATEGORY
+    coalescing_window: int | None = Field(default=None, gt=0)
 
     @root_validator(pre=True)
     def clean_content_with_slug(cls, values: dict) -> dict:
@@ -44,6 +48,13 @@ class NotificationShortDetails(BaseModel):
     queue: Queue
 
 
+class SuppressionIn(BaseModel):
+    """Адреса, отправка писем на которые подавляется."""
+
+    recipient_list: list[EmailStr]
+    reason: SuppressionReason
+
+
 class TemplateIn(BaseModel):
     """Новый шаблон."""
 
@@ -52,6 +63,16 @@ class TemplateIn(BaseModel):
     content: str
 
 
+class TemplateDetail(BaseModel):
+    """Шаблон с переменными контекста, которые он использует."""
+
+    pk: str
+    name: str
+    slug: str
+    content: str
+    variables: list[str]
+
+
 class TemplateList(BaseModel):
     """Список шаблонов."""
 
@@ -1,25 +1,41 @@
 from __future__ import annotations
 
 import datetime
+import time
 import traceback
+from contextlib import suppress
 from typing import TYPE_CHECKING, Any, Callable, ClassVar, Sequence
 
+import orjson
 from celery import Celery, beat
 from celery.app.task import Task as _Task
 from celery.schedules import crontab
+from celery.signals import worker_process_shutdown
 from celery.utils.log import get_task_logger
 from celery_sqlalchemy_scheduler.schedulers import DatabaseScheduler as _DatabaseScheduler
+from celery_sqlalchemy_scheduler.session import session_cleanup
 from dependency_injector.wiring import Provide
+from kombu.exceptions import ChannelError
+from redis.exceptions import RedisError
 
+from notifications.core.compression import FAST_COMPRESSION
 from notifications.core.config import CelerySettings, get_settings
+from notifications.core.serializers import MSGPACK_SERIALIZER, register_msgpack_serializer
+from notifications.domain.periodic_tasks.constants import PERIODIC_TASKS_CHANNEL
+from notifications.domain.periodic_tasks.enums import RunCounter
 
 from .containers import Container
 
 if TYPE_CHECKING:
     from celery.beat import ScheduleEntry
     from celery.result import AsyncResult
+    from celery_sqlalchemy_scheduler.schedulers import ModelEntry
+    from redis.client import PubSub
 
+    from notifications.domain.periodic_tasks.leader import BeatLeaderLease
+    from notifications.domain.periodic_tasks.progress import RunProgressTracker
     from notifications.infrastructure.db.cache import BaseSyncCache
+    from notifications.infrastructure.db.redis import SyncRedisClient
 
     from .types import seconds
 
@@ -30,6 +46,11 @@ class Task(_Task):
     """Переопределенная Celery задача для установки лока."""
 
     cache_client: BaseSyncCache = Provide[Container.sync_cache_client]
+    run_progress: RunProgressTracker = Provide[Container.run_progress_tracker]
+
+    # базовый класс задач Celery может быть уже привязан к приложению по умолчанию с сериализатором json,
+    # тогда `task_serializer` из настроек к задачам не применяется
+    serializer = MSGPACK_SERIALIZER
 
     # ttl лока в секундах
     lock_ttl: ClassVar[seconds | None] = None
@@ -37,12 +58,22 @@ class Task(_Task):
     # уникальный суффикс лока: None, tuple или callable, возвращающий tuple
     lock_suffix: ClassVar[tuple | Callable[..., tuple] | None] = None
 
+    # запуск периодической задачи, в счетчики прогресса которого записывается результат задачи:
+    # None или callable, возвращающий идентификатор запуска по аргументам задачи
+    progress_run_id: ClassVar[Callable[..., str | None] | None] = None
+
     log = get_task_logger(__name__)
 
     def __call__(self, *args, **kwargs):
         self.log.info(f"Starting task {self.request.id}")
         return super().__call__(*args, **kwargs)
 
+    def on_success(self, retval: Any, task_id: str, args: Sequence[Any], kwargs: dict[str, Any]) -> None:
+        self._increment_run_progress(RunCounter.SENT, args, kwargs)
+
+    def on_failure(self, exc: Exception, task_id: str, args: Sequence[Any], kwargs: dict[str, Any], einfo) -> None:
+        self._increment_run_progress(RunCounter.FAILED, args, kwargs)
+
     def get_lock_key(self, args: Sequence[Any], kwargs: dict[str, Any]) -> str:
         """Получение ключа блокировки для сохранения в БД."""
         if lock_suffix := self.__class__.lock_suffix:
@@ -65,12 +96,37 @@ class Task(_Task):
         self.log.debug(f"[{lock_key}] has been acquired")
         return True
 
+    def acquire_locks(self, lock_keys: Sequence[str]) -> list[bool]:
+        """Установка нескольких блокировок одним запросом к БД.
+
+        Returns:
+            Была ли установлена блокировка для каждого ключа из `lock_keys`.
+        """
+        timestamp = datetime.datetime.now().timestamp()
+        acquired = self.cache_client.set_many(
+            dict.fromkeys(lock_keys, timestamp), ttl=self.lock_ttl, create_missing=False)
+        self.log.debug(f"{sum(acquired)} of {len(lock_keys)} locks have been acquired")
+        return acquired
+
+    def release_locks(self, lock_keys: Sequence[str]) -> None:
+        """Снятие нескольких блокировок одним запросом к БД."""
+        self.cache_client.delete_many(lock_keys)
+        self.log.debug(f"{len(lock_keys)} locks have been released")
+
+    def get_queue_depth(self, queue: str) -> int:
+        """Получение количества сообщений в очереди брокера."""
+        with self.app.connection_for_read() as connection:
+            try:
+                return connection.default_channel.queue_declare(queue=queue, passive=True).message_count
+            except ChannelError:
+                return 0
+
     def delay(self, *args, force: bool = False, **kwargs) -> AsyncResult | None:
         if not self.lock_ttl or "chunk" in kwargs:
-            return super().apply_async(args, kwargs)
+            return self._publish(args, kwargs)
         lock_key = self.get_lock_key(args, kwargs)
         if self.acquire_lock(lock_key, force=force):
-            return super().apply_async(args, kwargs)
+            return self._publish(args, kwargs)
         return None
 
     def apply_async(
@@ -87,17 +143,102 @@ class Task(_Task):
         if lock_ttl is not None:
             self.lock_ttl = lock_ttl
         if not self.lock_ttl or "chunk" in kwargs:
-            return super().apply_async(args=args, kwargs=kwargs, **options)
+            return self._publish(args, kwargs, **options)
         lock_key = self.get_lock_key(args, kwargs)
         if self.acquire_lock(lock_key, force=force):
-            return super().apply_async(args=args, kwargs=kwargs, **options)
+            return self._publish(args, kwargs, **options)
         return None
 
+    def _publish(self, args: Sequence[Any], kwargs: dict[str, Any], **options) -> AsyncResult:
+        """Отправка задачи в брокер со сжатием больших сообщений.
+
+        Порог сжатия проверяется при сжатии уже сериализованного kombu сообщения, см. `MessageCompressor`.
+        """
+        options.setdefault("compression", FAST_COMPRESSION)
+        return super().apply_async(args=args, kwargs=kwargs, **options)
+
+    def _increment_run_progress(self, counter: RunCounter, args: Sequence[Any], kwargs: dict[str, Any]) -> None:
+        """Увеличение счетчика прогресса запуска периодической задачи, в рамках которого выполнялась задача."""
+        if progress_run_id := self.__class__.progress_run_id:
+            self.run_progress.increment(progress_run_id(*args or (), **kwargs or {}), counter)
+
+
+@worker_process_shutdown.connect
+def flush_run_progress(**kwargs) -> None:
+    """Запись накопленных счетчиков прогресса запусков при остановке процесса воркера."""
+    Task.run_progress.flush()
+
 
 class DatabaseScheduler(_DatabaseScheduler):
-    """Переопределенный Beat Scheduler для корректной обработки задач с локом."""
+    """Переопределенный Beat Scheduler для корректной обработки задач с локом.
+
+    Расписание хранится в памяти и обновляется по уведомлениям из канала Redis: перечитываются только задачи,
+    названия которых пришли в уведомлении. Изменения, сделанные в обход сервиса, подхватываются проверкой
+    таблицы изменений в БД раз в `changes_check_interval` секунд.
+
+    Может работать несколько реплик Beat: задачи отправляет только лидер, получивший аренду `leader_lease`.
+    Остальные реплики на каждом тике пытаются получить аренду и при ее получении перечитывают расписание.
+    """
+
+    redis_client: SyncRedisClient = Provide[Container.sync_redis_client]
+    leader_lease: BeatLeaderLease = Provide[Container.beat_leader_lease]
+
+    # интервал проверки уведомлений об изменении расписания в секундах
+    changes_poll_interval: ClassVar[seconds] = settings.BEAT_CHANGES_POLL_INTERVAL
+
+    # интервал проверки таблицы изменений расписания в БД в секундах
+    changes_check_interval: ClassVar[seconds] = settings.BEAT_CHANGES_CHECK_INTERVAL
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._pubsub: PubSub | None = None
+        self._changes_check_deadline = time.monotonic() + self.changes_check_interval
+        super().__init__(*args, **kwargs)
+        self.max_interval = min(self.max_interval, self.changes_poll_interval)
+
+    @property
+    def schedule(self) -> dict[str, ModelEntry]:
+        if self._initial_read:
+            self._subscribe()
+            return super().schedule
+        if self._pubsub is None:
+            if not self._subscribe():
+                # без уведомлений расписание проверяется на каждом тике, как в базовом планировщике
+                return super().schedule
+            # уведомления, отправленные до подписки, могли быть потеряны
+            self._reload_all()
+        if changed_names := self._get_changed_task_names():
+            self._reload_entries(changed_names)
+        if time.monotonic() >= self._changes_check_deadline:
+            self._changes_check_deadline = time.monotonic() + self.changes_check_interval
+            if self.schedule_changed():
+                self._reload_all()
+        return self._schedule
+
+    def tick(self, *args, **kwargs) -> float:
+        token = self.leader_lease.token
+        if not self.leader_lease.acquire():
+            if token is not None:
+                beat.warning("Scheduler: Leadership lost")
+                # время запуска задач, отправленных после потери лидерства, не должно попасть в БД
+                self._dirty.clear()
+                self._unsubscribe()
+            return self.changes_poll_interval
+        if self.leader_lease.token != token:
+            beat.info("Scheduler: Became leader with fencing token %s", self.leader_lease.token)
+            # расписание перечитывается при переподписке: прошлый лидер мог уже отправить часть задач
+            self._unsubscribe()
+        return super().tick(*args, **kwargs)
+
+    def close(self) -> None:
+        super().close()
+        self.leader_lease.release()
 
     def apply_entry(self, entry: ScheduleEntry, producer=None) -> None:
+        if not self.leader_lease.is_held():
+            beat.warning("Scheduler: Skipping due task %s, leadership lost", entry.name)
+            return
+        # время запуска сохраняется до отправки, чтобы новый лидер не отправил задачу повторно
+        self.sync()
         beat.info("Scheduler: Sending due task %s (%s)", entry.name, entry.task)
         try:
             result = self.apply_async(entry, producer=producer, advance=False)
@@ -109,6 +250,65 @@ class DatabaseScheduler(_DatabaseScheduler):
             else:
                 beat.debug("Task %s is locked", entry.task)
 
+    def _subscribe(self) -> bool:
+        """Подписка на уведомления об изменении периодических задач."""
+        try:
+            self._pubsub = self.redis_client.subscribe(PERIODIC_TASKS_CHANNEL)
+        except RedisError as exc:
+            beat.warning("Scheduler: Cannot subscribe to schedule changes: %r", exc)
+            self._pubsub = None
+        return self._pubsub is not None
+
+    def _unsubscribe(self) -> None:
+        """Отписка от уведомлений, при следующем обращении к расписанию оно будет перечитано полностью."""
+        if self._pubsub is not None:
+            with suppress(RedisError):
+                self._pubsub.close()
+            self._pubsub = None
+
+    def _get_changed_task_names(self) -> set[str]:
+        """Получение названий задач из всех пришедших уведомлений без ожидания новых."""
+        names = set()
+        try:
+            while message := self._pubsub.get_message(timeout=0):
+                names.update(orjson.loads(message["data"]))
+        except RedisError as exc:
+            beat.warning("Scheduler: Schedule changes subscription lost: %r", exc)
+            self._pubsub = None
+        return names
+
+    def _reload_entries(self, names: set[str], /) -> None:
+        """Перечитывание задач `names` из БД, удаленные и выключенные задачи убираются из расписания."""
+        beat.info("Scheduler: Reloading entries %s", ", ".join(sorted(names)))
+        self.sync()
+        session = self.Session()
+        with session_cleanup(session):
+            models = session.query(self.Model).filter(self.Model.name.in_(names)).all()
+            entries = {}
+            for model in models:
+                if not model.enabled:
+                    continue
+                try:
+                    entries[model.name] = self.Entry(model, app=self.app, Session=self.Session, session=session)
+                except ValueError:
+                    pass
+        for name in names:
+            self._schedule.pop(name, None)
+        self._schedule.update(entries)
+        self._invalidate_heap()
+
+    def _reload_all(self) -> None:
+        """Перечитывание всего расписания из БД."""
+        beat.info("Scheduler: Reloading schedule")
+        self.sync()
+        self._schedule = self.all_as_schedule()
+        self._invalidate_heap()
+
+    def _invalidate_heap(self) -> None:
+        """Пересборка очереди задач Beat на следующем тике."""
+        self._heap = []
+        self._heap_invalidated = True
+
 
 def create_celery() -> Celery:
     """Создание приложения Celery."""
@@ -117,6 +317,7 @@ def create_celery() -> Celery:
         "result_backend": settings.CELERY_RESULT_BACKEND,
         "beat_dburi": settings.BEAT_DB_URL,
     }
+    register_msgpack_serializer()
     app = Celery(
         main="notifications",
         task_cls="notifications.celery:Task",
@@ -132,9 +333,19 @@ def create_celery() -> Celery:
     # CELERY PERIODIC TASKS
     # https://docs.celeryproject.org/en/stable/userguide/periodic-tasks.html
     app.conf.beat_schedule = {
+        # Обновление снимка аудитории рассылок
+        "refresh_audience_snapshot": {
+            "task": "notifications.domain.audience.tasks.refresh_audience_snapshot",
+            "schedule": crontab(hour="3", minute="0"),
+        },
+        # Рендеринг еженедельного дайджеста заранее, до начала рассылки
+        "prerender_weekly_digest": {
+            "task": "notifications.domain.periodic_tasks.tasks.prerender_weekly_digest_for_subscribers",
+            "schedule": crontab(hour="15", minute="0", day_of_week="5"),
+        },
         # Рассылка еженедельного дайджеста подписчикам
         "send_weekly_digest": {
-            "task": "notifications.domain.periodic_tasks.tasks.send_weekly_digest_to_subscribers",
+            "task": "notifications.domain.periodic_tasks.tasks.send_weekly_digest",
             "schedule": crontab(hour="19", minute="0", day_of_week="5"),
         },
     }
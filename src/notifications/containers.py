@@ -5,12 +5,16 @@ from typing import TYPE_CHECKING
 
 from dependency_injector import containers, providers
 
+from notifications.core.compression import MessageCompressor
 from notifications.core.config import get_settings
 from notifications.core.logging import configure_logger
-from notifications.domain import messages, periodic_tasks, templates
+from notifications.domain import audience, campaigns, messages, periodic_tasks, suppressions, templates
+from notifications.infrastructure import http
 from notifications.infrastructure.db import cache, postgres, redis, repositories
 from notifications.infrastructure.emails.clients import ConsoleClient
 from notifications.infrastructure.emails.stubs import StreamStub
+from notifications.integrations import ugc
+from notifications.integrations.auth import NetflixAuthClient
 from notifications.integrations.auth.stubs import NetflixAuthClientStub
 from notifications.integrations.ugc.stubs import NetflixUgcClientStub
 
@@ -31,6 +35,8 @@ class Container(containers.DeclarativeContainer):
             "notifications.api.v1.handlers.m2m",
             "notifications.api.v1.handlers.templates",
             "notifications.api.v1.handlers.dashboard",
+            "notifications.domain.audience.tasks",
+            "notifications.domain.campaigns.tasks",
             "notifications.domain.messages.tasks",
             "notifications.domain.periodic_tasks.tasks",
         ],
@@ -40,11 +46,21 @@ class Container(containers.DeclarativeContainer):
 
     logging = providers.Resource(configure_logger)
 
+    message_compressor = providers.Singleton(
+        MessageCompressor,
+        threshold=config.CELERY_COMPRESSION_THRESHOLD,
+    )
+
     # Infrastructure
 
     db = providers.Singleton(
         postgres.AsyncDatabase,
         db_url=config.DB_URL,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+        pool_recycle=config.DB_POOL_RECYCLE,
     )
 
     redis_connection = providers.Resource(
@@ -89,16 +105,44 @@ class Container(containers.DeclarativeContainer):
 
     # Integrations -> Netflix Auth
 
+    auth_http_client = providers.Resource(
+        http.init_http_client,
+        base_url=config.NETFLIX_AUTH_BASE_URL,
+        timeout=config.NETFLIX_AUTH_TIMEOUT,
+        max_connections=config.NETFLIX_AUTH_MAX_CONNECTIONS,
+    )
+
     auth_client = providers.Singleton(
-        # TODO [Дипломный проект]: После реализации всех клиентов АПИ тут будет использоваться настоящий клиент
-        NetflixAuthClientStub,
+        NetflixAuthClient,
+        http_client=auth_http_client,
+        page_size=config.NETFLIX_AUTH_PAGE_SIZE,
+        max_retries=config.NETFLIX_AUTH_MAX_RETRIES,
+        retry_backoff=config.NETFLIX_AUTH_RETRY_BACKOFF,
     )
 
     # Integrations -> Netflix UGC
 
+    ugc_http_client = providers.Resource(
+        http.init_async_http_client,
+        base_url=config.UGC_BASE_URL,
+        timeout=config.UGC_TIMEOUT,
+        max_connections=config.UGC_MAX_CONNECTIONS,
+    )
+
     ugc_client = providers.Singleton(
-        # TODO [Дипломный проект]: После реализации всех клиентов АПИ тут будет использоваться настоящий клиент
-        NetflixUgcClientStub,
+        ugc.NetflixUgcClient,
+        http_client=ugc_http_client,
+        max_concurrency=config.UGC_MAX_CONCURRENCY,
+        cache_ttl=config.UGC_RESPONSE_CACHE_TTL,
+        cache_size=config.UGC_RESPONSE_CACHE_SIZE,
+        max_retries=config.UGC_MAX_RETRIES,
+        retry_backoff=config.UGC_RETRY_BACKOFF,
+    )
+
+    recommendation_repository = providers.Singleton(
+        ugc.RecommendationRepository,
+        cache_client=cache_client,
+        ttl=config.UGC_FILMS_CACHE_TTL,
     )
 
     # Domain -> Templates
@@ -111,6 +155,23 @@ class Container(containers.DeclarativeContainer):
     template_service = providers.Singleton(
         templates.TemplateService,
         template_repository=template_repository,
+        cache_client=cache_client,
+        rendered_content_ttl=config.RENDERED_TEMPLATE_CACHE_TTL,
+        fragment_cache_size=config.TEMPLATE_FRAGMENT_CACHE_SIZE,
+        fragment_cache_ttl=config.TEMPLATE_FRAGMENT_CACHE_TTL,
+    )
+
+    # Domain -> Suppressions
+
+    suppression_repository = providers.Singleton(
+        suppressions.SuppressionRepository,
+        redis_client=redis_client,
+    )
+
+    suppression_service = providers.Singleton(
+        suppressions.SuppressionService,
+        suppression_repository=suppression_repository,
+        refresh_interval=config.SUPPRESSIONS_REFRESH_INTERVAL,
     )
 
     # Domain -> Messages
@@ -121,10 +182,60 @@ class Container(containers.DeclarativeContainer):
         template_service=template_service,
     )
 
+    coalescing_repository = providers.Singleton(
+        messages.CoalescingRepository,
+        redis_client=redis_client,
+    )
+
+    notification_coalescing_service = providers.Singleton(
+        messages.NotificationCoalescingService,
+        coalescing_repository=coalescing_repository,
+        email_service=email_notification_service,
+        max_window=config.COALESCING_MAX_WINDOW,
+        max_notifications=config.COALESCING_MAX_NOTIFICATIONS,
+        state_ttl_margin=config.COALESCING_STATE_TTL_MARGIN,
+    )
+
     notification_dispatcher_service = providers.Singleton(
         messages.NotificationDispatcherService,
         email_service=email_notification_service,
         template_service=template_service,
+        suppression_service=suppression_service,
+        coalescing_service=notification_coalescing_service,
+        recipients_batch_size=config.NOTIFICATION_RECIPIENTS_BATCH_SIZE,
+    )
+
+    # Domain -> Audience
+
+    audience_snapshot_repository = providers.Singleton(
+        audience.AudienceSnapshotRepository,
+        snapshots_dir=config.AUDIENCE_SNAPSHOTS_DIR,
+        snapshots_to_keep=config.AUDIENCE_SNAPSHOTS_TO_KEEP,
+        batch_size=config.AUDIENCE_SNAPSHOT_BATCH_SIZE,
+    )
+
+    audience_service = providers.Singleton(
+        audience.AudienceService,
+        auth_client=auth_client,
+        snapshot_repository=audience_snapshot_repository,
+        rebuild_interval=config.AUDIENCE_SNAPSHOT_REBUILD_INTERVAL,
+    )
+
+    # Domain -> Campaigns
+
+    campaign_repository = providers.Singleton(
+        campaigns.CampaignRepository,
+        redis_client=redis_client,
+        ttl=config.CAMPAIGN_TTL,
+    )
+
+    campaign_service = providers.Singleton(
+        campaigns.CampaignService,
+        campaign_repository=campaign_repository,
+        template_service=template_service,
+        suppression_service=suppression_service,
+        upload_batch_size=config.CAMPAIGN_UPLOAD_BATCH_SIZE,
+        upload_timeout=config.CAMPAIGN_UPLOAD_TIMEOUT,
     )
 
     # Domain -> Periodic Tasks
@@ -133,6 +244,32 @@ class Container(containers.DeclarativeContainer):
         periodic_tasks.TaskRepository,
         celery_app=sentinel,
         session_factory=db.provided.session,
+        redis_client=sync_redis_client,
+    )
+
+    run_progress_repository = providers.Singleton(
+        periodic_tasks.RunProgressRepository,
+        redis_client=sync_redis_client,
+        ttl=config.RUN_PROGRESS_TTL,
+    )
+
+    run_progress_tracker = providers.Singleton(
+        periodic_tasks.RunProgressTracker,
+        progress_repository=run_progress_repository,
+        flush_interval=config.RUN_PROGRESS_FLUSH_INTERVAL,
+        flush_size=config.RUN_PROGRESS_FLUSH_SIZE,
+    )
+
+    beat_leader_lease = providers.Singleton(
+        periodic_tasks.BeatLeaderLease,
+        redis_client=sync_redis_client,
+        ttl=config.BEAT_LEADER_LEASE_TTL,
+    )
+
+    digest_spool_repository = providers.Singleton(
+        periodic_tasks.DigestSpoolRepository,
+        redis_client=redis_client,
+        ttl=config.DIGEST_SPOOL_TTL,
     )
 
     task_service = providers.Factory(
@@ -140,8 +277,17 @@ class Container(containers.DeclarativeContainer):
         task_repository=task_repository,
         email_service=email_notification_service,
         template_service=template_service,
-        auth_client=auth_client,
+        audience_service=audience_service,
         ugc_client=ugc_client,
+        recommendation_repository=recommendation_repository,
+        digest_prefetch_batch_size=config.DIGEST_PREFETCH_BATCH_SIZE,
+        spawn_batch_size=config.PERIODIC_TASKS_SPAWN_BATCH_SIZE,
+        digest_spool_repository=digest_spool_repository,
+        digest_spool_batch_size=config.DIGEST_SPOOL_BATCH_SIZE,
+        suppression_service=suppression_service,
+        run_progress=run_progress_tracker,
+        run_progress_repository=run_progress_repository,
+        recent_runs_limit=config.RECENT_RUNS_LIMIT,
     )
 
 
@@ -150,8 +296,23 @@ def override_providers(container: Container) -> Container:
     if not container.config.USE_STUBS():
         return container
     container.email_client.override(providers.Singleton(ConsoleClient, stream=StreamStub))
-    container.auth_client.override(providers.Singleton(NetflixAuthClientStub))
-    container.ugc_client.override(providers.Singleton(NetflixUgcClientStub))
+    config = container.config
+    container.auth_client.override(providers.Singleton(
+        NetflixAuthClientStub,
+        users_count=config.STUB_USERS_COUNT,
+        first_registration_date=config.STUB_FIRST_REGISTRATION_DATE,
+        last_registration_date=config.STUB_LAST_REGISTRATION_DATE,
+        distribution=config.STUB_REGISTRATION_DISTRIBUTION,
+        subscribers_percent=config.STUB_SUBSCRIBERS_PERCENT,
+        seed=config.STUB_SEED,
+    ))
+    container.ugc_client.override(providers.Singleton(
+        NetflixUgcClientStub,
+        films_count=config.STUB_FILMS_COUNT,
+        recommendations_count=config.STUB_RECOMMENDATIONS_COUNT,
+        popularity_exponent=config.STUB_FILMS_POPULARITY_EXPONENT,
+        seed=config.STUB_SEED,
+    ))
     return container
 
 
@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+import zlib
+from typing import Final
+
+from kombu.compression import register
+from pydantic import BaseModel
+
+FAST_COMPRESSION: Final[str] = "zlib-fast"
+FAST_COMPRESSION_CONTENT_TYPE: Final[str] = "application/x-zlib-fast"
+FAST_COMPRESSION_LEVEL: Final[int] = 1
+
+# Маркер тела сообщения, которое меньше порога сжатия и передается как есть.
+RAW_BODY_MARKER: Final[bytes] = b"\x00"
+
+# Маркер сжатого тела сообщения. Тела без маркера сжаты zlib целиком (первый байт заголовка zlib - 0x78).
+COMPRESSED_BODY_MARKER: Final[bytes] = b"\x01"
+
+# Количество сжатых сообщений, после которого статистика сжатия записывается в лог.
+STATS_LOG_INTERVAL: Final[int] = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class CompressionStats(BaseModel):
+    """Статистика сжатия сообщений в текущем процессе.
+
+    Размеры и время сжатия учитываются только для сжатых сообщений. Время указано в секундах.
+    """
+
+    messages_count: int = 0
+    compressed_count: int = 0
+    raw_size: int = 0
+    compressed_size: int = 0
+    duration: float = 0
+    ratio: float = 0
+
+
+class MessageCompressor:
+    """Быстрое сжатие zlib тел сообщений kombu размером от `threshold` байт.
+
+    Размер проверяется у тела, которое уже сериализовал kombu, поэтому аргументы задачи повторно не сериализуются.
+    Сообщения меньше порога передаются как есть с отдельным маркером.
+    """
+
+    def __init__(self, *, threshold: int) -> None:
+        self._threshold = threshold
+        self._stats = CompressionStats()
+        self._lock = threading.Lock()
+
+    def compress(self, body: bytes) -> bytes:
+        """Сжатие тела сообщения, если его размер не меньше порога, с записью статистики."""
+        if len(body) < self._threshold:
+            with self._lock:
+                self._stats.messages_count += 1
+            return RAW_BODY_MARKER + body
+        started_at = time.perf_counter()
+        compressed_body = zlib.compress(body, FAST_COMPRESSION_LEVEL)
+        duration = time.perf_counter() - started_at
+        with self._lock:
+            stats = self._stats
+            stats.messages_count += 1
+            stats.compressed_count += 1
+            stats.raw_size += len(body)
+            stats.compressed_size += len(compressed_body)
+            stats.duration += duration
+            stats.ratio = stats.raw_size / stats.compressed_size
+            if not stats.compressed_count % STATS_LOG_INTERVAL:
+                logger.info(
+                    f"Compressed {stats.compressed_count} of {stats.messages_count} messages, "
+                    f"total ratio: {stats.ratio:.2f}, total time: {stats.duration:.3f}s",
+                )
+        return COMPRESSED_BODY_MARKER + compressed_body
+
+    @staticmethod
+    def decompress(body: bytes) -> bytes:
+        """Распаковка тела сообщения."""
+        marker, data = body[:1], body[1:]
+        if marker == RAW_BODY_MARKER:
+            return data
+        if marker == COMPRESSED_BODY_MARKER:
+            return zlib.decompress(data)
+        return zlib.decompress(body)
+
+    def get_stats(self) -> CompressionStats:
+        """Получение статистики сжатия сообщений."""
+        with self._lock:
+            return self._stats.copy()
+
+
+def register_fast_compression(message_compressor: MessageCompressor, /) -> None:
+    """Регистрация быстрого сжатия zlib в kombu."""
+    register(
+        message_compressor.compress, message_compressor.decompress,
+        FAST_COMPRESSION_CONTENT_TYPE, aliases=[FAST_COMPRESSION],
+    )
@@ -1,3 +1,4 @@
+import datetime
 import enum
 from functools import lru_cache
 from typing import Union
@@ -6,6 +7,8 @@ from kombu import Exchange, Queue
 from pydantic import AnyHttpUrl, Field, validator
 from pydantic.env_settings import BaseSettings
 
+from .serializers import MSGPACK_CONTENT_TYPE, MSGPACK_SERIALIZER
+
 
 class CeleryQueue(str, enum.Enum):
     """Очереди в Celery."""
@@ -29,11 +32,11 @@ class CelerySettings:
     """Настройки Celery."""
 
     TIMEZONE = "Europe/Moscow"
-    # XXX: celery-chunkify необходим `pickle` сериализатор для использования date/datetime чанков
-    # TODO [Дипломный проект]: Доработать celery-chunkify-task и избавиться от необходимости использования pickle
-    CELERY_ACCEPT_CONTENT = ["application/json", "application/x-python-serialize", "pickle"]
-    RESULT_SERIALIZER = "json"
-    TASK_SERIALIZER = "json"
+    # msgpack с поддержкой date/datetime/timedelta/UUID, см. `notifications.core.serializers`;
+    # Celery читает только настройки в нижнем регистре или со старым префиксом `CELERY_`
+    accept_content = ["application/json", MSGPACK_CONTENT_TYPE]
+    result_serializer = "json"
+    task_serializer = MSGPACK_SERIALIZER
     RESULT_EXPIRES = 10 * 60
     TASK_TIME_LIMIT = 8 * 60 * 60  # 8 hours
     TASK_SOFT_TIME_LIMIT = 10 * 60 * 60  # 10 hours
@@ -60,6 +63,18 @@ class Settings(BaseSettings):
     DEBUG: bool = Field(False)
     PROJECT_BASE_URL: str
     CACHE_HASHED_KEY_LENGTH: int = 10
+    USE_STUBS: bool = Field(False)
+
+    # Stubs
+    STUB_SEED: int = 0
+    STUB_USERS_COUNT: int = 10
+    STUB_FIRST_REGISTRATION_DATE: datetime.date = datetime.date(2015, 1, 1)
+    STUB_LAST_REGISTRATION_DATE: datetime.date = datetime.date(2023, 1, 1)
+    STUB_REGISTRATION_DISTRIBUTION: str = "uniform"
+    STUB_SUBSCRIBERS_PERCENT: int = 50
+    STUB_FILMS_COUNT: int = 2
+    STUB_RECOMMENDATIONS_COUNT: int = 2
+    STUB_FILMS_POPULARITY_EXPONENT: float = 1.0
 
     # Auth
     JWT_AUTH_SECRET_KEY: str = Field(env="NAA_SECRET_KEY")
@@ -73,6 +88,11 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_URL: str = None
     BEAT_DB_URL: str = None
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 30 * 60  # 30 minutes
 
     # Redis
     REDIS_DECODE_RESPONSES: bool = Field(True)
@@ -82,9 +102,82 @@ class Settings(BaseSettings):
     REDIS_CELERY_URL: str = Field(..., env="NN_CELERY_BROKER_URL")
     REDIS_KEY_PREFIX: str = Field("notifications")
 
+    # Templates
+    RENDERED_TEMPLATE_CACHE_TTL: int = 24 * 60 * 60  # 1 day
+    TEMPLATE_FRAGMENT_CACHE_SIZE: int = 10_000
+    TEMPLATE_FRAGMENT_CACHE_TTL: int = 60 * 60  # 1 hour
+
+    # Netflix Auth
+    NETFLIX_AUTH_BASE_URL: str = "http://api-auth:8000"
+    NETFLIX_AUTH_TIMEOUT: float = 10
+    NETFLIX_AUTH_MAX_CONNECTIONS: int = 10
+    NETFLIX_AUTH_MAX_RETRIES: int = 3
+    NETFLIX_AUTH_RETRY_BACKOFF: float = 0.5
+    NETFLIX_AUTH_PAGE_SIZE: int = 1_000
+
+    # Netflix UGC
+    UGC_BASE_URL: str = "http://api-ugc:8000"
+    UGC_TIMEOUT: float = 5
+    UGC_MAX_CONNECTIONS: int = 50
+    UGC_MAX_CONCURRENCY: int = 50
+    UGC_MAX_RETRIES: int = 2
+    UGC_RETRY_BACKOFF: float = 0.2
+    UGC_RESPONSE_CACHE_TTL: int = 5 * 60  # 5 minutes
+    UGC_RESPONSE_CACHE_SIZE: int = 100_000
+    UGC_FILMS_CACHE_TTL: int = 24 * 60 * 60  # 1 day
+
+    # Digest
+    DIGEST_PREFETCH_BATCH_SIZE: int = 500
+    DIGEST_SPOOL_TTL: int = 24 * 60 * 60  # 1 day
+    DIGEST_SPOOL_BATCH_SIZE: int = 100
+    DIGEST_SPOOL_SENDERS: int = 4
+    DIGEST_SPOOL_BATCHES_PER_TASK: int = 20
+
+    # Notifications
+    NOTIFICATION_RECIPIENTS_BATCH_SIZE: int = 500
+
+    # Campaigns
+    CAMPAIGN_TTL: int = 7 * 24 * 60 * 60  # 7 days
+    CAMPAIGN_UPLOAD_BATCH_SIZE: int = 1000
+    CAMPAIGN_BATCHES_PER_TASK: int = 10
+    CAMPAIGN_POLL_INTERVAL: int = 5
+    CAMPAIGN_UPLOAD_TIMEOUT: int = 5 * 60  # 5 minutes
+
+    # Coalescing
+    COALESCING_MAX_WINDOW: int = 60 * 60  # 1 hour
+    COALESCING_MAX_NOTIFICATIONS: int = 50
+    COALESCING_STATE_TTL_MARGIN: int = 60 * 60  # 1 hour
+
+    # Suppressions
+    SUPPRESSIONS_REFRESH_INTERVAL: int = 5
+
+    # Audience
+    AUDIENCE_SNAPSHOTS_DIR: str = "/var/lib/notifications/audience"
+    AUDIENCE_SNAPSHOTS_TO_KEEP: int = 2
+    AUDIENCE_SNAPSHOT_BATCH_SIZE: int = 50_000
+    AUDIENCE_SNAPSHOT_REBUILD_INTERVAL: int = 23 * 60 * 60  # rebuilt on each daily refresh
+
+    # Periodic tasks
+    PERIODIC_TASKS_SPAWN_BATCH_SIZE: int = 500
+    CHUNK_TARGET_USERS: int = 10_000
+    CHUNK_TARGET_DURATION: int = 15 * 60  # 15 minutes
+    CHUNK_PARALLEL_LANES: int = 4
+    CHUNK_CHECKPOINT_TTL: int = 24 * 60 * 60  # 1 day
+    RUN_PROGRESS_TTL: int = 7 * 24 * 60 * 60  # 7 days
+    RUN_PROGRESS_FLUSH_INTERVAL: float = 1.0
+    RUN_PROGRESS_FLUSH_SIZE: int = 1_000
+    RECENT_RUNS_LIMIT: int = 50
+    PRODUCER_QUEUE_LOW_WATERMARK: int = 1_000
+    PRODUCER_QUEUE_HIGH_WATERMARK: int = 50_000
+    PRODUCER_MAX_DELAY: int = 60
+
     # Celery
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
+    CELERY_COMPRESSION_THRESHOLD: int = 1024
+    BEAT_CHANGES_POLL_INTERVAL: float = 1.0
+    BEAT_CHANGES_CHECK_INTERVAL: int = 60
+    BEAT_LEADER_LEASE_TTL: int = 10
     celery: CelerySettings = CelerySettings()
 
     class Config(EnvConfig):
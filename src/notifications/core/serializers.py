@@ -0,0 +1,56 @@
+import datetime
+import enum
+import functools
+import uuid
+from typing import Any, Final
+
+import msgpack
+from kombu.serialization import register
+
+MSGPACK_SERIALIZER: Final[str] = "msgpack-ext"
+MSGPACK_CONTENT_TYPE: Final[str] = "application/x-msgpack-ext"
+
+
+class MsgpackExtType(enum.IntEnum):
+    """Коды типов расширений msgpack."""
+
+    DATE = 1
+    DATETIME = 2
+    TIMEDELTA = 3
+    UUID = 4
+
+
+def _encode_ext(obj: Any) -> msgpack.ExtType:
+    """Кодирование типов, которые не поддерживаются msgpack."""
+    if isinstance(obj, datetime.datetime):
+        return msgpack.ExtType(MsgpackExtType.DATETIME, obj.isoformat().encode())
+    if isinstance(obj, datetime.date):
+        return msgpack.ExtType(MsgpackExtType.DATE, obj.toordinal().to_bytes(3, "big"))
+    if isinstance(obj, datetime.timedelta):
+        return msgpack.ExtType(MsgpackExtType.TIMEDELTA, msgpack.packb((obj.days, obj.seconds, obj.microseconds)))
+    if isinstance(obj, uuid.UUID):
+        return msgpack.ExtType(MsgpackExtType.UUID, obj.bytes)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not msgpack serializable")
+
+
+def _decode_ext(code: int, data: bytes) -> Any:
+    """Декодирование типов расширений msgpack."""
+    if code == MsgpackExtType.DATE:
+        return datetime.date.fromordinal(int.from_bytes(data, "big"))
+    if code == MsgpackExtType.DATETIME:
+        return datetime.datetime.fromisoformat(data.decode())
+    if code == MsgpackExtType.TIMEDELTA:
+        days, seconds, microseconds = msgpack.unpackb(data)
+        return datetime.timedelta(days=days, seconds=seconds, microseconds=microseconds)
+    if code == MsgpackExtType.UUID:
+        return uuid.UUID(bytes=data)
+    return msgpack.ExtType(code, data)
+
+
+dumps = functools.partial(msgpack.packb, default=_encode_ext)
+loads = functools.partial(msgpack.unpackb, ext_hook=_decode_ext, raw=False)
+
+
+def register_msgpack_serializer() -> None:
+    """Регистрация msgpack сериализатора с поддержкой date/datetime/timedelta/UUID в kombu."""
+    register(MSGPACK_SERIALIZER, dumps, loads, content_type=MSGPACK_CONTENT_TYPE, content_encoding="binary")
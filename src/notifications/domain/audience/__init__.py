@@ -0,0 +1,11 @@
+from .repositories import AudienceSnapshotRepository
+from .services import AudienceService
+from .snapshots import AudienceSnapshot
+from .types import AudienceSegment
+
+__all__ = [
+    "AudienceSegment",
+    "AudienceService",
+    "AudienceSnapshot",
+    "AudienceSnapshotRepository",
+]
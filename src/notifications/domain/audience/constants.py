@@ -0,0 +1,13 @@
+from typing import Final
+
+# Файл с метаданными снимка аудитории.
+SNAPSHOT_META_FILE: Final[str] = "meta.json"
+
+# Символическая ссылка на текущую версию снимка аудитории.
+CURRENT_SNAPSHOT_LINK: Final[str] = "current"
+
+# Суффикс каталога снимка, который еще не записан полностью.
+SNAPSHOT_TMP_SUFFIX: Final[str] = ".tmp"
+
+# Размер пачки пользователей при чтении снимка.
+SNAPSHOT_READ_BATCH_SIZE: Final[int] = 10_000
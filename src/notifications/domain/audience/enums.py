@@ -0,0 +1,9 @@
+import enum
+
+
+class ActivityFlag(enum.IntFlag):
+    """Флаги активности пользователя."""
+
+    EMAIL_CONFIRMED = 1
+    RECENTLY_ACTIVE = 2
+    HAS_SUBSCRIPTION = 4
@@ -0,0 +1,11 @@
+from http import HTTPStatus
+
+from notifications.common.exceptions import NetflixNotificationsError
+
+
+class UnsortedAudienceError(NetflixNotificationsError):
+    """Пользователи для снимка аудитории не отсортированы по дате регистрации."""
+
+    message = "Users must be sorted by registration date"
+    code = "unsorted_audience"
+    status_code: int = HTTPStatus.INTERNAL_SERVER_ERROR
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import datetime
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable
+
+from notifications.helpers import batched
+from notifications.integrations.auth.types import UserDetail
+
+from .constants import CURRENT_SNAPSHOT_LINK, SNAPSHOT_TMP_SUFFIX
+from .snapshots import AudienceSnapshot, AudienceSnapshotWriter
+
+
+class AudienceSnapshotRepository:
+    """Репозиторий для работы со снимками аудитории в каталоге `snapshots_dir`.
+
+    Каждая версия снимка записывается в отдельный каталог, текущая версия переключается атомарной заменой
+    символической ссылки. Открытые читателями версии не изменяются, поэтому продолжают работать после
+    переключения. Хранится не более `snapshots_to_keep` последних версий.
+    """
+
+    def __init__(self, snapshots_dir: str | Path, *, snapshots_to_keep: int, batch_size: int) -> None:
+        self._snapshots_dir = Path(snapshots_dir)
+        self._snapshots_to_keep = snapshots_to_keep
+        self._batch_size = batch_size
+        self._snapshot: AudienceSnapshot | None = None
+
+    def get_current(self) -> AudienceSnapshot | None:
+        """Получение текущей версии снимка.
+
+        Снимок открывается один раз на процесс и переоткрывается после переключения версии.
+        """
+        try:
+            version = os.readlink(self._snapshots_dir / CURRENT_SNAPSHOT_LINK)
+        except FileNotFoundError:
+            return None
+        if self._snapshot is None or self._snapshot.version != version:
+            self._snapshot = AudienceSnapshot(self._snapshots_dir / version)
+        return self._snapshot
+
+    def create(
+        self, users: Iterable[UserDetail], /, *, synced_until: datetime.date, base: AudienceSnapshot | None = None,
+    ) -> AudienceSnapshot:
+        """Создание новой версии снимка и ее публикация.
+
+        Пользователи `users` дописываются к снимку `base`.
+        """
+        version = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        tmp_path = self._snapshots_dir / f"{version}{SNAPSHOT_TMP_SUFFIX}"
+        with AudienceSnapshotWriter(tmp_path, base=base) as writer:
+            for users_batch in batched(users, self._batch_size):
+                writer.write(users_batch)
+            writer.save(synced_until=synced_until)
+        tmp_path.rename(self._snapshots_dir / version)
+        self._publish(version)
+        self._remove_stale_versions()
+        return self.get_current()
+
+    def _publish(self, version: str, /) -> None:
+        """Атомарное переключение текущей версии снимка."""
+        tmp_link = self._snapshots_dir / f"{CURRENT_SNAPSHOT_LINK}{SNAPSHOT_TMP_SUFFIX}"
+        tmp_link.unlink(missing_ok=True)
+        tmp_link.symlink_to(version)
+        tmp_link.replace(self._snapshots_dir / CURRENT_SNAPSHOT_LINK)
+
+    def _remove_stale_versions(self) -> None:
+        """Удаление старых версий снимка и незавершенных записей."""
+        versions = sorted(path for path in self._snapshots_dir.iterdir() if path.is_dir() and not path.is_symlink())
+        complete_versions = [path for path in versions if not path.name.endswith(SNAPSHOT_TMP_SUFFIX)]
+        stale_versions = {*complete_versions[:-self._snapshots_to_keep], *(set(versions) - set(complete_versions))}
+        for path in stale_versions:
+            shutil.rmtree(path, ignore_errors=True)
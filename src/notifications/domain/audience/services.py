@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import datetime
+from typing import Iterator
+
+from notifications.integrations.auth import NetflixAuthClient
+from notifications.integrations.auth.types import BoundaryRegistrationDate, RegistrationDensity, UserDetail
+from notifications.types import seconds
+
+from .repositories import AudienceSnapshotRepository
+from .snapshots import AudienceSnapshot
+from .types import AudienceSegment
+
+
+class AudienceService:
+    """Сервис для работы с аудиторией рассылок."""
+
+    def __init__(
+        self,
+        auth_client: NetflixAuthClient,
+        snapshot_repository: AudienceSnapshotRepository, *,
+        rebuild_interval: seconds,
+    ) -> None:
+        assert isinstance(auth_client, NetflixAuthClient)
+        self._auth_client = auth_client
+
+        assert isinstance(snapshot_repository, AudienceSnapshotRepository)
+        self._snapshot_repository = snapshot_repository
+
+        self._rebuild_interval = rebuild_interval
+
+    def refresh_snapshot(self) -> AudienceSnapshot | None:
+        """Обновление снимка аудитории.
+
+        Если с последней полной пересборки снимка прошло больше `rebuild_interval` секунд, то снимок собирается
+        заново: так в него попадают изменения данных и удаления пользователей. Иначе из сервиса Auth запрашиваются
+        только пользователи, зарегистрированные после последнего обновления.
+        """
+        snapshot = self._snapshot_repository.get_current()
+        boundaries = self._auth_client.get_boundary_registration_dates()
+        if snapshot is not None and self._is_rebuild_due(snapshot):
+            snapshot = None
+        if snapshot is not None:
+            if snapshot.synced_until >= boundaries.last_registration_date:
+                return snapshot
+            boundaries.first_registration_date = snapshot.synced_until
+        users = self._auth_client.get_users_within_registration_date_range_iter(boundaries)
+        return self._snapshot_repository.create(users, synced_until=boundaries.last_registration_date, base=snapshot)
+
+    def get_users_within_registration_date_range_iter(
+        self, date_range: BoundaryRegistrationDate, /, *, segment: AudienceSegment | None = None,
+    ) -> Iterator[UserDetail]:
+        """Получение пользователей сегмента `segment` по заданному диапазону дат регистрации.
+
+        Пользователи читаются из снимка аудитории, из сервиса Auth запрашиваются только пользователи,
+        которые зарегистрировались после последнего обновления снимка.
+        """
+        start, end = date_range.first_registration_date, date_range.last_registration_date
+        if segment is not None:
+            start, end = segment.get_date_range(start, end)
+        snapshot = self._snapshot_repository.get_current()
+        if snapshot is not None and start < snapshot.synced_until:
+            snapshot_end = min(end, snapshot.synced_until)
+            if segment is None:
+                yield from snapshot.iter_users_within_registration_date_range(start, snapshot_end)
+            else:
+                yield from snapshot.iter_users_at(snapshot.select(segment, start, snapshot_end))
+            start = snapshot.synced_until
+        if start >= end:
+            return
+        users = self._auth_client.get_users_within_registration_date_range_iter(
+            BoundaryRegistrationDate(first_registration_date=start, last_registration_date=end))
+        if segment is None:
+            yield from users
+        else:
+            yield from (user for user in users if segment.matches(user))
+
+    def get_registration_density(
+        self, date_range: BoundaryRegistrationDate, /, *, segment: AudienceSegment,
+    ) -> RegistrationDensity | None:
+        """Получение гистограммы регистраций пользователей сегмента `segment` по дням.
+
+        Гистограмма рассчитывается по снимку аудитории. Возвращает None, если снимок не покрывает диапазон дат.
+        """
+        snapshot = self._snapshot_repository.get_current()
+        if snapshot is None or date_range.last_registration_date > snapshot.synced_until:
+            return None
+        indexes = snapshot.select(segment, date_range.first_registration_date, date_range.last_registration_date)
+        return RegistrationDensity(counts=snapshot.get_registration_counts(indexes))
+
+    def _is_rebuild_due(self, snapshot: AudienceSnapshot, /) -> bool:
+        """Проверка, что снимок пора пересобрать полностью."""
+        if snapshot.rebuilt_at is None:
+            return True
+        elapsed = datetime.datetime.now(datetime.timezone.utc) - snapshot.rebuilt_at
+        return elapsed.total_seconds() >= self._rebuild_interval
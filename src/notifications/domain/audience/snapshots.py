@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import datetime
+import enum
+import json
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator, Sequence
+
+import numpy as np
+
+from notifications.integrations.auth.types import UserDetail
+
+from .constants import SNAPSHOT_META_FILE, SNAPSHOT_READ_BATCH_SIZE
+from .exceptions import UnsortedAudienceError
+from .types import AudienceSegment, get_email_domain
+
+
+class Column(str, enum.Enum):
+    """Колонки снимка аудитории фиксированного размера."""
+
+    PK = "pk"
+    REGISTRATION_DATE = "registration_date"
+    ROLE = "role"
+    TIMEZONE = "timezone"
+    ACTIVITY_FLAGS = "activity_flags"
+    EMAIL_DOMAIN = "email_domain"
+
+    @property
+    def path(self) -> str:
+        return f"{self.value}.bin"
+
+
+class StringColumn(str, enum.Enum):
+    """Строковые колонки снимка аудитории: строки в UTF-8 подряд в куче и массив смещений."""
+
+    EMAIL = "email"
+    FIRST_NAME = "first_name"
+    LAST_NAME = "last_name"
+
+    @property
+    def offsets_path(self) -> str:
+        return f"{self.value}.offsets.bin"
+
+    @property
+    def heap_path(self) -> str:
+        return f"{self.value}.heap.bin"
+
+
+COLUMN_DTYPES: dict[Column, np.dtype] = {
+    Column.PK: np.dtype("V16"),
+    Column.REGISTRATION_DATE: np.dtype("<M8[D]"),
+    Column.ROLE: np.dtype("u1"),
+    Column.TIMEZONE: np.dtype("<u2"),
+    Column.ACTIVITY_FLAGS: np.dtype("u1"),
+    Column.EMAIL_DOMAIN: np.dtype("<u4"),
+}
+OFFSETS_DTYPE = np.dtype("<i8")
+HEAP_DTYPE = np.dtype("u1")
+
+
+def get_snapshot_files() -> list[str]:
+    """Получение списка файлов колонок снимка аудитории."""
+    return [
+        *(column.path for column in Column),
+        *(path for column in StringColumn for path in (column.offsets_path, column.heap_path)),
+    ]
+
+
+class AudienceSnapshot:
+    """Снимок аудитории: пользователи, отсортированные по дате регистрации, в колоночном формате.
+
+    Каждая колонка хранится в отдельном файле и отображается в память только для чтения: процессы воркеров
+    используют общие страницы файлового кэша, а срезы колонок не копируют данные.
+    Роли, часовые пояса и домены адресов почты хранятся кодами в словарях из метаданных,
+    код часового пояса 0 - часовой пояс не задан.
+    """
+
+    def __init__(self, path: Path, /) -> None:
+        self.path = path
+        self.meta: dict[str, Any] = json.loads((path / SNAPSHOT_META_FILE).read_text())
+        self.users_count: int = self.meta["users_count"]
+        self.synced_until = datetime.date.fromisoformat(self.meta["synced_until"])
+        self.roles: list[str] = self.meta["roles"]
+        self.timezones: list[str | None] = self.meta["timezones"]
+        self.domains: list[str] = self.meta["domains"]
+        self.rebuilt_at: datetime.datetime | None = None
+        if rebuilt_at := self.meta.get("rebuilt_at"):
+            self.rebuilt_at = datetime.datetime.fromisoformat(rebuilt_at)
+        self.columns = {
+            column: self._open(column.path, COLUMN_DTYPES[column], self.users_count)
+            for column in Column
+        }
+        self.string_columns = {
+            column: (
+                self._open(column.offsets_path, OFFSETS_DTYPE, self.users_count + 1),
+                self._open(column.heap_path, HEAP_DTYPE, self.meta["heap_sizes"][column.value]),
+            )
+            for column in StringColumn
+        }
+
+    def __len__(self) -> int:
+        return self.users_count
+
+    @property
+    def version(self) -> str:
+        return self.path.name
+
+    @property
+    def registration_dates(self) -> np.ndarray:
+        return self.columns[Column.REGISTRATION_DATE]
+
+    def get_index_range(self, start: datetime.date, end: datetime.date, /) -> tuple[int, int]:
+        """Получение диапазона индексов пользователей, зарегистрированных в диапазоне [`start`, `end`)."""
+        bounds = np.array([start, end], dtype=COLUMN_DTYPES[Column.REGISTRATION_DATE])
+        start_index, end_index = np.searchsorted(self.registration_dates, bounds)
+        return int(start_index), int(end_index)
+
+    def get_strings(self, column: StringColumn, indexes: np.ndarray, /) -> list[str]:
+        """Получение значений строковой колонки для индексов `indexes`."""
+        offsets, heap = self.string_columns[column]
+        return [
+            heap[start:end].tobytes().decode()
+            for start, end in zip(offsets[indexes].tolist(), offsets[indexes + 1].tolist())
+        ]
+
+    def select(self, segment: AudienceSegment, start: datetime.date, end: datetime.date, /) -> np.ndarray:
+        """Получение отсортированных индексов пользователей сегмента `segment`, зарегистрированных в [`start`, `end`).
+
+        Условия сегмента вычисляются векторно над срезами колонок, принадлежность кодов ролей и доменов
+        множеству значений проверяется по таблице.
+        """
+        start_index, end_index = self.get_index_range(*segment.get_date_range(start, end))
+        if start_index >= end_index:
+            return np.empty(0, dtype=np.int64)
+        columns = {column: self.columns[column][start_index:end_index] for column in Column}
+        mask = np.ones(end_index - start_index, dtype=bool)
+        if segment.roles is not None:
+            mask &= self._get_lookup(self.roles, segment.roles)[columns[Column.ROLE]]
+        if segment.required_flags:
+            mask &= columns[Column.ACTIVITY_FLAGS] & segment.required_flags == segment.required_flags
+        if segment.excluded_flags:
+            mask &= columns[Column.ACTIVITY_FLAGS] & segment.excluded_flags == 0
+        if segment.allowed_domains is not None:
+            mask &= self._get_lookup(self.domains, segment.allowed_domains)[columns[Column.EMAIL_DOMAIN]]
+        if segment.denied_domains:
+            mask &= ~self._get_lookup(self.domains, segment.denied_domains)[columns[Column.EMAIL_DOMAIN]]
+        return np.flatnonzero(mask) + start_index
+
+    def iter_users(self, start_index: int, end_index: int, /) -> Iterator[UserDetail]:
+        """Получение пользователей с индексами в диапазоне [`start_index`, `end_index`)."""
+        yield from self.iter_users_at(np.arange(start_index, end_index))
+
+    def iter_users_at(self, indexes: np.ndarray, /) -> Iterator[UserDetail]:
+        """Получение пользователей с индексами `indexes`."""
+        for batch_start in range(0, len(indexes), SNAPSHOT_READ_BATCH_SIZE):
+            batch_indexes = indexes[batch_start:batch_start + SNAPSHOT_READ_BATCH_SIZE]
+            rows = zip(
+                *(self.columns[column][batch_indexes].tolist() for column in Column),
+                *(self.get_strings(column, batch_indexes) for column in StringColumn),
+            )
+            for pk, registration_date, role_code, timezone_code, flags, _, email, first_name, last_name in rows:
+                yield UserDetail.construct(
+                    pk=uuid.UUID(bytes=pk),
+                    email=email,
+                    first_name=first_name,
+                    last_name=last_name,
+                    role=self.roles[role_code],
+                    registration_date=registration_date,
+                    timezone=self.timezones[timezone_code],
+                    activity_flags=flags,
+                )
+
+    def get_registration_counts(self, indexes: np.ndarray, /) -> dict[datetime.date, int]:
+        """Получение количества регистраций по дням для пользователей с индексами `indexes`."""
+        dates, counts = np.unique(self.registration_dates[indexes], return_counts=True)
+        return dict(zip(dates.tolist(), counts.tolist()))
+
+    def iter_users_within_registration_date_range(
+        self, start: datetime.date, end: datetime.date, /,
+    ) -> Iterator[UserDetail]:
+        """Получение пользователей, зарегистрированных в диапазоне [`start`, `end`)."""
+        yield from self.iter_users(*self.get_index_range(start, end))
+
+    @staticmethod
+    def _get_lookup(dictionary: list[Any], values: Iterable[Any], /) -> np.ndarray:
+        """Получение таблицы принадлежности кодов словаря `dictionary` множеству значений `values`."""
+        values = set(values)
+        return np.fromiter((value in values for value in dictionary), dtype=bool, count=len(dictionary))
+
+    def _open(self, file_name: str, dtype: np.dtype, count: int, /) -> np.ndarray:
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self.path / file_name, dtype=dtype, mode="r", shape=(count, ))
+
+
+class AudienceSnapshotWriter:
+    """Потоковая запись снимка аудитории в каталог `path`.
+
+    Если передан снимок `base`, то его файлы копируются целиком, а новые пользователи дописываются в конец.
+    Время полной пересборки `rebuilt_at` в метаданных наследуется от снимка `base`.
+    Пользователи должны поступать в порядке даты регистрации.
+    """
+
+    def __init__(self, path: Path, /, *, base: AudienceSnapshot | None = None) -> None:
+        self.path = path
+        self.path.mkdir(parents=True)
+        self._users_count = 0
+        self._heap_sizes = {column: 0 for column in StringColumn}
+        self._roles: dict[str, int] = {}
+        self._timezones: dict[str | None, int] = {None: 0}
+        self._domains: dict[str, int] = {}
+        self._last_registration_date: datetime.date | None = None
+        self._rebuilt_at = datetime.datetime.now(datetime.timezone.utc)
+        if base is not None:
+            for file_name in get_snapshot_files():
+                shutil.copyfile(base.path / file_name, self.path / file_name)
+            self._users_count = base.users_count
+            self._heap_sizes = {column: base.meta["heap_sizes"][column.value] for column in StringColumn}
+            self._roles = {role: code for code, role in enumerate(base.roles)}
+            self._timezones = {timezone: code for code, timezone in enumerate(base.timezones)}
+            self._domains = {domain: code for code, domain in enumerate(base.domains)}
+            self._rebuilt_at = base.rebuilt_at
+            if base.users_count:
+                self._last_registration_date = base.registration_dates[-1].item()
+        self._files: dict[str, BinaryIO] = {
+            file_name: open(self.path / file_name, "ab")
+            for file_name in get_snapshot_files()
+        }
+        if base is None:
+            for column in StringColumn:
+                self._files[column.offsets_path].write(np.zeros(1, dtype=OFFSETS_DTYPE).tobytes())
+
+    def __enter__(self) -> AudienceSnapshotWriter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        for column_file in self._files.values():
+            column_file.close()
+
+    def write(self, users: Sequence[UserDetail], /) -> None:
+        """Запись пачки пользователей в конец снимка."""
+        if not users:
+            return
+        registration_dates = np.array(
+            [user.registration_date for user in users], dtype=COLUMN_DTYPES[Column.REGISTRATION_DATE])
+        if np.any(registration_dates[1:] < registration_dates[:-1]) or (
+            self._last_registration_date is not None and users[0].registration_date < self._last_registration_date
+        ):
+            raise UnsortedAudienceError
+        columns = {
+            Column.PK: [user.pk.bytes for user in users],
+            Column.REGISTRATION_DATE: registration_dates,
+            Column.ROLE: [self._roles.setdefault(user.role, len(self._roles)) for user in users],
+            Column.TIMEZONE: [
+                self._timezones.setdefault(user.timezone, len(self._timezones)) for user in users
+            ],
+            Column.ACTIVITY_FLAGS: [user.activity_flags for user in users],
+            Column.EMAIL_DOMAIN: [
+                self._domains.setdefault(get_email_domain(user.email), len(self._domains)) for user in users
+            ],
+        }
+        for column, values in columns.items():
+            self._files[column.path].write(np.asarray(values, dtype=COLUMN_DTYPES[column]).tobytes())
+        for column in StringColumn:
+            strings = [getattr(user, column.value).encode() for user in users]
+            offsets = np.cumsum([len(string) for string in strings], dtype=OFFSETS_DTYPE) + self._heap_sizes[column]
+            self._files[column.offsets_path].write(offsets.tobytes())
+            self._files[column.heap_path].write(b"".join(strings))
+            self._heap_sizes[column] = int(offsets[-1])
+        self._users_count += len(users)
+        self._last_registration_date = users[-1].registration_date
+
+    def save(self, *, synced_until: datetime.date) -> None:
+        """Запись метаданных снимка.
+
+        Все пользователи, зарегистрированные до `synced_until`, уже записаны в снимок.
+        """
+        for column_file in self._files.values():
+            column_file.flush()
+        meta = {
+            "users_count": self._users_count,
+            "heap_sizes": {column.value: heap_size for column, heap_size in self._heap_sizes.items()},
+            "synced_until": synced_until.isoformat(),
+            "roles": list(self._roles),
+            "timezones": list(self._timezones),
+            "domains": list(self._domains),
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "rebuilt_at": None if self._rebuilt_at is None else self._rebuilt_at.isoformat(),
+        }
+        (self.path / SNAPSHOT_META_FILE).write_text(json.dumps(meta))
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from celery import shared_task
+from dependency_injector.wiring import Provide, inject
+
+from notifications.containers import Container
+from notifications.core.config import CeleryQueue
+
+if TYPE_CHECKING:
+    from notifications.celery import Task
+
+    from .services import AudienceService
+
+
+@shared_task(
+    queue=CeleryQueue.COMMON.value,
+    bind=True,
+    ignore_result=True,
+    time_limit=2 * 60 * 60,
+    soft_time_limit=60 * 60,
+    lock_ttl=2 * 60 * 60,
+)
+@inject
+def refresh_audience_snapshot(
+    self: Task,
+    *args,
+    audience_service: AudienceService = Provide[Container.audience_service],
+    **kwargs,
+) -> None:
+    """Фоновая задача по обновлению снимка аудитории."""
+    snapshot = audience_service.refresh_snapshot()
+    self.log.info(f"Audience snapshot <{snapshot.version}>: {len(snapshot)} users.")
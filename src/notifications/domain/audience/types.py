@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import datetime
+
+from pydantic import BaseModel, validator
+
+from notifications.integrations.auth.types import UserDetail
+
+
+class AudienceSegment(BaseModel):
+    """Сегмент аудитории рассылки.
+
+    Пользователь попадает в сегмент, если выполнены все заданные условия:
+    - роль из списка `roles`;
+    - дата регистрации в диапазоне [`registration_date_from`, `registration_date_to`);
+    - установлены все флаги активности `required_flags` и не установлен ни один из `excluded_flags`;
+    - домен адреса почты из списка `allowed_domains` и не из списка `denied_domains`.
+    """
+
+    roles: list[str] | None = None
+    registration_date_from: datetime.date | None = None
+    registration_date_to: datetime.date | None = None
+    required_flags: int = 0
+    excluded_flags: int = 0
+    allowed_domains: list[str] | None = None
+    denied_domains: list[str] = []
+
+    @validator("allowed_domains", "denied_domains", each_item=True)
+    def normalize_domain(cls, value: str) -> str:
+        return value.lower()
+
+    def get_date_range(
+        self, start: datetime.date, end: datetime.date, /,
+    ) -> tuple[datetime.date, datetime.date]:
+        """Пересечение диапазона дат регистрации [`start`, `end`) с диапазоном дат сегмента."""
+        if self.registration_date_from is not None:
+            start = max(start, self.registration_date_from)
+        if self.registration_date_to is not None:
+            end = min(end, self.registration_date_to)
+        return start, end
+
+    def matches(self, user: UserDetail, /) -> bool:
+        """Проверка, что пользователь `user` попадает в сегмент."""
+        start, end = self.get_date_range(user.registration_date, user.registration_date + datetime.timedelta(days=1))
+        domain = get_email_domain(user.email)
+        return (
+            start < end and
+            (self.roles is None or user.role in self.roles) and
+            user.activity_flags & self.required_flags == self.required_flags and
+            not user.activity_flags & self.excluded_flags and
+            (self.allowed_domains is None or domain in self.allowed_domains) and
+            domain not in self.denied_domains
+        )
+
+
+def get_email_domain(email: str, /) -> str:
+    """Получение домена адреса почты."""
+    return email.rpartition("@")[2].lower()
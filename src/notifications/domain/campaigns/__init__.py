@@ -0,0 +1,9 @@
+from .repositories import CampaignRepository
+from .services import CampaignService
+from .types import Campaign
+
+__all__ = [
+    "Campaign",
+    "CampaignRepository",
+    "CampaignService",
+]
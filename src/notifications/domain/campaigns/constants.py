@@ -0,0 +1,10 @@
+from typing import Final
+
+# Префикс ключей кампаний: прогресса загрузки и очереди получателей.
+CAMPAIGN_PREFIX: Final[str] = "campaigns"
+
+# Колонка CSV файла и поле NDJSON объекта с адресом получателя.
+EMAIL_FIELD: Final[str] = "email"
+
+# Поле NDJSON объекта с контекстом получателя.
+CONTEXT_FIELD: Final[str] = "context"
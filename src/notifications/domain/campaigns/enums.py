@@ -0,0 +1,17 @@
+import enum
+
+
+class CampaignStatus(str, enum.Enum):
+    """Статус кампании."""
+
+    UPLOADING = "uploading"
+    UPLOADED = "uploaded"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class UploadFormat(str, enum.Enum):
+    """Формат файла с получателями кампании: тип содержимого запроса."""
+
+    CSV = "text/csv"
+    NDJSON = "application/x-ndjson"
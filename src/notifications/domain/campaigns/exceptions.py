@@ -0,0 +1,19 @@
+from http import HTTPStatus
+
+from notifications.common.exceptions import NetflixNotificationsError
+
+
+class UnsupportedUploadFormatError(NetflixNotificationsError):
+    """Неподдерживаемый формат файла с получателями."""
+
+    message = "Upload format is not supported, use text/csv or application/x-ndjson"
+    code = "unsupported_upload_format"
+    status_code: int = HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+
+class InvalidUploadError(NetflixNotificationsError):
+    """Некорректный файл с получателями."""
+
+    message = "Upload is invalid"
+    code = "invalid_upload"
+    status_code: int = HTTPStatus.BAD_REQUEST
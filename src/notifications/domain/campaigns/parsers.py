@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import codecs
+import csv
+from typing import Any, AsyncIterator
+
+import orjson
+
+from .constants import CONTEXT_FIELD, EMAIL_FIELD
+from .exceptions import InvalidUploadError
+from .types import CampaignRecipient
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], /) -> AsyncIterator[str]:
+    """Построчное чтение потока байт в кодировке UTF-8.
+
+    В памяти хранится только текущая незавершенная строка. Строки возвращаются с символом перевода строки.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if tail := tail + decoder.decode(b"", final=True):
+        yield tail
+
+
+async def iter_ndjson_recipients(lines: AsyncIterator[str], /) -> AsyncIterator[CampaignRecipient | None]:
+    """Чтение получателей из NDJSON: объектов с адресом `email` и контекстом `context`.
+
+    Для некорректных строк возвращается None.
+    """
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            yield None
+            continue
+        if not isinstance(row, dict):
+            yield None
+            continue
+        yield _make_recipient(row.get(EMAIL_FIELD), row.get(CONTEXT_FIELD) or {})
+
+
+async def iter_csv_recipients(lines: AsyncIterator[str], /) -> AsyncIterator[CampaignRecipient | None]:
+    """Чтение получателей из CSV: первая строка - заголовок с колонкой `email`, остальные колонки - контекст.
+
+    Запись с переводом строки в кавычках собирается из нескольких строк. Для некорректных записей возвращается None.
+    """
+    header: list[str] | None = None
+    record_lines: list[str] = []
+    quotes_count = 0
+    async for line in lines:
+        record_lines.append(line)
+        quotes_count += line.count('"')
+        if quotes_count % 2:
+            continue
+        row = next(csv.reader(record_lines), [])
+        record_lines.clear()
+        quotes_count = 0
+        if not any(row):
+            continue
+        if header is None:
+            header = [column.strip() for column in row]
+            if EMAIL_FIELD not in header:
+                raise InvalidUploadError(message=f"CSV header must contain <{EMAIL_FIELD}> column")
+            continue
+        if len(row) != len(header):
+            yield None
+            continue
+        context = dict(zip(header, row))
+        yield _make_recipient(context.pop(EMAIL_FIELD), context)
+    if record_lines:
+        yield None
+
+
+def _make_recipient(email: Any, context: Any) -> CampaignRecipient | None:
+    if not isinstance(email, str) or not isinstance(context, dict):
+        return None
+    return CampaignRecipient(email=email, context=context)
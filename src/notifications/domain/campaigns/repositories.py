@@ -0,0 +1,131 @@
+import time
+import zlib
+from typing import Sequence
+
+import orjson
+
+from notifications.infrastructure.db.cache import CacheKeyBuilder
+from notifications.infrastructure.db.redis import RedisClient
+from notifications.types import seconds
+
+from .constants import CAMPAIGN_PREFIX
+from .enums import CampaignStatus
+from .types import Campaign, CampaignRecipient
+
+# Добавление пачки получателей ARGV[2] в очередь кампании во время ARGV[3] и увеличение счетчиков прогресса ARGV[4:].
+# Счетчики передаются парами поле-значение, пустая пачка в очередь не добавляется.
+PUSH_SCRIPT = """
+if ARGV[2] ~= "" then
+    redis.call("RPUSH", KEYS[2], ARGV[2])
+    redis.call("EXPIRE", KEYS[2], ARGV[1])
+end
+redis.call("HSET", KEYS[1], "heartbeat_at", ARGV[3])
+for i = 4, #ARGV, 2 do
+    redis.call("HINCRBY", KEYS[1], ARGV[i], ARGV[i + 1])
+end
+"""
+
+# Удаление обработанной пачки из начала очереди кампании и увеличение счетчика поставленных писем на ARGV[1].
+ACK_SCRIPT = """
+redis.call("LPOP", KEYS[2])
+redis.call("HINCRBY", KEYS[1], "queued_count", ARGV[1])
+"""
+
+# Завершение кампании, если файл загружен полностью и очередь получателей пуста, или отметка о неудачной загрузке,
+# если файл загружается, но пачки не добавлялись с момента ARGV[5]. Возвращает статус кампании.
+COMPLETE_SCRIPT = """
+local status = redis.call("HGET", KEYS[1], "status")
+if status == ARGV[1] and redis.call("LLEN", KEYS[2]) == 0 then
+    redis.call("HSET", KEYS[1], "status", ARGV[2])
+    return ARGV[2]
+end
+if status == ARGV[3] and tonumber(redis.call("HGET", KEYS[1], "heartbeat_at") or 0) < tonumber(ARGV[5]) then
+    redis.call("HSET", KEYS[1], "status", ARGV[4])
+    return ARGV[4]
+end
+return status
+"""
+
+
+class CampaignRepository:
+    """Хранилище кампаний в Redis.
+
+    Прогресс кампании хранится в хеш-таблице вместе со временем добавления последней пачки,
+    получатели - в очереди пачками: каждая пачка - сжатый список пар из адреса и контекста получателя.
+    Все ключи кампании хранятся `ttl` секунд.
+    """
+
+    def __init__(self, redis_client: RedisClient, ttl: seconds) -> None:
+        assert isinstance(redis_client, RedisClient)
+        self._redis_client = redis_client
+        self._ttl = ttl
+
+    async def create(self, campaign: Campaign, /) -> None:
+        """Сохранение новой кампании."""
+        mapping = {**campaign.dict(), "status": campaign.status.value, "heartbeat_at": time.time()}
+        await self._redis_client.hset(self._get_key(campaign.campaign_id, "progress"), mapping, timeout=self._ttl)
+
+    async def get(self, campaign_id: str, /) -> Campaign | None:
+        """Получение кампании с текущим прогрессом."""
+        data = await self._redis_client.hgetall(self._get_key(campaign_id, "progress"))
+        if not data:
+            return None
+        return Campaign.parse_obj({field.decode(): value.decode() for field, value in data.items()})
+
+    async def set_status(self, campaign_id: str, status: CampaignStatus, /) -> None:
+        """Изменение статуса кампании."""
+        await self._redis_client.hset(self._get_key(campaign_id, "progress"), {"status": status.value})
+
+    async def push_batch(
+        self, campaign_id: str, recipients: Sequence[CampaignRecipient], /, **counters: int,
+    ) -> None:
+        """Добавление пачки получателей в конец очереди и увеличение счетчиков прогресса `counters`."""
+        record = self._dump_record(recipients) if recipients else b""
+        args = [self._ttl, record, time.time(), *(item for counter in counters.items() for item in counter)]
+        await self._redis_client.run_script(PUSH_SCRIPT, keys=self._get_keys(campaign_id), args=args)
+
+    async def get_first_batch(self, campaign_id: str, /) -> list[CampaignRecipient] | None:
+        """Получение пачки получателей из начала очереди без удаления. Если очередь пуста, то возвращается None."""
+        record = await self._redis_client.lindex(self._get_key(campaign_id, "recipients"), 0)
+        if record is None:
+            return None
+        return self._load_record(record)
+
+    async def ack_first_batch(self, campaign_id: str, /, *, queued_count: int) -> None:
+        """Удаление обработанной пачки из начала очереди и учет `queued_count` поставленных писем."""
+        await self._redis_client.run_script(ACK_SCRIPT, keys=self._get_keys(campaign_id), args=[queued_count])
+
+    async def complete_if_drained(self, campaign_id: str, /, *, upload_timeout: seconds) -> CampaignStatus | None:
+        """Завершение кампании, если все получатели загружены и извлечены из очереди.
+
+        Если файл загружается, но новые пачки не добавлялись больше `upload_timeout` секунд,
+        то загрузка считается прерванной и кампания отмечается неудачной.
+
+        Returns:
+            Статус кампании после проверки или None, если кампания не найдена.
+        """
+        args = [
+            CampaignStatus.UPLOADED.value, CampaignStatus.COMPLETED.value,
+            CampaignStatus.UPLOADING.value, CampaignStatus.FAILED.value,
+            time.time() - upload_timeout,
+        ]
+        status = await self._redis_client.run_script(COMPLETE_SCRIPT, keys=self._get_keys(campaign_id), args=args)
+        if not status:
+            return None
+        return CampaignStatus(status.decode() if isinstance(status, bytes) else status)
+
+    @staticmethod
+    def _dump_record(recipients: Sequence[CampaignRecipient], /) -> bytes:
+        return zlib.compress(orjson.dumps([(recipient.email, recipient.context) for recipient in recipients]))
+
+    @staticmethod
+    def _load_record(record: bytes, /) -> list[CampaignRecipient]:
+        recipients = orjson.loads(zlib.decompress(record))
+        return [CampaignRecipient(email=email, context=context) for email, context in recipients]
+
+    def _get_keys(self, campaign_id: str, /) -> list[str]:
+        return [self._get_key(campaign_id, "progress"), self._get_key(campaign_id, "recipients")]
+
+    @staticmethod
+    def _get_key(campaign_id: str, suffix: str) -> str:
+        return CacheKeyBuilder.make_key_with_affixes(campaign_id, prefix=CAMPAIGN_PREFIX, suffix=suffix)
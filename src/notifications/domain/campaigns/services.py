@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import itertools
+import uuid
+from typing import AsyncIterator, Sequence
+
+from pydantic import EmailError
+from pydantic.networks import validate_email
+
+from notifications.common.exceptions import NotFoundError
+from notifications.core.config import CeleryQueue
+from notifications.domain.messages.types import NotificationPayload
+from notifications.domain.suppressions import SuppressionService
+from notifications.domain.templates import TemplateService
+from notifications.helpers import abatched
+from notifications.types import seconds
+
+from .enums import CampaignStatus, UploadFormat
+from .exceptions import UnsupportedUploadFormatError
+from .parsers import iter_csv_recipients, iter_lines, iter_ndjson_recipients
+from .repositories import CampaignRepository
+from .types import Campaign, CampaignRecipient
+
+
+class CampaignService:
+    """Сервис для рассылки писем по шаблону получателям из загруженного файла.
+
+    Файл читается потоком: получатели проверяются пачками по `upload_batch_size` и сохраняются в очередь кампании,
+    отправка начинается после загрузки первой пачки и идет параллельно с загрузкой остальных. Если новые пачки
+    не добавлялись больше `upload_timeout` секунд, то загрузка считается прерванной.
+    """
+
+    def __init__(
+        self,
+        campaign_repository: CampaignRepository,
+        template_service: TemplateService,
+        suppression_service: SuppressionService, *,
+        upload_batch_size: int,
+        upload_timeout: seconds,
+    ) -> None:
+        assert isinstance(campaign_repository, CampaignRepository)
+        self._campaign_repository = campaign_repository
+
+        assert isinstance(template_service, TemplateService)
+        self._template_service = template_service
+
+        assert isinstance(suppression_service, SuppressionService)
+        self._suppression_service = suppression_service
+
+        self._upload_batch_size = upload_batch_size
+        self._upload_timeout = upload_timeout
+
+    async def upload(
+        self,
+        chunks: AsyncIterator[bytes], /, *,
+        content_type: str,
+        template_slug: str,
+        email_subject: str,
+    ) -> Campaign:
+        """Создание кампании и загрузка получателей из потока байт файла в формате CSV или NDJSON.
+
+        Некорректные строки и адреса, а также адреса из списка подавления пропускаются и учитываются в прогрессе.
+        """
+        from .tasks import send_campaign
+
+        upload_format = self._clean_upload_format(content_type)
+        await self._template_service.get_by_slug(template_slug)
+        campaign = Campaign(campaign_id=uuid.uuid4().hex, template_slug=template_slug, email_subject=email_subject)
+        await self._campaign_repository.create(campaign)
+        parse_recipients = iter_csv_recipients if upload_format == UploadFormat.CSV else iter_ndjson_recipients
+        sending_started = False
+        try:
+            async for rows_batch in abatched(parse_recipients(iter_lines(chunks)), self._upload_batch_size):
+                await self._stage_recipients(campaign.campaign_id, rows_batch)
+                if not sending_started:
+                    send_campaign.delay(campaign.campaign_id)
+                    sending_started = True
+        except Exception:
+            await self._campaign_repository.set_status(campaign.campaign_id, CampaignStatus.FAILED)
+            raise
+        await self._campaign_repository.set_status(campaign.campaign_id, CampaignStatus.UPLOADED)
+        if not sending_started:
+            send_campaign.delay(campaign.campaign_id)
+        return await self.get(campaign.campaign_id)
+
+    async def get(self, campaign_id: str, /) -> Campaign:
+        """Получение кампании с текущим прогрессом загрузки и отправки."""
+        campaign = await self._campaign_repository.get(campaign_id)
+        if campaign is None:
+            raise NotFoundError(f"There is no campaign <{campaign_id}>.")
+        return campaign
+
+    async def send_batches(self, campaign_id: str, /, *, batches_count: int) -> int:
+        """Постановка задач на отправку писем не более чем `batches_count` пачкам получателей из очереди.
+
+        Пачка удаляется из очереди только после постановки задач: если обработка прервется, то пачка будет
+        обработана повторно, а повторные письма исключаются блокировками получателей.
+        Получатели провалившейся загрузки не обрабатываются.
+
+        Returns:
+            Количество обработанных пачек.
+        """
+        campaign = await self.get(campaign_id)
+        if campaign.status == CampaignStatus.FAILED:
+            return 0
+        template = await self._template_service.get_by_slug(campaign.template_slug)
+        content_hash = None
+        if self._template_service.is_static(template):
+            content_hash = await self._template_service.render_to_cache(template)
+        for batch_number in range(batches_count):
+            recipients = await self._campaign_repository.get_first_batch(campaign_id)
+            if recipients is None:
+                return batch_number
+            self._publish_batch(campaign, recipients, content_hash=content_hash)
+            await self._campaign_repository.ack_first_batch(campaign_id, queued_count=len(recipients))
+        return batches_count
+
+    async def complete_if_drained(self, campaign_id: str, /) -> CampaignStatus | None:
+        """Завершение кампании, если все получатели загружены и обработаны, или отметка о прерванной загрузке.
+
+        Returns:
+            Статус кампании или None, если кампания уже удалена.
+        """
+        return await self._campaign_repository.complete_if_drained(campaign_id, upload_timeout=self._upload_timeout)
+
+    def _publish_batch(
+        self, campaign: Campaign, recipients: Sequence[CampaignRecipient], /, *, content_hash: str | None,
+    ) -> None:
+        """Постановка задач на отправку писем пачке получателей по шаблону кампании.
+
+        Шаблон без переменных рендерится один раз, и письма всей пачке отправляются одной задачей
+        после установки блокировок получателей. Иначе каждому получателю ставится задача с его контекстом.
+        """
+        from notifications.domain.messages.tasks import send_email, send_email_batch
+
+        payloads = [self._build_payload(campaign, recipient, content_hash=content_hash) for recipient in recipients]
+        with send_email.app.producer_or_acquire() as producer:
+            if content_hash is None:
+                for payload in payloads:
+                    send_email.apply_async(args=[payload], queue=CeleryQueue.COMMON.value, producer=producer)
+                return
+            acquired = send_email.acquire_locks([send_email.get_lock_key([payload], {}) for payload in payloads])
+            recipient_list = [payload["recipient_list"][0] for payload in itertools.compress(payloads, acquired)]
+            if recipient_list:
+                send_email_batch.apply_async(
+                    args=[{**payloads[0], "recipient_list": recipient_list}],
+                    queue=CeleryQueue.COMMON.value, producer=producer,
+                )
+
+    async def _stage_recipients(self, campaign_id: str, rows: Sequence[CampaignRecipient | None], /) -> None:
+        """Проверка пачки получателей и сохранение их в очередь кампании."""
+        recipients = self._clean_recipients(rows)
+        allowed_emails = set(
+            await self._suppression_service.filter_allowed([recipient.email for recipient in recipients]))
+        accepted_recipients = [recipient for recipient in recipients if recipient.email in allowed_emails]
+        await self._campaign_repository.push_batch(
+            campaign_id, accepted_recipients,
+            rows_count=len(rows),
+            accepted_count=len(accepted_recipients),
+            invalid_count=len(rows) - len(recipients),
+            suppressed_count=len(recipients) - len(accepted_recipients),
+        )
+
+    @staticmethod
+    def _clean_recipients(rows: Sequence[CampaignRecipient | None], /) -> list[CampaignRecipient]:
+        """Исключение некорректных строк и адресов, нормализация адресов."""
+        recipients = []
+        for row in rows:
+            if row is None:
+                continue
+            try:
+                _, email = validate_email(row.email.strip())
+            except EmailError:
+                continue
+            recipients.append(row._replace(email=email.lower()))
+        return recipients
+
+    @staticmethod
+    def _build_payload(
+        campaign: Campaign, recipient: CampaignRecipient, /, *, content_hash: str | None,
+    ) -> NotificationPayload:
+        """Формирование данных для отправки письма получателю кампании по шаблону."""
+        payload = NotificationPayload(
+            subject=campaign.email_subject,
+            recipient_list=[recipient.email],
+            template_slug=campaign.template_slug,
+        )
+        if content_hash is not None:
+            payload["content_hash"] = content_hash
+        elif recipient.context:
+            payload["context"] = recipient.context
+        return payload
+
+    @staticmethod
+    def _clean_upload_format(content_type: str, /) -> UploadFormat:
+        """Получение формата файла по типу содержимого запроса."""
+        try:
+            return UploadFormat(content_type.partition(";")[0].strip().lower())
+        except ValueError:
+            raise UnsupportedUploadFormatError()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from celery import shared_task
+from dependency_injector.wiring import Provide, inject
+
+from notifications.containers import Container
+from notifications.core.config import CeleryQueue, get_settings
+from notifications.helpers import sync_task
+
+from .enums import CampaignStatus
+
+if TYPE_CHECKING:
+    from notifications.celery import Task
+
+    from .services import CampaignService
+
+settings = get_settings()
+
+
+@shared_task(
+    queue=CeleryQueue.COMMON.value,
+    bind=True,
+    ignore_result=True,
+    time_limit=10 * 60,
+    soft_time_limit=5 * 60,
+    default_retry_delay=60,
+    max_retries=10,
+    autoretry_for=(Exception,),
+)
+@sync_task
+@inject
+async def send_campaign(
+    self: Task,
+    campaign_id: str, *args,
+    campaign_service: CampaignService = Provide[Container.campaign_service],
+    **kwargs,
+) -> None:
+    """Фоновая задача по отправке писем кампании пачками из очереди получателей.
+
+    После обработки `CAMPAIGN_BATCHES_PER_TASK` пачек задача перезапускается. Если очередь пуста, а файл еще
+    загружается, то задача ждет новые пачки `CAMPAIGN_POLL_INTERVAL` секунд. Если пачку не удалось обработать,
+    то задача повторяется позже.
+    """
+    batches_count = await campaign_service.send_batches(campaign_id, batches_count=settings.CAMPAIGN_BATCHES_PER_TASK)
+    if batches_count == settings.CAMPAIGN_BATCHES_PER_TASK:
+        send_campaign.apply_async(args=(campaign_id, ))
+        return
+    match await campaign_service.complete_if_drained(campaign_id):
+        case CampaignStatus.UPLOADING:
+            send_campaign.apply_async(args=(campaign_id, ), countdown=settings.CAMPAIGN_POLL_INTERVAL)
+        case CampaignStatus.UPLOADED:
+            send_campaign.apply_async(args=(campaign_id, ))
+        case status:
+            self.log.info(f"Campaign <{campaign_id}> has been processed: {status}.")
+
+
+send_campaign: Task
@@ -0,0 +1,26 @@
+from typing import Any, NamedTuple
+
+from pydantic import BaseModel
+
+from .enums import CampaignStatus
+
+
+class CampaignRecipient(NamedTuple):
+    """Получатель кампании с контекстом для рендеринга шаблона."""
+
+    email: str
+    context: dict[str, Any]
+
+
+class Campaign(BaseModel):
+    """Кампания: рассылка писем по шаблону получателям из загруженного файла."""
+
+    campaign_id: str
+    template_slug: str
+    email_subject: str
+    status: CampaignStatus = CampaignStatus.UPLOADING
+    rows_count: int = 0
+    accepted_count: int = 0
+    invalid_count: int = 0
+    suppressed_count: int = 0
+    queued_count: int = 0
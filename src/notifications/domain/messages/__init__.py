@@ -1,7 +1,10 @@
 from .dispatchers import NotificationDispatcherService
-from .services import EmailNotificationService
+from .repositories import CoalescingRepository
+from .services import EmailNotificationService, NotificationCoalescingService
 
 __all__ = [
+    "CoalescingRepository",
     "EmailNotificationService",
+    "NotificationCoalescingService",
     "NotificationDispatcherService",
 ]
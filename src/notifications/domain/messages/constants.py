@@ -0,0 +1,16 @@
+from typing import Final
+
+# Префикс ключей окон объединения уведомлений одному получателю.
+COALESCING_PREFIX: Final[str] = "notifications:coalescing"
+
+# Длина хеша получателя и категории в ключах окна объединения уведомлений.
+COALESCING_RECIPIENT_HASH_LENGTH: Final[int] = 16
+
+# Слаг шаблона по умолчанию, в котором объединяются уведомления одного окна.
+COALESCED_TEMPLATE_SLUG: Final[str] = "_notifications-coalesced"
+
+# Заголовок объединенного письма, если у уведомлений окна разные заголовки.
+COALESCED_SUBJECT: Final[str] = "Новые уведомления"
+
+# Категория уведомлений, для которых при объединении не задана категория.
+DEFAULT_COALESCING_CATEGORY: Final[str] = "default"
@@ -1,32 +1,66 @@
+import itertools
+from typing import Iterable
+
 from notifications.api.v1.schemas import NotificationIn, NotificationShortDetails
 from notifications.core.config import CeleryQueue
+from notifications.domain.suppressions import SuppressionService
 from notifications.domain.templates import TemplateService
+from notifications.helpers import batched
 
 from .enums import NotificationPriority, NotificationType
-from .exceptions import InvalidNotificationTypeError, NotificationCooldownError
-from .services import EmailNotificationService
+from .exceptions import InvalidNotificationTypeError, NotificationCooldownError, RecipientsSuppressedError
+from .services import EmailNotificationService, NotificationCoalescingService
 from .types import NotificationPayload, Queue
 
 
 class NotificationDispatcherService:
     """Сервис для распределения уведомлений по сервисам и очередям."""
 
-    def __init__(self, email_service: EmailNotificationService, template_service: TemplateService) -> None:
+    def __init__(
+        self,
+        email_service: EmailNotificationService,
+        template_service: TemplateService,
+        suppression_service: SuppressionService,
+        coalescing_service: NotificationCoalescingService, *,
+        recipients_batch_size: int,
+    ) -> None:
         assert isinstance(email_service, EmailNotificationService)
         self._email_service = email_service
 
         assert isinstance(template_service, TemplateService)
         self._template_service = template_service
 
+        assert isinstance(suppression_service, SuppressionService)
+        self._suppression_service = suppression_service
+
+        assert isinstance(coalescing_service, NotificationCoalescingService)
+        self._coalescing_service = coalescing_service
+
+        self._recipients_batch_size = recipients_batch_size
+
     async def dispatch_notification(self, notification: NotificationIn, /) -> NotificationShortDetails:
-        """Перенаправление уведомления в очередь для дальнейшей отправки пользователю."""
+        """Перенаправление уведомления в очередь для дальнейшей отправки пользователю.
+
+        Адреса получателей нормализуются, повторы и получатели из списка подавления исключаются из уведомления.
+        Если у уведомления задано окно объединения, то оно откладывается до закрытия окна каждого получателя.
+        Уведомление нескольким получателям отправляется каждому отдельным письмом пачками по `recipients_batch_size`.
+        """
         from .tasks import send_email
 
         if template_slug := notification.template_slug:
             await self.check_if_template_exists(template_slug)
         notification_type = self._clean_notification_type(notification.notification_type)
+        recipient_list = self._clean_recipient_list(notification.recipient_list)
+        recipient_list = await self._suppression_service.filter_allowed(recipient_list)
+        if not recipient_list:
+            raise RecipientsSuppressedError()
+        notification = notification.copy(update={"recipient_list": recipient_list})
         queue = self._select_queue_by_priority(notification.priority)
         match notification_type:
+            case NotificationType.EMAIL if notification.coalescing_window is not None:
+                return await self._coalesce_notification(notification, queue=queue)
+            case NotificationType.EMAIL if len(notification.recipient_list) > 1:
+                return self._fan_out_email(notification, queue=queue)
             case NotificationType.EMAIL:
                 result = send_email.apply_async(args=[self._build_payload(notification)], queue=queue)
             case _:
@@ -39,10 +73,67 @@ class NotificationDispatcherService:
         """Проверка существования шаблона с данным слагом."""
         await self._template_service.get_by_slug(template_slug)
 
+    async def _coalesce_notification(
+        self, notification: NotificationIn, /, *, queue: Queue,
+    ) -> NotificationShortDetails:
+        """Добавление уведомления в окна объединения получателей.
+
+        При открытии окна ставится задача его закрытия. Идентификатором уведомления считается окно первого получателя.
+        """
+        from .tasks import flush_coalesced_notifications
+
+        payload = self._build_payload(notification)
+        window = self._coalescing_service.get_window(notification.coalescing_window)
+        notification_ids = []
+        for recipient in notification.recipient_list:
+            coalescing_window = await self._coalescing_service.add(
+                recipient, notification.category, payload, window=notification.coalescing_window)
+            args = [recipient, notification.category, coalescing_window.window_id]
+            if coalescing_window.is_opened:
+                flush_coalesced_notifications.apply_async(
+                    args=args, queue=queue, countdown=window, task_id=coalescing_window.window_id)
+            elif self._coalescing_service.is_full(coalescing_window):
+                flush_coalesced_notifications.apply_async(args=args, queue=queue)
+            notification_ids.append(coalescing_window.window_id)
+        return NotificationShortDetails(notification_id=notification_ids[0], queue=queue)
+
+    def _fan_out_email(self, notification: NotificationIn, /, *, queue: Queue) -> NotificationShortDetails:
+        """Постановка задач отправки уведомления пачкам получателей.
+
+        Блокировки получателей устанавливаются одним запросом к БД на пачку, получатели, которым уведомление
+        с тем же заголовком уже отправляется, исключаются. Задачи пачек ставятся через одно соединение с брокером
+        и разбираются воркерами параллельно. Идентификатором уведомления считается задача первой пачки.
+        """
+        from .tasks import send_email, send_email_batch
+
+        payload = self._build_payload(notification)
+        notification_ids = []
+        with send_email_batch.app.producer_or_acquire() as producer:
+            for recipients_batch in batched(notification.recipient_list, self._recipients_batch_size):
+                lock_keys = [
+                    send_email.get_lock_key([{**payload, "recipient_list": [recipient]}], {})
+                    for recipient in recipients_batch
+                ]
+                acquired = send_email.acquire_locks(lock_keys)
+                recipients_batch = list(itertools.compress(recipients_batch, acquired))
+                if not recipients_batch:
+                    continue
+                result = send_email_batch.apply_async(
+                    args=[{**payload, "recipient_list": recipients_batch}], queue=queue, producer=producer)
+                notification_ids.append(result.id)
+        if not notification_ids:
+            raise NotificationCooldownError()
+        return NotificationShortDetails(notification_id=notification_ids[0], queue=queue)
+
+    @staticmethod
+    def _clean_recipient_list(recipient_list: Iterable[str], /) -> list[str]:
+        """Нормализация адресов получателей и исключение повторов с сохранением порядка."""
+        return list(dict.fromkeys(recipient.strip().lower() for recipient in recipient_list))
+
     @staticmethod
     def _build_payload(notification: NotificationIn, /) -> NotificationPayload:
         """Формирование данных для отправки в очередь Celery."""
-        data = notification.dict(exclude={"priority", "notification_type"})
+        data = notification.dict(exclude={"priority", "notification_type", "category", "coalescing_window"})
         return data
 
     @staticmethod
@@ -11,6 +11,14 @@ class InvalidNotificationTypeError(NetflixNotificationsError):
     status_code: int = HTTPStatus.BAD_REQUEST
 
 
+class RecipientsSuppressedError(NetflixNotificationsError):
+    """Отправка писем всем получателям уведомления подавлена."""
+
+    message = "All recipients are in the suppression list"
+    code = "recipients_suppressed"
+    status_code = HTTPStatus.CONFLICT
+
+
 class NotificationCooldownError(NetflixNotificationsError):
     """Кулдаун отправки уведомлений."""
 
@@ -0,0 +1,90 @@
+import uuid
+import zlib
+
+import orjson
+
+from notifications.infrastructure.db.cache import CacheKeyBuilder
+from notifications.infrastructure.db.redis import RedisClient
+from notifications.types import seconds
+
+from .constants import COALESCING_PREFIX, COALESCING_RECIPIENT_HASH_LENGTH
+from .types import CoalescingWindow, NotificationPayload
+
+# Добавление уведомления ARGV[1] в окно получателя.
+# Если окна нет, то открывается новое с идентификатором ARGV[2] и временем жизни ARGV[3] секунд.
+APPEND_SCRIPT = """
+local opened = redis.call("SET", KEYS[2], ARGV[2], "NX", "EX", ARGV[3])
+local count = redis.call("RPUSH", KEYS[1], ARGV[1])
+if opened then
+    redis.call("EXPIRE", KEYS[1], ARGV[3])
+end
+return {redis.call("GET", KEYS[2]), count, opened and 1 or 0}
+"""
+
+# Закрытие окна ARGV[1] и получение всех его уведомлений.
+# Если окно уже закрыто или открыто новое окно, то возвращается пустой список.
+POP_SCRIPT = """
+if redis.call("GET", KEYS[2]) ~= ARGV[1] then
+    return {}
+end
+local records = redis.call("LRANGE", KEYS[1], 0, -1)
+redis.call("DEL", KEYS[1], KEYS[2])
+return records
+"""
+
+
+class CoalescingRepository:
+    """Хранилище окон объединения уведомлений в Redis.
+
+    Окно получателя и категории состоит из двух ключей: идентификатора окна и списка уведомлений.
+    Уведомления хранятся в компактном виде: сжатый кортеж из заголовка, текста или слага шаблона и контекста,
+    адрес получателя хранится только в хеше ключа.
+    """
+
+    def __init__(self, redis_client: RedisClient) -> None:
+        assert isinstance(redis_client, RedisClient)
+        self._redis_client = redis_client
+
+    async def append(
+        self, recipient: str, category: str, payload: NotificationPayload, /, *, ttl: seconds,
+    ) -> CoalescingWindow:
+        """Добавление уведомления в окно получателя `recipient` и категории `category`.
+
+        Если окна нет, то открывается новое, которое хранится `ttl` секунд.
+        """
+        keys = self._get_keys(recipient, category)
+        window_id, notifications_count, is_opened = await self._redis_client.run_script(
+            APPEND_SCRIPT, keys=keys, args=[self._dump_record(payload), str(uuid.uuid4()), ttl])
+        return CoalescingWindow(
+            window_id=window_id.decode(), notifications_count=notifications_count, is_opened=bool(is_opened))
+
+    async def pop(self, recipient: str, category: str, window_id: str, /) -> list[NotificationPayload]:
+        """Закрытие окна `window_id` и получение его уведомлений."""
+        keys = self._get_keys(recipient, category)
+        records = await self._redis_client.run_script(POP_SCRIPT, keys=keys, args=[window_id])
+        return [self._load_record(recipient, record) for record in records]
+
+    @staticmethod
+    def _dump_record(payload: NotificationPayload, /) -> bytes:
+        record = (payload["subject"], payload.get("content"), payload.get("template_slug"), payload.get("context"))
+        return zlib.compress(orjson.dumps(record))
+
+    @staticmethod
+    def _load_record(recipient: str, record: bytes, /) -> NotificationPayload:
+        subject, content, template_slug, context = orjson.loads(zlib.decompress(record))
+        payload = NotificationPayload(subject=subject, recipient_list=[recipient])
+        if content is not None:
+            payload["content"] = content
+        if template_slug is not None:
+            payload["template_slug"] = template_slug
+            payload["context"] = context or {}
+        return payload
+
+    @staticmethod
+    def _get_keys(recipient: str, category: str) -> list[str]:
+        window_key = CacheKeyBuilder.make_hash(
+            f"{category}:{recipient.strip().lower()}", length=COALESCING_RECIPIENT_HASH_LENGTH)
+        return [
+            CacheKeyBuilder.make_key_with_affixes(window_key, prefix=COALESCING_PREFIX, suffix=suffix)
+            for suffix in ("records", "window")
+        ]
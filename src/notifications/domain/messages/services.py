@@ -1,17 +1,23 @@
 from __future__ import annotations
 
 import datetime
+import logging
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, ClassVar
+from typing import TYPE_CHECKING, Any, ClassVar, Sequence
 
-from notifications.domain.templates import TemplateService
+from notifications.common.exceptions import NotFoundError
+from notifications.domain.templates import Template, TemplateService
 from notifications.infrastructure.emails.clients import BaseEmailClient, EmailMessageDetail
 
-from .types import NotificationPayload
+from .constants import COALESCED_SUBJECT, COALESCED_TEMPLATE_SLUG
+from .repositories import CoalescingRepository
+from .types import CoalescingWindow, NotificationPayload
 
 if TYPE_CHECKING:
     from notifications.types import seconds
 
+logger = logging.getLogger(__name__)
+
 
 class BaseNotificationService(ABC):
     """Базовый сервис по отправке уведомлений."""
@@ -33,6 +39,10 @@ class BaseNotificationService(ABC):
         content = payload.get("content")
         if content is not None:
             return content
+        if content_hash := payload.get("content_hash"):
+            content = await self._template_service.get_rendered_content(content_hash)
+            if content is not None:
+                return content
         template_slug = payload["template_slug"]
         return await self._get_template_content_by_slug(template_slug, context=payload.get("context", {}))
 
@@ -58,6 +68,52 @@ class EmailNotificationService(BaseNotificationService):
         message = await self.build_message_from_payload(message_payload)
         return self._email_client.send_messages((message,))
 
+    async def send_messages(self, message_payloads: Sequence[NotificationPayload], /) -> int:
+        """Отправка нескольких уведомлений одним обращением к почтовому клиенту."""
+        messages = [await self.build_message_from_payload(payload) for payload in message_payloads]
+        return self._email_client.send_messages(messages)
+
+    async def send_message_to_each(self, message_payload: NotificationPayload, /) -> int:
+        """Отправка уведомления каждому получателю отдельным письмом.
+
+        Текст уведомления рендерится один раз для всех получателей.
+        """
+        content = await self._get_message_content_from_payload(message_payload)
+        messages = [
+            EmailMessageDetail(subject=message_payload["subject"], content=content, recipient_list=[recipient])
+            for recipient in message_payload["recipient_list"]
+        ]
+        return self._email_client.send_messages(messages)
+
+    async def send_coalesced_message(self, message_payloads: Sequence[NotificationPayload], /) -> int:
+        """Отправка нескольких уведомлений одному получателю одним письмом.
+
+        Тексты уведомлений объединяются шаблоном по умолчанию. Если заголовки уведомлений совпадают,
+        то он же используется как заголовок письма.
+        """
+        notifications = [
+            {"subject": payload["subject"], "content": await self._get_message_content_from_payload(payload)}
+            for payload in message_payloads
+        ]
+        try:
+            template = await self._template_service.get_by_slug(COALESCED_TEMPLATE_SLUG)
+        except NotFoundError:
+            template = await self.create_coalesced_template()
+        content = await self._template_service.render_template_from_string(
+            template.content, context={"notifications": notifications})
+        subjects = {notification["subject"] for notification in notifications}
+        message = EmailMessageDetail(
+            subject=subjects.pop() if len(subjects) == 1 else COALESCED_SUBJECT,
+            content=content,
+            recipient_list=message_payloads[0]["recipient_list"],
+        )
+        return self._email_client.send_messages((message,))
+
+    async def create_coalesced_template(self) -> Template:
+        """Создание шаблона по умолчанию для объединенных уведомлений."""
+        return await self._template_service.create_default_template(
+            name="Coalesced Notifications", slug=COALESCED_TEMPLATE_SLUG, filename="coalesced_notifications.html")
+
     async def build_message_from_payload(self, payload: NotificationPayload, /) -> EmailMessageDetail:
         content = await self._get_message_content_from_payload(payload)
         message = EmailMessageDetail(
@@ -66,3 +122,69 @@ class EmailNotificationService(BaseNotificationService):
             recipient_list=payload["recipient_list"],
         )
         return message
+
+
+class NotificationCoalescingService:
+    """Сервис объединения уведомлений одному получателю.
+
+    Уведомления одной категории, пришедшие получателю в течение окна, копятся в Redis и после закрытия окна
+    отправляются одним письмом. Окно не может быть длиннее `max_window` секунд и вмещает не больше
+    `max_notifications` уведомлений, после чего его нужно закрыть досрочно.
+    """
+
+    def __init__(
+        self,
+        coalescing_repository: CoalescingRepository,
+        email_service: EmailNotificationService, *,
+        max_window: seconds,
+        max_notifications: int,
+        state_ttl_margin: seconds,
+    ) -> None:
+        assert isinstance(coalescing_repository, CoalescingRepository)
+        self._coalescing_repository = coalescing_repository
+
+        assert isinstance(email_service, EmailNotificationService)
+        self._email_service = email_service
+
+        self._max_window = max_window
+        self._max_notifications = max_notifications
+        self._state_ttl_margin = state_ttl_margin
+
+    def get_window(self, window: seconds, /) -> seconds:
+        """Получение длины окна с учетом ограничения `max_window`."""
+        return min(window, self._max_window)
+
+    def is_full(self, coalescing_window: CoalescingWindow, /) -> bool:
+        """Проверка, что окно заполнено и его нужно закрыть досрочно."""
+        return coalescing_window.notifications_count == self._max_notifications
+
+    async def add(
+        self, recipient: str, category: str, payload: NotificationPayload, /, *, window: seconds,
+    ) -> CoalescingWindow:
+        """Добавление уведомления в окно получателя.
+
+        Состояние окна хранится дольше самого окна на `state_ttl_margin` секунд, чтобы пережить задержку
+        задачи закрытия окна в очереди.
+        """
+        ttl = self.get_window(window) + self._state_ttl_margin
+        return await self._coalescing_repository.append(recipient, category, payload, ttl=ttl)
+
+    async def flush(
+        self, recipient: str, category: str, window_id: str, /, *, scheduled_at: datetime.datetime | None = None,
+    ) -> int:
+        """Закрытие окна и отправка его уведомлений.
+
+        Одно уведомление отправляется как есть, несколько - объединяются в одно письмо.
+        Если окно уже закрыто, то ничего не отправляется. Если закрытие окна было запланировано на `scheduled_at`
+        и опоздало больше чем на `state_ttl_margin` секунд, то уведомления окна могли истечь - это записывается в лог.
+        """
+        payloads = await self._coalescing_repository.pop(recipient, category, window_id)
+        if not payloads:
+            if scheduled_at is not None:
+                delay = (datetime.datetime.now(scheduled_at.tzinfo) - scheduled_at).total_seconds()
+                if delay >= self._state_ttl_margin:
+                    logger.warning(f"Coalescing window <{window_id}> was flushed {delay:.0f}s late and has expired.")
+            return 0
+        if len(payloads) == 1:
+            return await self._email_service.send_message(payloads[0])
+        return await self._email_service.send_coalesced_message(payloads)
@@ -13,7 +13,7 @@ from notifications.helpers import TZ_MOSCOW, sync_task
 if TYPE_CHECKING:
     from notifications.celery import Task
 
-    from .services import EmailNotificationService
+    from .services import EmailNotificationService, NotificationCoalescingService
     from .types import NotificationPayload
 
 
@@ -27,6 +27,7 @@ if TYPE_CHECKING:
     expires=datetime.datetime.now(TZ_MOSCOW) + datetime.timedelta(hours=12),
     lock_ttl=5 * 60,
     lock_suffix=lambda notification: ("email", notification["recipient_list"][0], "subject", notification["subject"]),
+    progress_run_id=lambda notification, *args, **kwargs: notification.get("run_id"),
 )
 @sync_task
 @inject
@@ -41,4 +42,62 @@ async def send_email(
     self.log.info("Notification has been sent.")
 
 
+@shared_task(
+    bind=True,
+    ignore_result=True,
+    time_limit=5 * 60,
+    soft_time_limit=4 * 60,
+    expires=datetime.datetime.now(TZ_MOSCOW) + datetime.timedelta(hours=12),
+)
+@sync_task
+@inject
+async def send_email_batch(
+    self: Task,
+    notification: NotificationPayload, *args,
+    email_service: EmailNotificationService = Provide[Container.email_notification_service],
+    **kwargs,
+) -> None:
+    """Фоновая задача по отправке уведомления пачке получателей, каждому - отдельным письмом.
+
+    Блокировки получателей устанавливаются при постановке задачи. Письма пачки отправляются одним запросом,
+    поэтому задача не перезапускается, а при ошибке блокировки снимаются, чтобы уведомление можно было отправить
+    повторно.
+    """
+    try:
+        sent_count = await email_service.send_message_to_each(notification)
+    except Exception:
+        send_email.release_locks([
+            send_email.get_lock_key([{**notification, "recipient_list": [recipient]}], {})
+            for recipient in notification["recipient_list"]
+        ])
+        raise
+    self.log.info(f"Notification has been sent to {sent_count} recipients.")
+
+
+@shared_task(
+    bind=True,
+    ignore_result=True,
+    time_limit=30,
+    soft_time_limit=20,
+    default_retry_delay=5,
+    autoretry_for=(SoftTimeLimitExceeded,),
+)
+@sync_task
+@inject
+async def flush_coalesced_notifications(
+    self: Task,
+    recipient: str, category: str, window_id: str, *args,
+    coalescing_service: NotificationCoalescingService = Provide[Container.notification_coalescing_service],
+    **kwargs,
+) -> None:
+    """Фоновая задача по закрытию окна объединения уведомлений и отправке их одним письмом."""
+    scheduled_at = self.request.eta
+    if isinstance(scheduled_at, str):
+        scheduled_at = datetime.datetime.fromisoformat(scheduled_at)
+    if await coalescing_service.flush(recipient, category, window_id, scheduled_at=scheduled_at):
+        self.log.info(f"Coalesced notifications of window <{window_id}> have been sent.")
+
+
 send_email: Task
+send_email_batch: Task
+flush_coalesced_notifications: Task
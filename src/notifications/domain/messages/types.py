@@ -1,4 +1,4 @@
-from typing import Any, Sequence, TypedDict
+from typing import Any, NamedTuple, Sequence, TypedDict
 
 from typing_extensions import NotRequired
 
@@ -12,4 +12,14 @@ class NotificationPayload(TypedDict):
     recipient_list: Sequence[str]
     content: NotRequired[str]
     template_slug: NotRequired[str]
+    content_hash: NotRequired[str]
     context: NotRequired[dict[str, Any]]
+    run_id: NotRequired[str]
+
+
+class CoalescingWindow(NamedTuple):
+    """Окно объединения уведомлений одному получателю одной категории."""
+
+    window_id: str
+    notifications_count: int
+    is_opened: bool
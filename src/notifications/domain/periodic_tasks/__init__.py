@@ -1,9 +1,15 @@
-from .repositories import TaskRepository
+from .leader import BeatLeaderLease
+from .progress import RunProgressTracker
+from .repositories import DigestSpoolRepository, RunProgressRepository, TaskRepository
 from .services import TaskService
 from .types import CeleryTask
 
 __all__ = [
+    "BeatLeaderLease",
     "CeleryTask",
+    "DigestSpoolRepository",
+    "RunProgressRepository",
+    "RunProgressTracker",
     "TaskRepository",
     "TaskService",
 ]
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import functools
+import itertools
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+import orjson
+
+from notifications.helpers import TZ_MOSCOW
+from notifications.infrastructure.db.cache import BaseSyncCache, CacheKeyBuilder
+from notifications.integrations.auth.types import RegistrationDensity
+
+from .constants import CHUNK_CHECKPOINT_PREFIX
+
+if TYPE_CHECKING:
+    from notifications.celery import Task
+    from notifications.types import seconds
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class DateChunk:
+    """Чанк дат регистрации пользователей."""
+
+    start: datetime.date
+    size: datetime.timedelta
+    end: datetime.date
+    lane: int = 0
+    run_id: str = ""
+    lane_users: int | None = None
+
+    @property
+    def range(self) -> tuple[datetime.date, datetime.date]:
+        """Диапазон дат чанка: начальная дата включительно, конечная - не включительно."""
+        return self.start, min(self.start + self.size, self.end)
+
+    @property
+    def is_last(self) -> bool:
+        """Является ли чанк последним."""
+        return self.start + self.size >= self.end
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ChunkStats:
+    """Статистика обработки чанка."""
+
+    users_count: int
+    duration: float
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class AdaptiveDateChunker:
+    """Подбор размера чанков дат по количеству пользователей и времени обработки предыдущего чанка.
+
+    Размер следующего чанка рассчитывается так, чтобы в него попало около `target_users` пользователей,
+    а его обработка заняла не больше `target_duration` секунд.
+    """
+
+    target_users: int
+    target_duration: float
+    min_size: datetime.timedelta = datetime.timedelta(days=1)
+    max_size: datetime.timedelta = datetime.timedelta(days=365)
+    max_growth: float = 4.0
+
+    def split(
+        self,
+        start: datetime.date, end: datetime.date, /, *,
+        lanes: int,
+        density: RegistrationDensity | None = None,
+    ) -> list[DateChunk]:
+        """Разбиение диапазона дат на `lanes` независимых полос и получение начального чанка каждой из них.
+
+        Если известна гистограмма регистраций `density`, то в полосы попадает примерно одинаковое количество
+        пользователей, иначе - одинаковое количество дней. По гистограмме также оценивается количество
+        пользователей полосы `lane_users`.
+        """
+        bounds = [start]
+        counts = []
+        if density is not None:
+            counts = sorted((date, count) for date, count in density.counts.items() if start <= date < end)
+            total_count = sum(count for _, count in counts)
+            users_count = 0
+            for registration_date, count in counts:
+                users_count += count
+                if len(bounds) < lanes and users_count >= total_count * len(bounds) / lanes:
+                    bounds.append(registration_date + datetime.timedelta(days=1))
+        else:
+            days = (end - start).days
+            bounds.extend(start + datetime.timedelta(days=days * lane // lanes) for lane in range(1, lanes))
+        bounds.append(end)
+        chunks = []
+        for lane, (lane_start, lane_end) in enumerate(itertools.pairwise(sorted(set(bounds)))):
+            chunk = self.get_initial_chunk(lane_start, lane_end, density=density, lane=lane)
+            if density is not None:
+                lane_users = sum(count for date, count in counts if lane_start <= date < lane_end)
+                chunk = dataclasses.replace(chunk, lane_users=lane_users)
+            chunks.append(chunk)
+        return chunks
+
+    def get_initial_chunk(
+        self,
+        start: datetime.date, end: datetime.date, /, *,
+        density: RegistrationDensity | None = None,
+        lane: int = 0,
+    ) -> DateChunk:
+        """Получение начального чанка.
+
+        Если известна гистограмма регистраций `density`, то размер подбирается по ней, иначе - минимальный.
+        """
+        if density is None:
+            return DateChunk(start=start, size=self.min_size, end=end, lane=lane)
+        users_count = 0
+        size = self.min_size
+        for registration_date, count in sorted(density.counts.items()):
+            if registration_date < start:
+                continue
+            users_count += count
+            size = max(registration_date - start + datetime.timedelta(days=1), self.min_size)
+            if users_count >= self.target_users:
+                break
+        else:
+            size = max(end - start, self.min_size)
+        return DateChunk(start=start, size=min(size, self.max_size), end=end, lane=lane)
+
+    def get_next_chunk(self, chunk: DateChunk, stats: ChunkStats, /) -> DateChunk | None:
+        """Получение следующего чанка на основе статистики обработки текущего."""
+        if chunk.is_last:
+            return None
+        ratio = min(
+            self.target_users / max(stats.users_count, 1),
+            self.target_duration / max(stats.duration, 1e-3),
+        )
+        ratio = min(max(ratio, 1 / self.max_growth), self.max_growth)
+        days = round(chunk.size.days * ratio)
+        size = min(max(datetime.timedelta(days=days), self.min_size), self.max_size)
+        return dataclasses.replace(chunk, start=chunk.range[1], size=size)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class QueueDepthPacer:
+    """Подбор паузы между чанками по длине очереди, в которую продюсер ставит задачи, и скорости ее разбора.
+
+    Пока в очереди не больше `low_watermark` сообщений, следующий чанк ставится сразу. Иначе пауза равна времени,
+    за которое воркеры разберут очередь до `low_watermark`. Если очередь длиннее `high_watermark`, то пауза
+    максимальная.
+    """
+
+    queue: str
+    low_watermark: int
+    high_watermark: int
+    max_delay: float
+
+    def get_delay(self, *, depth_before: int, depth_after: int, produced: int, duration: float) -> float:
+        """Получение паузы перед следующим чанком в секундах.
+
+        Скорость разбора очереди оценивается по ее длине до и после обработки чанка и количеству поставленных задач.
+        """
+        if depth_after <= self.low_watermark:
+            return 0
+        if depth_after >= self.high_watermark:
+            return self.max_delay
+        consumption_rate = (depth_before + produced - depth_after) / max(duration, 1e-3)
+        if consumption_rate <= 0:
+            return self.max_delay
+        return min((depth_after - self.low_watermark) / consumption_rate, self.max_delay)
+
+
+class ChunkCheckpoints:
+    """Контрольные точки обработки чанков в кэше.
+
+    Для каждого запуска задачи сохраняется разбиение на полосы, а для каждой полосы - дата,
+    с которой нужно продолжить обработку.
+    """
+
+    def __init__(self, cache_client: BaseSyncCache, *, ttl: seconds) -> None:
+        assert isinstance(cache_client, BaseSyncCache)
+        self._cache_client = cache_client
+        self._ttl = ttl
+
+    @staticmethod
+    def get_run_id(task_name: str, kwargs: dict[str, Any], /) -> str:
+        """Получение идентификатора запуска задачи: задача, ее аргументы и текущая дата."""
+        kwargs_hash = CacheKeyBuilder.make_hash(
+            orjson.dumps(kwargs, option=orjson.OPT_SORT_KEYS, default=str).decode(), length=16)
+        return f"{task_name}:{kwargs_hash}:{datetime.datetime.now(TZ_MOSCOW).date().isoformat()}"
+
+    def get_lanes(self, run_id: str, /) -> list[DateChunk] | None:
+        """Получение начальных чанков полос запуска `run_id` с учетом уже обработанных дат.
+
+        Обработанные полностью полосы не возвращаются. Если запуска еще не было, то возвращается None.
+        """
+        plan = self._cache_client.get(self._get_key(run_id, "plan"))
+        if plan is None:
+            return None
+        chunks = []
+        for lane_data in orjson.loads(plan):
+            chunk = DateChunk(
+                start=datetime.date.fromisoformat(lane_data["start"]),
+                size=datetime.timedelta(days=lane_data["size"]),
+                end=datetime.date.fromisoformat(lane_data["end"]),
+                lane=lane_data["lane"],
+                run_id=run_id,
+            )
+            if (checkpoint := self._cache_client.get(self._get_key(run_id, str(chunk.lane)))) is not None:
+                chunk = dataclasses.replace(chunk, start=datetime.date.fromisoformat(checkpoint.decode()))
+            if chunk.start < chunk.end:
+                chunks.append(chunk)
+        return chunks
+
+    def save_lanes(self, run_id: str, chunks: list[DateChunk], /) -> None:
+        """Сохранение разбиения запуска `run_id` на полосы."""
+        plan = [
+            {
+                "start": chunk.start.isoformat(),
+                "size": chunk.size.days,
+                "end": chunk.end.isoformat(),
+                "lane": chunk.lane,
+            }
+            for chunk in chunks
+        ]
+        self._cache_client.set(self._get_key(run_id, "plan"), orjson.dumps(plan), ttl=self._ttl)
+
+    def save(self, chunk: DateChunk, /) -> None:
+        """Сохранение контрольной точки после обработки чанка."""
+        self._cache_client.set(self._get_key(chunk.run_id, str(chunk.lane)), chunk.range[1].isoformat(), ttl=self._ttl)
+
+    @staticmethod
+    def _get_key(run_id: str, suffix: str) -> str:
+        return CacheKeyBuilder.make_key_with_affixes(run_id, prefix=CHUNK_CHECKPOINT_PREFIX, suffix=suffix)
+
+
+def chunkify_task(
+    *,
+    initial_chunks: Callable[..., list[DateChunk]],
+    chunker: AdaptiveDateChunker,
+    lanes: int = 1,
+    checkpoint_ttl: seconds = 24 * 60 * 60,
+    pacer: QueueDepthPacer | None = None,
+    sleep_timeout: float = 0,
+) -> Callable[[Callable[..., int]], Callable[..., None]]:
+    """Декоратор для обработки Celery задачи по чанкам дат.
+
+    Задача принимает чанк первым аргументом и возвращает количество обработанных пользователей.
+    Между задачами чанк передается словарем.
+    Диапазон дат разбивается на `lanes` полос, которые обрабатываются параллельно. В каждой полосе после обработки
+    чанка задача ставится в очередь со следующим чанком, размер которого подбирается `chunker`.
+
+    Обработанные даты каждой полосы сохраняются в кэш: повторный запуск задачи в тот же день с теми же аргументами
+    продолжает обработку только незавершенных полос.
+
+    Пауза между чанками подбирается `pacer` по длине очереди, в которую задача ставит новые задачи.
+    Если `pacer` не задан, то пауза равна `sleep_timeout` секундам.
+
+    Новый запуск регистрируется в счетчиках прогресса с оценкой количества пользователей по всем полосам,
+    после обработки чанка накопленные увеличения счетчиков записываются в Redis. Идентификатор запуска можно задать
+    аргументом `run_id`, чтобы учитывать прогресс нескольких задач в одном запуске.
+    """
+    def decorator(func: Callable[..., int]) -> Callable[..., None]:
+        @functools.wraps(func)
+        def wrapper(self: Task, *args, chunk: dict | None = None, **kwargs) -> None:
+            checkpoints = ChunkCheckpoints(self.cache_client, ttl=checkpoint_ttl)
+            if chunk is None:
+                run_id = kwargs.pop("run_id", None) or checkpoints.get_run_id(self.name, kwargs)
+                if (lane_chunks := checkpoints.get_lanes(run_id)) is None:
+                    lane_chunks = [
+                        dataclasses.replace(lane_chunk, run_id=run_id)
+                        for lane_chunk in initial_chunks(*args, lanes=lanes, **kwargs)
+                    ]
+                    checkpoints.save_lanes(run_id, lane_chunks)
+                    lanes_users = [lane_chunk.lane_users for lane_chunk in lane_chunks]
+                    total_users = sum(lanes_users) if None not in lanes_users else None
+                    self.run_progress.start(run_id, task_name=self.name, total_users=total_users)
+                self.log.info(f"Run <{run_id}>: processing {len(lane_chunks)} lanes")
+                for lane_chunk in lane_chunks:
+                    self.apply_async(args=args, kwargs={**kwargs, "chunk": dataclasses.asdict(lane_chunk)})
+                return
+            chunk = DateChunk(**chunk)
+            depth_before = self.get_queue_depth(pacer.queue) if pacer is not None else 0
+            started_at = time.monotonic()
+            users_count = func(self, chunk, *args, **kwargs)
+            stats = ChunkStats(users_count=users_count, duration=time.monotonic() - started_at)
+            self.run_progress.flush()
+            checkpoints.save(chunk)
+            next_chunk = chunker.get_next_chunk(chunk, stats)
+            countdown = sleep_timeout
+            if pacer is not None:
+                depth_after = self.get_queue_depth(pacer.queue)
+                countdown = pacer.get_delay(
+                    depth_before=depth_before, depth_after=depth_after,
+                    produced=stats.users_count, duration=stats.duration,
+                )
+                self.log.info(f"Queue <{pacer.queue}> depth: {depth_before} -> {depth_after}")
+            start, end = chunk.range
+            self.log.info(
+                f"Lane {chunk.lane}, chunk [{start}, {end}) of {chunk.size.days} days: "
+                f"{stats.users_count} users in {stats.duration:.2f}s, "
+                f"next chunk size: {next_chunk.size.days if next_chunk is not None else 0} days "
+                f"in {countdown:.1f}s",
+            )
+            if next_chunk is not None:
+                next_kwargs = {**kwargs, "chunk": dataclasses.asdict(next_chunk)}
+                self.apply_async(args=args, kwargs=next_kwargs, countdown=countdown)
+        return wrapper
+    return decorator
@@ -5,3 +5,24 @@ CELERY_INTERNAL_TASK_PREFIX = "celery."
 
 # Префикс, обозначающий периодическую задачу. Задачи с таким префиксом могут использовать в панели администратора.
 PERIODIC_TASK_PREFIX: Final[str] = "periodic."
+
+# Префикс ключей очереди заранее отрендеренных писем еженедельного дайджеста.
+DIGEST_SPOOL_PREFIX: Final[str] = "digest:spool"
+
+# Префикс ключей контрольных точек обработки чанков периодических задач.
+CHUNK_CHECKPOINT_PREFIX: Final[str] = "chunks"
+
+# Префикс ключей счетчиков прогресса запусков периодических задач.
+RUN_PROGRESS_PREFIX: Final[str] = "runs:progress"
+
+# Ключ множества идентификаторов запусков периодических задач, отсортированного по времени начала.
+RECENT_RUNS_KEY: Final[str] = "runs:recent"
+
+# Канал Redis, в который публикуются названия созданных или измененных периодических задач.
+PERIODIC_TASKS_CHANNEL: Final[str] = "periodic-tasks:changes"
+
+# Ключ аренды лидерства среди реплик Celery Beat.
+BEAT_LEADER_KEY: Final[str] = "beat:leader"
+
+# Ключ счетчика токенов ограждения, токен увеличивается при каждой смене лидера Celery Beat.
+BEAT_FENCING_TOKEN_KEY: Final[str] = "beat:leader:token"
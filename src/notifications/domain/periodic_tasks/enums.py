@@ -11,3 +11,14 @@ class NotificationSubject(str, Enum):
     """Заголовки уведомлений."""
 
     WEEKLY_DIGEST = "Еженедельный дайджест"
+
+
+class RunCounter(str, Enum):
+    """Счетчики прогресса запуска периодической задачи."""
+
+    SCANNED = "scanned"
+    SUPPRESSED = "suppressed"
+    SPAWNED = "spawned"
+    DEDUPLICATED = "deduplicated"
+    SENT = "sent"
+    FAILED = "failed"
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import os
+import socket
+import time
+import uuid
+from contextlib import suppress
+
+from redis.exceptions import RedisError
+
+from notifications.infrastructure.db.redis import SyncRedisClient
+from notifications.types import seconds
+
+from .constants import BEAT_FENCING_TOKEN_KEY, BEAT_LEADER_KEY
+
+# Получение или продление аренды лидерства экземпляром ARGV[1] на ARGV[2] миллисекунд.
+# При получении аренды выдается новый токен ограждения. Возвращает токен или nil, если лидер другой экземпляр.
+ACQUIRE_SCRIPT = """
+local lease = redis.call("GET", KEYS[1])
+if lease then
+    local token, owner = string.match(lease, "^(%d+):(.*)$")
+    if owner ~= ARGV[1] then
+        return nil
+    end
+    redis.call("PEXPIRE", KEYS[1], ARGV[2])
+    return tonumber(token)
+end
+local token = redis.call("INCR", KEYS[2])
+redis.call("SET", KEYS[1], token .. ":" .. ARGV[1], "PX", ARGV[2])
+return token
+"""
+
+# Снятие аренды ARGV[1], если она все еще принадлежит экземпляру.
+RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class BeatLeaderLease:
+    """Аренда лидерства среди реплик Celery Beat в Redis.
+
+    Лидер продлевает аренду на `ttl` секунд на каждом тике. Если лидер перестал продлевать аренду,
+    то ее получает другая реплика не позже чем через `ttl` секунд. При каждой смене лидера выдается новый
+    токен ограждения: перед отправкой задачи лидер проверяет, что аренда с его токеном все еще действует,
+    поэтому реплика, потерявшая лидерство, например, после долгой паузы, задачи не отправляет.
+    """
+
+    def __init__(self, redis_client: SyncRedisClient, *, ttl: seconds) -> None:
+        assert isinstance(redis_client, SyncRedisClient)
+        self._redis_client = redis_client
+        self._ttl = ttl
+        self._instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._token: int | None = None
+        self._expires_at = 0.0
+
+    @property
+    def token(self) -> int | None:
+        """Токен ограждения текущей аренды или None, если экземпляр не лидер."""
+        return self._token
+
+    def acquire(self) -> bool:
+        """Получение или продление аренды лидерства.
+
+        Если Redis недоступен, то экземпляр остается лидером до истечения уже полученной аренды.
+        """
+        requested_at = time.monotonic()
+        try:
+            token = self._redis_client.run_script(
+                ACQUIRE_SCRIPT, keys=[BEAT_LEADER_KEY, BEAT_FENCING_TOKEN_KEY],
+                args=[self._instance_id, int(self._ttl * 1000)])
+        except RedisError:
+            if time.monotonic() >= self._expires_at:
+                self._token = None
+            return self._token is not None
+        self._token = token
+        self._expires_at = requested_at + self._ttl
+        return token is not None
+
+    def is_held(self) -> bool:
+        """Проверка по Redis, что аренда с токеном экземпляра все еще действует."""
+        if self._token is None or time.monotonic() >= self._expires_at:
+            return False
+        try:
+            lease = self._redis_client.get(BEAT_LEADER_KEY)
+        except RedisError:
+            return False
+        return lease is not None and lease.decode() == self._get_lease_value()
+
+    def release(self) -> None:
+        """Снятие аренды, чтобы другая реплика стала лидером без ожидания ее истечения."""
+        if self._token is None:
+            return
+        with suppress(RedisError):
+            self._redis_client.run_script(RELEASE_SCRIPT, keys=[BEAT_LEADER_KEY], args=[self._get_lease_value()])
+        self._token = None
+
+    def _get_lease_value(self) -> str:
+        return f"{self._token}:{self._instance_id}"
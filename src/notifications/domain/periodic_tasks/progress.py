@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import collections
+import logging
+import threading
+import time
+
+from redis.exceptions import RedisError
+
+from .enums import RunCounter
+from .repositories import RunProgressRepository
+
+logger = logging.getLogger(__name__)
+
+
+class RunProgressTracker:
+    """Счетчики прогресса запусков периодических задач с буферизацией в памяти процесса.
+
+    Увеличения счетчиков копятся в памяти и записываются в Redis одним запросом, если с последней записи прошло
+    больше `flush_interval` секунд или накопилось `flush_size` увеличений. Фоновый поток записывает накопленные
+    увеличения раз в `flush_interval` секунд, даже если новых увеличений нет.
+    """
+
+    def __init__(self, progress_repository: RunProgressRepository, *, flush_interval: float, flush_size: int) -> None:
+        assert isinstance(progress_repository, RunProgressRepository)
+        self._progress_repository = progress_repository
+        self._flush_interval = flush_interval
+        self._flush_size = flush_size
+        self._counters: collections.defaultdict[str, collections.Counter[RunCounter]] = collections.defaultdict(
+            collections.Counter)
+        self._increments_count = 0
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._flusher: threading.Thread | None = None
+
+    def start(self, run_id: str, /, *, task_name: str, total_users: int | None = None) -> None:
+        """Регистрация нового запуска."""
+        self._progress_repository.start(run_id, task_name=task_name, total_users=total_users)
+
+    def increment(self, run_id: str | None, counter: RunCounter, /, value: int = 1) -> None:
+        """Увеличение счетчика `counter` запуска `run_id`. Если запуск не задан, то ничего не делается."""
+        if run_id is None or not value:
+            return
+        with self._lock:
+            self._counters[run_id][counter] += value
+            self._increments_count += 1
+        self._ensure_flusher()
+        self.flush_if_due()
+
+    def flush_if_due(self) -> None:
+        """Запись накопленных увеличений, если подошло время записи или накопилось `flush_size` увеличений."""
+        if self._increments_count >= self._flush_size or time.monotonic() - self._flushed_at >= self._flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Запись накопленных увеличений счетчиков в Redis."""
+        with self._lock:
+            counters, self._counters = self._counters, collections.defaultdict(collections.Counter)
+            self._increments_count = 0
+            self._flushed_at = time.monotonic()
+        if counters:
+            self._progress_repository.increment_many(counters)
+
+    def _ensure_flusher(self) -> None:
+        """Запуск фонового потока записи увеличений.
+
+        Поток запускается при первом увеличении в процессе, в том числе заново в дочернем процессе после fork.
+        """
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(target=self._run_flusher, name="run-progress-flusher", daemon=True)
+        self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        while True:
+            time.sleep(self._flush_interval)
+            try:
+                self.flush_if_due()
+            except RedisError as exc:
+                logger.warning("Cannot flush run progress counters: %r", exc)
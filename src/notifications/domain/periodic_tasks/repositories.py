@@ -1,28 +1,71 @@
+import datetime
 import json
-from contextlib import AbstractAsyncContextManager
-from typing import Callable, Iterator
+import time
+import zlib
+from contextlib import AbstractAsyncContextManager, suppress
+from typing import Callable, Iterator, Mapping, Sequence
 
+import orjson
 from celery import Celery
-from celery_sqlalchemy_scheduler.models import CrontabSchedule, PeriodicTask
+from celery_sqlalchemy_scheduler.models import CrontabSchedule, PeriodicTask, PeriodicTaskChanged
+from redis.exceptions import RedisError
+from sqlalchemy import insert, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from notifications.common.exceptions import ConflictError
+from notifications.domain.messages.types import NotificationPayload
+from notifications.infrastructure.db.cache import CacheKeyBuilder
+from notifications.infrastructure.db.redis import RedisClient, SyncRedisClient
+from notifications.types import seconds
 
-from .constants import PERIODIC_TASK_PREFIX
-from .types import CeleryPeriodicTask, CeleryTask
+from .constants import (
+    DIGEST_SPOOL_PREFIX, PERIODIC_TASK_PREFIX, PERIODIC_TASKS_CHANNEL, RECENT_RUNS_KEY, RUN_PROGRESS_PREFIX,
+)
+from .enums import NotificationSubject, RunCounter
+from .types import CeleryPeriodicTask, CeleryTask, RunProgress, TaskCrontabSchedule
+
+# Регистрация запуска ARGV[1] задачи ARGV[3] с оценкой количества пользователей ARGV[4] во время ARGV[2].
+# Повторная регистрация запуска, например, при продолжении с контрольной точки, ничего не меняет.
+START_RUN_SCRIPT = """
+if redis.call("HSETNX", KEYS[1], "started_at", ARGV[2]) == 1 then
+    redis.call("HSET", KEYS[1], "updated_at", ARGV[2], "task", ARGV[3])
+    if ARGV[4] ~= "" then
+        redis.call("HSET", KEYS[1], "total_users", ARGV[4])
+    end
+    redis.call("EXPIRE", KEYS[1], ARGV[5])
+    redis.call("ZADD", KEYS[2], ARGV[2], ARGV[1])
+    redis.call("ZREMRANGEBYSCORE", KEYS[2], "-inf", ARGV[2] - ARGV[5])
+end
+"""
+
+# Увеличение счетчиков прогресса запуска ARGV[3:] во время ARGV[1], счетчики передаются парами поле-значение.
+INCREMENT_RUN_SCRIPT = """
+for i = 3, #ARGV, 2 do
+    redis.call("HINCRBY", KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call("HSETNX", KEYS[1], "started_at", ARGV[1])
+redis.call("HSET", KEYS[1], "updated_at", ARGV[1])
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+"""
 
 
 class TaskRepository:
-    """Репозиторий для работы с Celery задачами."""
+    """Репозиторий для работы с Celery задачами.
+
+    После создания периодических задач их названия публикуются в канал Redis `redis_client`,
+    по которому Beat перечитывает из БД только измененные задачи.
+    """
 
     def __init__(
         self,
         celery_app: Celery,
         session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]] = None,
+        redis_client: SyncRedisClient | None = None,
     ) -> None:
         self._celery_app = celery_app
         self._session_factory = session_factory
+        self._redis_client = redis_client
 
     def get_all_registered_iter(self) -> Iterator[CeleryTask]:
         """Получение списка зарегистрированных задач.
@@ -39,17 +82,191 @@ class TaskRepository:
         return list(self.get_all_registered_iter())
 
     async def create_new_periodic(self, periodic_task: CeleryPeriodicTask, /) -> PeriodicTask:
-        """Создание и регистрация новой периодической задачи."""
+        """Создание и регистрация новой периодической задачи.
+
+        Сегмент аудитории передается в задачу аргументом `segment`.
+        """
         async with self._session_factory() as session:
             schedule = CrontabSchedule(**periodic_task.crontab.dict())
-            periodic_task = PeriodicTask(
-                crontab=schedule,
-                kwargs=json.dumps(periodic_task.kwargs),
-                **periodic_task.dict(exclude={"crontab", "kwargs"}),
-            )
+            periodic_task = PeriodicTask(crontab=schedule, **self._get_periodic_task_fields(periodic_task))
             session.add(periodic_task)
             try:
                 await session.commit()
-                return periodic_task
             except IntegrityError:
                 raise ConflictError(f"Task <{periodic_task.task}> already exists.")
+        self._publish_changes([periodic_task.name])
+        return periodic_task
+
+    async def create_many_periodic(self, periodic_tasks: Sequence[CeleryPeriodicTask], /) -> None:
+        """Создание и регистрация нескольких периодических задач в одной транзакции.
+
+        Одинаковые расписания создаются один раз, расписания и задачи добавляются одним запросом на таблицу.
+        Если хотя бы одна задача уже существует, то не создается ни одна.
+        """
+        names = [periodic_task.name for periodic_task in periodic_tasks]
+        async with self._session_factory() as session:
+            existing_names = (await session.scalars(
+                select(PeriodicTask.name).where(PeriodicTask.name.in_(names)))).all()
+            if existing_names:
+                raise ConflictError(f"Tasks <{', '.join(sorted(existing_names))}> already exist.")
+            crontab_fields = list(TaskCrontabSchedule.__fields__)
+            schedules = {
+                tuple(periodic_task.crontab.dict().values()): periodic_task.crontab.dict()
+                for periodic_task in periodic_tasks
+            }
+            # расписания сопоставляются с задачами по значениям полей: порядок RETURNING не гарантируется
+            schedule_rows = await session.execute(
+                insert(CrontabSchedule)
+                .values(list(schedules.values()))
+                .returning(CrontabSchedule.id, *(getattr(CrontabSchedule, field) for field in crontab_fields)),
+            )
+            schedule_ids = {tuple(row[1:]): row[0] for row in schedule_rows}
+            periodic_task_rows = [
+                {
+                    "crontab_id": schedule_ids[tuple(periodic_task.crontab.dict().values())],
+                    **self._get_periodic_task_fields(periodic_task),
+                }
+                for periodic_task in periodic_tasks
+            ]
+            try:
+                await session.execute(insert(PeriodicTask).values(periodic_task_rows))
+                # события ORM при вставке через Core не вызываются, поэтому планировщик уведомляется явно
+                await session.run_sync(lambda sync_session: PeriodicTaskChanged.update_changed(
+                    None, sync_session.connection(), None))
+                await session.commit()
+            except IntegrityError:
+                raise ConflictError(f"Some of the tasks <{', '.join(names)}> already exist.")
+        self._publish_changes(names)
+
+    def _publish_changes(self, names: Sequence[str], /) -> None:
+        """Публикация названий созданных или измененных периодических задач для Beat.
+
+        Если уведомление не удалось отправить, то Beat подхватит изменения при проверке таблицы изменений в БД.
+        """
+        if self._redis_client is None:
+            return
+        with suppress(RedisError):
+            self._redis_client.publish(PERIODIC_TASKS_CHANNEL, orjson.dumps(list(names)))
+
+    @staticmethod
+    def _get_periodic_task_fields(periodic_task: CeleryPeriodicTask, /) -> dict:
+        """Получение полей периодической задачи для сохранения.
+
+        Сегмент аудитории передается в задачу аргументом `segment`.
+        """
+        kwargs = periodic_task.kwargs
+        if periodic_task.segment is not None:
+            kwargs = {**kwargs, "segment": json.loads(periodic_task.segment.json(exclude_defaults=True))}
+        return {"kwargs": json.dumps(kwargs), **periodic_task.dict(exclude={"crontab", "kwargs", "segment"})}
+
+
+class DigestSpoolRepository:
+    """Хранилище заранее отрендеренных писем еженедельного дайджеста.
+
+    Письма одного запуска рассылки `run_id` хранятся в списке Redis в компактном виде: сжатая пара
+    из адреса получателя и текста письма, заголовок у всех писем дайджеста одинаковый.
+    """
+
+    def __init__(self, redis_client: RedisClient, ttl: seconds) -> None:
+        assert isinstance(redis_client, RedisClient)
+        self._redis_client = redis_client
+        self._ttl = ttl
+
+    async def push_many(self, run_id: str, payloads: Sequence[NotificationPayload], /) -> None:
+        """Добавление отрендеренных писем в конец очереди."""
+        if not payloads:
+            return
+        records = (self._dump_record(payload) for payload in payloads)
+        await self._redis_client.rpush(self._get_spool_key(run_id), *records, timeout=self._ttl)
+
+    async def pop_many(self, run_id: str, /, *, count: int) -> list[NotificationPayload]:
+        """Извлечение не более `count` писем из начала очереди."""
+        records = await self._redis_client.lpop(self._get_spool_key(run_id), count=count)
+        return [self._load_record(record) for record in records]
+
+    async def set_rendered_until(self, run_id: str, date: datetime.date, /) -> None:
+        """Сохранение даты регистрации, до которой (не включительно) письма уже отрендерены."""
+        await self._redis_client.set(self._get_spool_key(run_id, "rendered_until"), date.isoformat(), timeout=self._ttl)
+
+    async def get_rendered_until(self, run_id: str, /) -> datetime.date | None:
+        """Получение даты регистрации, до которой (не включительно) письма уже отрендерены."""
+        rendered_until = await self._redis_client.get(self._get_spool_key(run_id, "rendered_until"))
+        if rendered_until is None:
+            return None
+        if isinstance(rendered_until, bytes):
+            rendered_until = rendered_until.decode()
+        return datetime.date.fromisoformat(rendered_until)
+
+    async def mark_sending_started(self, run_id: str, /) -> None:
+        """Отметка о начале отправки писем: после нее новые письма в очередь не добавляются."""
+        await self._redis_client.set(self._get_spool_key(run_id, "sending_started"), 1, timeout=self._ttl)
+
+    async def is_sending_started(self, run_id: str, /) -> bool:
+        """Проверка, началась ли отправка писем."""
+        return await self._redis_client.get(self._get_spool_key(run_id, "sending_started")) is not None
+
+    @staticmethod
+    def _dump_record(payload: NotificationPayload, /) -> bytes:
+        return zlib.compress(orjson.dumps((payload["recipient_list"][0], payload["content"])))
+
+    @staticmethod
+    def _load_record(record: bytes, /) -> NotificationPayload:
+        email, content = orjson.loads(zlib.decompress(record))
+        payload = NotificationPayload(
+            subject=NotificationSubject.WEEKLY_DIGEST.value,
+            recipient_list=[email],
+            content=content,
+        )
+        return payload
+
+    @staticmethod
+    def _get_spool_key(run_id: str, suffix: str | None = None) -> str:
+        return CacheKeyBuilder.make_key_with_affixes(run_id, prefix=DIGEST_SPOOL_PREFIX, suffix=suffix)
+
+
+class RunProgressRepository:
+    """Хранилище счетчиков прогресса запусков периодических задач в Redis.
+
+    Счетчики запуска хранятся в хеш-таблице вместе со временем начала и последнего обновления,
+    идентификаторы запусков - в множестве, отсортированном по времени начала. Все данные хранятся `ttl` секунд.
+    """
+
+    def __init__(self, redis_client: SyncRedisClient, ttl: seconds) -> None:
+        assert isinstance(redis_client, SyncRedisClient)
+        self._redis_client = redis_client
+        self._ttl = ttl
+
+    def start(self, run_id: str, /, *, task_name: str, total_users: int | None = None) -> None:
+        """Регистрация нового запуска с оценкой количества пользователей `total_users`."""
+        keys = [self._get_key(run_id), RECENT_RUNS_KEY]
+        args = [run_id, time.time(), task_name, "" if total_users is None else total_users, self._ttl]
+        self._redis_client.run_scripts(START_RUN_SCRIPT, calls=[(keys, args)])
+
+    def increment_many(self, counters: Mapping[str, Mapping[RunCounter, int]], /) -> None:
+        """Увеличение счетчиков нескольких запусков одним запросом к БД."""
+        now = time.time()
+        calls = [
+            (
+                [self._get_key(run_id)],
+                [now, self._ttl, *(item for counter, value in run_counters.items() for item in (counter.value, value))],
+            )
+            for run_id, run_counters in counters.items()
+        ]
+        self._redis_client.run_scripts(INCREMENT_RUN_SCRIPT, calls=calls)
+
+    def get(self, run_id: str, /) -> RunProgress | None:
+        """Получение прогресса запуска."""
+        counters = self._redis_client.hgetall(self._get_key(run_id))
+        if not counters:
+            return None
+        return RunProgress.from_counters(run_id, {field.decode(): value.decode() for field, value in counters.items()})
+
+    def get_recent(self, *, limit: int) -> list[RunProgress]:
+        """Получение прогресса последних `limit` запусков, начиная с самого нового."""
+        run_ids = self._redis_client.zrevrange(RECENT_RUNS_KEY, start=0, end=limit - 1)
+        runs = (self.get(run_id.decode()) for run_id in run_ids)
+        return [run for run in runs if run is not None]
+
+    @staticmethod
+    def _get_key(run_id: str, /) -> str:
+        return CacheKeyBuilder.make_key_with_affixes(run_id, prefix=RUN_PROGRESS_PREFIX)
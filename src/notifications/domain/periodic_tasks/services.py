@@ -1,18 +1,26 @@
+import collections
 import dataclasses
+import datetime
+import functools
 import uuid
+from typing import Any, Callable, Sequence
 
+from notifications.common.exceptions import ConflictError, NotFoundError
 from notifications.core.config import CeleryQueue
+from notifications.domain.audience import AudienceSegment, AudienceService
 from notifications.domain.messages import EmailNotificationService
 from notifications.domain.messages.types import NotificationPayload
-from notifications.domain.templates import TemplateService
-from notifications.integrations.auth import NetflixAuthClient
+from notifications.domain.suppressions import SuppressionService
+from notifications.domain.templates import Template, TemplateService
+from notifications.helpers import batched
 from notifications.integrations.auth.types import BoundaryRegistrationDate, UserDetail
-from notifications.integrations.ugc import NetflixUgcClient
+from notifications.integrations.ugc import NetflixUgcClient, RecommendationRepository
 
-from .enums import DefaultTemplateSlugs, NotificationSubject
+from .enums import DefaultTemplateSlugs, NotificationSubject, RunCounter
 from .exceptions import UnknownCeleryTaskError
-from .repositories import TaskRepository
-from .types import CeleryPeriodicTask, CeleryTask
+from .progress import RunProgressTracker
+from .repositories import DigestSpoolRepository, RunProgressRepository, TaskRepository
+from .types import CeleryPeriodicTask, CeleryTask, DigestRecipient, RunProgress
 
 
 @dataclasses.dataclass
@@ -22,8 +30,17 @@ class TaskService:
     task_repository: TaskRepository
     email_service: EmailNotificationService
     template_service: TemplateService
-    auth_client: NetflixAuthClient
+    audience_service: AudienceService
     ugc_client: NetflixUgcClient
+    recommendation_repository: RecommendationRepository
+    digest_prefetch_batch_size: int
+    spawn_batch_size: int
+    digest_spool_repository: DigestSpoolRepository
+    digest_spool_batch_size: int
+    suppression_service: SuppressionService
+    run_progress: RunProgressTracker
+    run_progress_repository: RunProgressRepository
+    recent_runs_limit: int
 
     def get_all_registered(self) -> list[CeleryTask]:
         """Получение списка Celery задач для отображения в панели администратора."""
@@ -36,70 +53,328 @@ class TaskService:
         await self.template_service.get_by_slug(periodic_task.kwargs.get("template_slug"))
         return await self.task_repository.create_new_periodic(periodic_task)
 
+    async def create_many_periodic(self, periodic_tasks: Sequence[CeleryPeriodicTask], /) -> None:
+        """Создание нескольких периодических задач.
+
+        Все задачи проверяются до создания: названия Celery задач сверяются с множеством зарегистрированных,
+        существование шаблонов проверяется одним запросом. Если хотя бы одна задача не прошла проверку,
+        то не создается ни одна.
+        """
+        if not periodic_tasks:
+            return
+        names_count = collections.Counter(task.name for task in periodic_tasks)
+        duplicate_names = {name for name, count in names_count.items() if count > 1}
+        if duplicate_names:
+            raise ConflictError(f"Tasks <{', '.join(sorted(duplicate_names))}> are duplicated.")
+        registered_task_names = self.get_registered_task_names()
+        unknown_task_names = {task.task for task in periodic_tasks} - registered_task_names
+        if unknown_task_names:
+            raise UnknownCeleryTaskError(
+                f"Unknown Celery tasks <{', '.join(sorted(unknown_task_names))}>. Check if they are registered.")
+        missing_slugs = await self.template_service.get_missing_slugs(
+            {task.kwargs["template_slug"] for task in periodic_tasks})
+        if missing_slugs:
+            raise NotFoundError(f"There are no templates with slugs <{', '.join(sorted(missing_slugs))}>.")
+        await self.task_repository.create_many_periodic(periodic_tasks)
+
+    def get_run_progress(self, run_id: str, /) -> RunProgress:
+        """Получение прогресса запуска периодической задачи."""
+        run_progress = self.run_progress_repository.get(run_id)
+        if run_progress is None:
+            raise NotFoundError(f"There is no run <{run_id}>.")
+        return run_progress
+
+    def get_recent_runs(self) -> list[RunProgress]:
+        """Получение прогресса последних запусков периодических задач."""
+        return self.run_progress_repository.get_recent(limit=self.recent_runs_limit)
+
+    def get_registered_task_names(self) -> set[str]:
+        """Получение множества названий Celery задач, доступных для использования."""
+        return {task.name for task in self.task_repository.get_all_registered_iter()}
+
     def is_periodic_task_available(self, target_task_name: str) -> bool:
         """Проверка доступности Celery задачи для использования."""
-        for task in self.task_repository.get_all_registered_iter():
-            if task.name == target_task_name:
-                return True
-        return False
+        return target_task_name in self.get_registered_task_names()
 
-    async def spawn_weekly_digest_tasks_by_boundary(self, dates_boundary: BoundaryRegistrationDate, /) -> None:
-        """Создание фоновых задач на отправку дайджеста."""
+    async def spawn_weekly_digest_tasks_by_boundary(
+        self, dates_boundary: BoundaryRegistrationDate, /, *, run_id: str | None = None,
+    ) -> int:
+        """Создание фоновых задач на отправку дайджеста.
+
+        Результаты учитываются в счетчиках прогресса запуска `run_id`.
+
+        Returns:
+            Количество подписчиков, для которых созданы задачи.
+        """
         from .tasks import send_weekly_digest_to_subscriber
 
-        await self._create_default_digest_template()
-        for user in self.auth_client.get_users_within_registration_date_range_iter(dates_boundary):
-            send_weekly_digest_to_subscriber.delay(user.dict())
+        template = await self._create_default_digest_template()
+        prefetch_recommendations = "recommendations" in self.template_service.get_template_variables(template)
+        cached_film_pks: set[uuid.UUID] = set()
+        users_count = 0
+        users = self.audience_service.get_users_within_registration_date_range_iter(dates_boundary)
+        for users_batch in batched(users, self.digest_prefetch_batch_size):
+            scanned_count = len(users_batch)
+            users_batch = await self._exclude_suppressed(users_batch)
+            film_pks = {}
+            if prefetch_recommendations:
+                film_pks = await self._prefetch_recommendations(users_batch, cached_film_pks=cached_film_pks)
+            results = [
+                send_weekly_digest_to_subscriber.delay(
+                    DigestRecipient.from_user(user), film_pks.get(user.pk), run_id=run_id)
+                for user in users_batch
+            ]
+            self._track_spawned(run_id, results, scanned_count=scanned_count)
+            users_count += len(users_batch)
+        return users_count
+
+    async def prerender_weekly_digest_by_boundary(
+        self, dates_boundary: BoundaryRegistrationDate, /, *, run_id: str,
+    ) -> int:
+        """Рендеринг писем дайджеста заранее и сохранение их в очередь для последующей отправки.
+
+        Если отправка писем запуска `run_id` уже началась, то письма не рендерятся:
+        оставшиеся подписчики получат дайджест в обычном режиме.
+
+        Returns:
+            Количество подписчиков, для которых отрендерены письма.
+        """
+        if await self.digest_spool_repository.is_sending_started(run_id):
+            return 0
+        users_count = 0
+        template = await self._create_default_digest_template()
+        prefetch_recommendations = "recommendations" in self.template_service.get_template_variables(template)
+        users = self.audience_service.get_users_within_registration_date_range_iter(dates_boundary)
+        for users_batch in batched(users, self.digest_prefetch_batch_size):
+            users_batch = await self._exclude_suppressed(users_batch)
+            recommendations = {}
+            if prefetch_recommendations:
+                recommendations = await self.ugc_client.get_recommendations_for_users([user.pk for user in users_batch])
+            payloads = [
+                await self._build_digest_payload(
+                    user, template,
+                    recommendations=[film.dict() for film in recommendations.get(user.pk, ())],
+                )
+                for user in users_batch
+            ]
+            await self.digest_spool_repository.push_many(run_id, payloads)
+            users_count += len(users_batch)
+        await self.digest_spool_repository.set_rendered_until(run_id, dates_boundary.last_registration_date)
+        return users_count
+
+    async def start_sending_prerendered_digest(self, run_id: str, /) -> datetime.date | None:
+        """Начало отправки заранее отрендеренного дайджеста.
+
+        После начала отправки новые письма в очередь запуска `run_id` не добавляются.
+
+        Returns:
+            Дата регистрации, начиная с которой подписчикам нужно отправить дайджест в обычном режиме.
+            None, если дайджест заранее не рендерился.
+        """
+        await self.digest_spool_repository.mark_sending_started(run_id)
+        return await self.digest_spool_repository.get_rendered_until(run_id)
+
+    async def send_prerendered_digest_batch(
+        self,
+        run_id: str, /, *,
+        acquire_lock: Callable[[str], bool],
+        release_locks: Callable[[list[str]], None],
+    ) -> int:
+        """Отправка пачки заранее отрендеренных писем дайджеста.
+
+        Письмо отправляется, только если адрес получателя не в списке подавления и удалось установить
+        блокировку `acquire_lock` на адрес получателя. Результаты учитываются в счетчиках прогресса запуска `run_id`.
+        Если письма не удалось отправить, то они возвращаются в конец очереди, а блокировки снимаются `release_locks`.
+
+        Returns:
+            Количество писем, извлеченных из очереди.
+        """
+        payloads = await self.digest_spool_repository.pop_many(run_id, count=self.digest_spool_batch_size)
+        allowed_emails = set(await self.suppression_service.filter_allowed(
+            [payload["recipient_list"][0] for payload in payloads]))
+        allowed_payloads = [payload for payload in payloads if payload["recipient_list"][0] in allowed_emails]
+        payloads_to_send = [payload for payload in allowed_payloads if acquire_lock(payload["recipient_list"][0])]
+        self.run_progress.increment(run_id, RunCounter.SCANNED, len(payloads))
+        self.run_progress.increment(run_id, RunCounter.SUPPRESSED, len(payloads) - len(allowed_payloads))
+        self.run_progress.increment(run_id, RunCounter.DEDUPLICATED, len(allowed_payloads) - len(payloads_to_send))
+        if payloads_to_send:
+            try:
+                await self.email_service.send_messages(payloads_to_send)
+            except Exception:
+                self.run_progress.increment(run_id, RunCounter.FAILED, len(payloads_to_send))
+                await self.digest_spool_repository.push_many(run_id, payloads_to_send)
+                release_locks([payload["recipient_list"][0] for payload in payloads_to_send])
+                raise
+            self.run_progress.increment(run_id, RunCounter.SENT, len(payloads_to_send))
+        return len(payloads)
 
     async def spawn_email_with_templates_tasks_by_boundary(
-        self, dates_boundary: BoundaryRegistrationDate, /, *, template_slug: str, email_subject: str,
-    ) -> None:
-        """Создание фоновых задач на отправку одинаковых писем с заданным шаблоном."""
+        self,
+        dates_boundary: BoundaryRegistrationDate, /, *,
+        template_slug: str,
+        email_subject: str,
+        segment: AudienceSegment | None = None,
+        run_id: str | None = None,
+    ) -> int:
+        """Создание фоновых задач на отправку одинаковых писем с заданным шаблоном пользователям сегмента `segment`.
+
+        Результаты учитываются в счетчиках прогресса запуска `run_id`.
+
+        Returns:
+            Количество пользователей, для которых созданы задачи.
+        """
         from notifications.domain.messages.tasks import send_email
 
-        for user in self.auth_client.get_users_within_registration_date_range_iter(dates_boundary):
-            payload = self._build_template_payload(user, template_slug=template_slug, email_subject=email_subject)
-            send_email.apply_async(args=[payload], queue=CeleryQueue.COMMON.value)
+        template = await self.template_service.get_by_slug(template_slug)
+        content_hash = await self._render_static_template(template)
+        users_count = 0
+        users = self.audience_service.get_users_within_registration_date_range_iter(dates_boundary, segment=segment)
+        for users_batch in batched(users, self.spawn_batch_size):
+            scanned_count = len(users_batch)
+            users_batch = await self._exclude_suppressed(users_batch)
+            results = []
+            for user in users_batch:
+                payload = await self._build_template_payload(
+                    user, template, email_subject=email_subject, content_hash=content_hash)
+                if run_id is not None:
+                    payload["run_id"] = run_id
+                results.append(send_email.apply_async(args=[payload], queue=CeleryQueue.COMMON.value))
+            self._track_spawned(run_id, results, scanned_count=scanned_count)
+            users_count += len(users_batch)
+        return users_count
+
+    async def send_digest_email_to_subscriber(
+        self, user_data: UserDetail | DigestRecipient, /, *, film_pks: list[uuid.UUID] | None = None,
+    ) -> None:
+        """Отправка еженедельного дайджеста одному пользователю.
 
-    async def send_digest_email_to_subscriber(self, user_data: UserDetail, /) -> None:
-        """Отправка еженедельного дайджеста одному пользователю."""
-        message_payload = self._build_digest_payload(user_data)
+        Если рекомендации были получены заранее, то в `film_pks` передаются идентификаторы рекомендованных фильмов.
+        """
+        template = await self.template_service.get_by_slug(DefaultTemplateSlugs.WEEKLY_DIGEST.value)
+        message_payload = await self._build_digest_payload(user_data, template, film_pks=film_pks)
         await self.email_service.send_message(message_payload)
 
-    async def _create_default_digest_template(self) -> None:
+    def _track_spawned(self, run_id: str | None, results: list[Any], /, *, scanned_count: int) -> None:
+        """Учет пачки пользователей в счетчиках прогресса запуска.
+
+        Задачи, которые не были поставлены из-за блокировки, считаются повторами.
+        """
+        spawned_count = sum(result is not None for result in results)
+        self.run_progress.increment(run_id, RunCounter.SCANNED, scanned_count)
+        self.run_progress.increment(run_id, RunCounter.SUPPRESSED, scanned_count - len(results))
+        self.run_progress.increment(run_id, RunCounter.SPAWNED, spawned_count)
+        self.run_progress.increment(run_id, RunCounter.DEDUPLICATED, len(results) - spawned_count)
+
+    async def _exclude_suppressed(self, users: list[UserDetail], /) -> list[UserDetail]:
+        """Исключение пользователей, адреса которых находятся в списке подавления."""
+        allowed_emails = set(await self.suppression_service.filter_allowed([user.email for user in users]))
+        return [user for user in users if user.email in allowed_emails]
+
+    async def _create_default_digest_template(self) -> Template:
         """Создание шаблона уведомления для дайджеста."""
-        await self.template_service.create_default_template(
+        return await self.template_service.create_default_template(
             name="Weekly Digest", slug=DefaultTemplateSlugs.WEEKLY_DIGEST.value, filename="weekly_digest.html")
 
-    def _build_digest_payload(self, user_data: UserDetail, /) -> NotificationPayload:
-        """Формирование данных дайджеста для письма."""
+    async def _prefetch_recommendations(
+        self, users: list[UserDetail], /, *, cached_film_pks: set[uuid.UUID],
+    ) -> dict[uuid.UUID, list[uuid.UUID]]:
+        """Получение рекомендаций для пачки пользователей.
+
+        Информация о фильмах сохраняется в общий кэш, фильмы из `cached_film_pks` повторно не сохраняются.
+
+        Returns:
+            Идентификаторы рекомендованных фильмов для каждого пользователя.
+        """
+        recommendations = await self.ugc_client.get_recommendations_for_users([user.pk for user in users])
+        films = {
+            film.pk: film
+            for user_recommendations in recommendations.values()
+            for film in user_recommendations
+            if film.pk not in cached_film_pks
+        }
+        await self.recommendation_repository.save_many(films.values())
+        cached_film_pks.update(films.keys())
+        film_pks = {
+            user_pk: [film.pk for film in user_recommendations]
+            for user_pk, user_recommendations in recommendations.items()
+        }
+        return film_pks
+
+    async def _render_static_template(self, template: Template, /) -> str | None:
+        """Рендеринг шаблона, который не зависит от данных получателя.
+
+        Такой шаблон рендерится один раз за запуск рассылки, а письма ссылаются на результат по хешу содержимого.
+        Если шаблону нужен контекст, то возвращается None.
+        """
+        if not self.template_service.is_static(template):
+            return None
+        return await self.template_service.render_to_cache(template)
+
+    async def _build_digest_payload(
+        self,
+        user_data: UserDetail | DigestRecipient, template: Template, /, *,
+        film_pks: list[uuid.UUID] | None = None,
+        recommendations: list[dict] | None = None,
+    ) -> NotificationPayload:
+        """Формирование данных дайджеста для письма.
+
+        Рекомендации запрашиваются только в том случае, если они используются в шаблоне дайджеста
+        и не были переданы в `recommendations`.
+        """
+        providers = {
+            **self._get_user_context_providers(user_data),
+            "recommendations": functools.partial(
+                self._get_serialized_digest_recommendations, user_data.pk, film_pks=film_pks),
+        }
+        if recommendations is not None:
+            providers["recommendations"] = lambda: recommendations
+        context = await self.template_service.build_context(template, providers=providers)
         payload = NotificationPayload(
             subject=NotificationSubject.WEEKLY_DIGEST.value,
             recipient_list=[user_data.email],
-            template_slug=DefaultTemplateSlugs.WEEKLY_DIGEST.value,
-            context={
-                "name": user_data.first_name,
-                "recommendations": self._get_serialized_digest_recommendations(user_data.pk),
-            },
+            content=await self.template_service.render_template_from_string(template.content, context=context),
         )
         return payload
 
-    def _get_serialized_digest_recommendations(self, user_pk: uuid.UUID) -> list[dict]:
-        """Получение сериализованных рекомендаций для дайджеста."""
-        recommendations = [
-            recommendation.dict()
-            for recommendation in self.ugc_client.get_recommendations_for_user_iter(user_pk)
-        ]
-        return recommendations
+    async def _get_serialized_digest_recommendations(
+        self, user_pk: uuid.UUID, /, *, film_pks: list[uuid.UUID] | None = None,
+    ) -> list[dict]:
+        """Получение сериализованных рекомендаций для дайджеста.
 
-    @staticmethod
-    def _build_template_payload(
-        user_data: UserDetail, /, *, template_slug: str, email_subject: str,
+        Фильмы из `film_pks` берутся из общего кэша. Если каких-то фильмов в кэше уже нет,
+        то рекомендации запрашиваются у Netflix UGC.
+        """
+        if film_pks is not None:
+            films = await self.recommendation_repository.get_many(film_pks)
+            if None not in films:
+                return films
+        recommendations = await self.ugc_client.get_recommendations_for_user(user_pk)
+        return [recommendation.dict() for recommendation in recommendations]
+
+    async def _build_template_payload(
+        self, user_data: UserDetail, template: Template, /, *, email_subject: str, content_hash: str | None = None,
     ) -> NotificationPayload:
         """Формирование данных для отправки письма по шаблону."""
         payload = NotificationPayload(
             subject=email_subject,
             recipient_list=[user_data.email],
-            template_slug=template_slug,
+            template_slug=template.slug,
         )
+        if content_hash is not None:
+            payload["content_hash"] = content_hash
+            return payload
+        providers = self._get_user_context_providers(user_data)
+        if context := await self.template_service.build_context(template, providers=providers):
+            payload["context"] = context
         return payload
+
+    @staticmethod
+    def _get_user_context_providers(user_data: UserDetail | DigestRecipient, /) -> dict[str, Callable[[], Any]]:
+        """Провайдеры контекста с данными получателя письма."""
+        providers = {
+            "name": lambda: user_data.first_name,
+            "first_name": lambda: user_data.first_name,
+            "last_name": lambda: user_data.last_name,
+            "email": lambda: user_data.email,
+        }
+        return providers
@@ -1,30 +1,47 @@
 from __future__ import annotations
 
 import datetime
+import uuid
 from functools import partial
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Sequence
 
 from billiard.exceptions import SoftTimeLimitExceeded
 from celery import shared_task
-from celery_chunkificator.chunkify import DateChunk, chunkify_task
 from dependency_injector.wiring import Provide, inject
 
 from notifications.containers import Container
-from notifications.core.config import CeleryQueue
+from notifications.core.config import CeleryQueue, get_settings
+from notifications.domain.audience.types import AudienceSegment
 from notifications.helpers import TZ_MOSCOW, sync_task
 from notifications.integrations.auth.enums import DefaultRoles
-from notifications.integrations.auth.types import BoundaryRegistrationDate, UserDetail
+from notifications.integrations.auth.types import BoundaryRegistrationDate
 
+from .chunks import AdaptiveDateChunker, DateChunk, QueueDepthPacer, chunkify_task
 from .constants import PERIODIC_TASK_PREFIX
 from .enums import NotificationSubject
-from .types import UserPayload
+from .types import DigestRecipient
 
 if TYPE_CHECKING:
     from notifications.celery import Task
+    from notifications.domain.audience import AudienceService
     from notifications.integrations.auth import NetflixAuthClient
 
     from .services import TaskService
 
+settings = get_settings()
+
+
+chunker = AdaptiveDateChunker(
+    target_users=settings.CHUNK_TARGET_USERS,
+    target_duration=settings.CHUNK_TARGET_DURATION,
+)
+common_queue_pacer = QueueDepthPacer(
+    queue=CeleryQueue.COMMON.value,
+    low_watermark=settings.PRODUCER_QUEUE_LOW_WATERMARK,
+    high_watermark=settings.PRODUCER_QUEUE_HIGH_WATERMARK,
+    max_delay=settings.PRODUCER_MAX_DELAY,
+)
+
 
 @inject
 def get_date_boundaries(
@@ -36,18 +53,54 @@ def get_date_boundaries(
     return auth_client.get_boundary_registration_dates(user_role=DefaultRoles(user_role))
 
 
-def get_users_initial_chunk(*args, user_role: DefaultRoles | None = None, **kwargs) -> DateChunk:
-    """Получение начального чанка дат, основанного на первой и последней датах регистрации."""
+@inject
+def get_users_initial_chunks(
+    *args,
+    lanes: int = 1, user_role: str | None = None, registration_date_from: str | None = None,
+    segment: dict | None = None,
+    auth_client: NetflixAuthClient = Provide[Container.auth_client],
+    audience_service: AudienceService = Provide[Container.audience_service],
+    **kwargs,
+) -> list[DateChunk]:
+    """Получение начальных чанков дат для `lanes` полос, основанных на первой и последней датах регистрации.
+
+    Если передана дата `registration_date_from`, то обработка начинается с нее.
+    Если передан сегмент аудитории `segment`, то диапазон дат сужается до диапазона сегмента, а полосы и размер
+    чанков подбираются по гистограмме регистраций пользователей сегмента из снимка аудитории.
+    Иначе - по гистограмме регистраций, если ее предоставляет сервис Auth.
+    """
     date_boundaries = get_date_boundaries(user_role=user_role)
-    chunk = DateChunk(
-        start=date_boundaries.first_registration_date,
-        size=datetime.timedelta(days=30),
-        max=date_boundaries.last_registration_date,
+    if registration_date_from is not None:
+        date_boundaries.first_registration_date = datetime.date.fromisoformat(registration_date_from)
+    density = None
+    if segment is not None:
+        audience_segment = AudienceSegment.parse_obj(segment)
+        date_boundaries.first_registration_date, date_boundaries.last_registration_date = (
+            audience_segment.get_date_range(
+                date_boundaries.first_registration_date, date_boundaries.last_registration_date)
+        )
+        density = audience_service.get_registration_density(date_boundaries, segment=audience_segment)
+    if density is None:
+        density = auth_client.get_registration_density(
+            date_boundaries, user_role=DefaultRoles(user_role) if user_role is not None else None)
+    return chunker.split(
+        date_boundaries.first_registration_date, date_boundaries.last_registration_date,
+        lanes=lanes, density=density,
     )
-    return chunk
 
 
-get_subscribers_initial_chunk = partial(get_users_initial_chunk, user_role=DefaultRoles.SUBSCRIBERS.value)
+get_subscribers_initial_chunks = partial(get_users_initial_chunks, user_role=DefaultRoles.SUBSCRIBERS.value)
+
+
+def get_digest_lock_suffix(recipient: Sequence[Any], *args, **kwargs) -> tuple[str, ...]:
+    """Получение суффикса лока отправки дайджеста по адресу подписчика из записи `DigestRecipient`."""
+    _, email, *_ = recipient
+    return "email", email, "subject", NotificationSubject.WEEKLY_DIGEST.value
+
+
+def get_digest_run_id() -> str:
+    """Получение идентификатора текущей рассылки дайджеста."""
+    return f"weekly_digest:{datetime.datetime.now(TZ_MOSCOW).date().isoformat()}"
 
 
 @shared_task(
@@ -60,28 +113,31 @@ get_subscribers_initial_chunk = partial(get_users_initial_chunk, user_role=Defau
     autoretry_for=(SoftTimeLimitExceeded,),
     expires=datetime.datetime.now(TZ_MOSCOW) + datetime.timedelta(hours=12),
     lock_ttl=12 * 60 * 60,
-    lock_suffix=(
-        lambda user_payload: ("email", user_payload["email"], "subject", NotificationSubject.WEEKLY_DIGEST.value)
-    ),
+    lock_suffix=get_digest_lock_suffix,
+    progress_run_id=lambda recipient, *args, run_id=None, **kwargs: run_id,
 )
 @sync_task
 @inject
 async def send_weekly_digest_to_subscriber(
     self: Task,
-    user_payload: UserPayload, *args,
+    recipient: Sequence[Any], film_pks: list[uuid.UUID] | None = None, *args,
     task_service: TaskService = Provide[Container.task_service],
     **kwargs,
 ) -> None:
-    """Фоновая задача по отправке еженедельного дайджеста одному подписчику."""
-    user_payload["registration_date"] = user_payload["registration_date"].rsplit("T")[0]
-    await task_service.send_digest_email_to_subscriber(UserDetail(**user_payload))
-    self.log.debug(f"Email has been sent to <{user_payload['email']}>.")
+    """Фоновая задача по отправке еженедельного дайджеста одному подписчику.
+
+    Подписчик передается позиционной записью `DigestRecipient`.
+    В `film_pks` передаются идентификаторы заранее полученных рекомендаций для подписчика,
+    в `run_id` - запуск рассылки, в счетчиках прогресса которого учитывается результат.
+    """
+    recipient = DigestRecipient(*recipient)
+    await task_service.send_digest_email_to_subscriber(recipient, film_pks=film_pks)
+    self.log.debug(f"Email has been sent to <{recipient.email}>.")
 
 
 @shared_task(
     queue=CeleryQueue.COMMON.value,
     bind=True,
-    serializer="pickle",
     ignore_result=True,
     time_limit=2 * 60 * 60,
     soft_time_limit=60 * 60,
@@ -89,8 +145,11 @@ async def send_weekly_digest_to_subscriber(
     lock_ttl=3 * 60 * 60,
 )
 @chunkify_task(
-    sleep_timeout=10,
-    initial_chunk=get_subscribers_initial_chunk,
+    initial_chunks=get_subscribers_initial_chunks,
+    chunker=chunker,
+    lanes=settings.CHUNK_PARALLEL_LANES,
+    checkpoint_ttl=settings.CHUNK_CHECKPOINT_TTL,
+    pacer=common_queue_pacer,
 )
 @sync_task
 @inject
@@ -99,19 +158,18 @@ async def send_weekly_digest_to_subscribers(
     chunk: DateChunk, *args,
     task_service: TaskService = Provide[Container.task_service],
     **kwargs,
-) -> None:
+) -> int:
     """Фоновая задача по рассылке еженедельного дайджеста всем подписчикам."""
     start, end = chunk.range
     dates_boundary = BoundaryRegistrationDate(first_registration_date=start, last_registration_date=end)
-    await task_service.spawn_weekly_digest_tasks_by_boundary(dates_boundary)
+    users_count = await task_service.spawn_weekly_digest_tasks_by_boundary(dates_boundary, run_id=chunk.run_id)
     self.log.debug("Spawned new `digest` tasks.")
+    return users_count
 
 
 @shared_task(
-    name=f"{PERIODIC_TASK_PREFIX}periodic_tasks.tasks.send_emails_with_template",
     queue=CeleryQueue.COMMON.value,
     bind=True,
-    serializer="pickle",
     ignore_result=True,
     time_limit=2 * 60 * 60,
     soft_time_limit=60 * 60,
@@ -120,7 +178,122 @@ async def send_weekly_digest_to_subscribers(
 )
 @chunkify_task(
     sleep_timeout=10,
-    initial_chunk=get_users_initial_chunk,
+    initial_chunks=get_subscribers_initial_chunks,
+    chunker=chunker,
+    checkpoint_ttl=settings.CHUNK_CHECKPOINT_TTL,
+)
+@sync_task
+@inject
+async def prerender_weekly_digest_for_subscribers(
+    self: Task,
+    chunk: DateChunk, *args,
+    task_service: TaskService = Provide[Container.task_service],
+    **kwargs,
+) -> int:
+    """Фоновая задача по рендерингу еженедельного дайджеста заранее, до начала рассылки.
+
+    Чанки обрабатываются последовательно в одной полосе: письма отрендерены для всех подписчиков,
+    зарегистрированных до даты последнего обработанного чанка.
+    """
+    start, end = chunk.range
+    dates_boundary = BoundaryRegistrationDate(first_registration_date=start, last_registration_date=end)
+    users_count = await task_service.prerender_weekly_digest_by_boundary(dates_boundary, run_id=get_digest_run_id())
+    self.log.debug("Prerendered `digest` emails.")
+    return users_count
+
+
+@shared_task(
+    queue=CeleryQueue.COMMON.value,
+    bind=True,
+    ignore_result=True,
+    time_limit=60,
+    soft_time_limit=30,
+    lock_ttl=3 * 60 * 60,
+)
+@sync_task
+@inject
+async def send_weekly_digest(
+    self: Task,
+    *args,
+    task_service: TaskService = Provide[Container.task_service],
+    **kwargs,
+) -> None:
+    """Фоновая задача по запуску рассылки еженедельного дайджеста.
+
+    Заранее отрендеренные письма отправляются пачками из очереди, остальным подписчикам дайджест
+    рендерится и отправляется в обычном режиме. Прогресс обеих частей рассылки учитывается в одном запуске.
+    """
+    run_id = get_digest_run_id()
+    rendered_until = await task_service.start_sending_prerendered_digest(run_id)
+    if rendered_until is None:
+        send_weekly_digest_to_subscribers.delay(run_id=run_id)
+        return
+    self.run_progress.start(run_id, task_name=self.name)
+    for _ in range(settings.DIGEST_SPOOL_SENDERS):
+        send_prerendered_weekly_digest.apply_async(args=(run_id, ))
+    send_weekly_digest_to_subscribers.delay(registration_date_from=rendered_until.isoformat(), run_id=run_id)
+    self.log.debug("Started sending prerendered `digest` emails.")
+
+
+@shared_task(
+    queue=CeleryQueue.COMMON.value,
+    bind=True,
+    ignore_result=True,
+    time_limit=10 * 60,
+    soft_time_limit=5 * 60,
+    default_retry_delay=60,
+    max_retries=10,
+    autoretry_for=(Exception,),
+    expires=datetime.datetime.now(TZ_MOSCOW) + datetime.timedelta(hours=12),
+)
+@sync_task
+@inject
+async def send_prerendered_weekly_digest(
+    self: Task,
+    run_id: str, *args,
+    task_service: TaskService = Provide[Container.task_service],
+    **kwargs,
+) -> None:
+    """Фоновая задача по отправке заранее отрендеренных писем дайджеста из очереди.
+
+    Повторная отправка письма подписчику исключается блокировкой задачи `send_weekly_digest_to_subscriber`.
+    Если очередь не опустела за `DIGEST_SPOOL_BATCHES_PER_TASK` пачек, задача перезапускается.
+    Если пачку не удалось отправить, то она возвращается в очередь, а задача повторяется позже.
+    """
+    def get_lock_key(email: str) -> str:
+        return send_weekly_digest_to_subscriber.get_lock_key(((None, email), ), {})
+
+    def acquire_lock(email: str) -> bool:
+        return send_weekly_digest_to_subscriber.acquire_lock(get_lock_key(email))
+
+    def release_locks(emails: list[str]) -> None:
+        send_weekly_digest_to_subscriber.release_locks([get_lock_key(email) for email in emails])
+
+    for _ in range(settings.DIGEST_SPOOL_BATCHES_PER_TASK):
+        batch_size = await task_service.send_prerendered_digest_batch(
+            run_id, acquire_lock=acquire_lock, release_locks=release_locks)
+        if not batch_size:
+            self.log.debug("Prerendered `digest` emails have been sent.")
+            return
+    send_prerendered_weekly_digest.apply_async(args=(run_id, ))
+
+
+@shared_task(
+    name=f"{PERIODIC_TASK_PREFIX}periodic_tasks.tasks.send_emails_with_template",
+    queue=CeleryQueue.COMMON.value,
+    bind=True,
+    ignore_result=True,
+    time_limit=2 * 60 * 60,
+    soft_time_limit=60 * 60,
+    expires=datetime.datetime.now(TZ_MOSCOW) + datetime.timedelta(days=1),
+    lock_ttl=3 * 60 * 60,
+)
+@chunkify_task(
+    initial_chunks=get_users_initial_chunks,
+    chunker=chunker,
+    lanes=settings.CHUNK_PARALLEL_LANES,
+    checkpoint_ttl=settings.CHUNK_CHECKPOINT_TTL,
+    pacer=common_queue_pacer,
 )
 @sync_task
 @inject
@@ -128,16 +301,22 @@ async def send_emails_with_template(
     self: Task,
     chunk: DateChunk,
     template_slug: str, email_subject: str, *args,
+    segment: dict | None = None,
     task_service: TaskService = Provide[Container.task_service],
     **kwargs,
-) -> None:
-    """Фоновая задача по рассылке одинаковых писем всем пользователям."""
+) -> int:
+    """Фоновая задача по рассылке одинаковых писем всем пользователям или пользователям сегмента `segment`."""
     start, end = chunk.range
     dates_boundary = BoundaryRegistrationDate(first_registration_date=start, last_registration_date=end)
-    await task_service.spawn_email_with_templates_tasks_by_boundary(
-        dates_boundary, template_slug=template_slug, email_subject=email_subject)
+    users_count = await task_service.spawn_email_with_templates_tasks_by_boundary(
+        dates_boundary, template_slug=template_slug, email_subject=email_subject,
+        segment=AudienceSegment.parse_obj(segment) if segment is not None else None,
+        run_id=chunk.run_id,
+    )
     self.log.debug("Spawned new `template` tasks.")
+    return users_count
 
 
 send_weekly_digest_to_subscribers: Task
 send_weekly_digest_to_subscriber: Task
+send_prerendered_weekly_digest: Task
@@ -1,10 +1,16 @@
+from __future__ import annotations
+
+import datetime
+import time
 import uuid
-from typing import TypedDict
+from typing import Any, NamedTuple
 
 from cron_validator import CronValidator
 from pydantic import BaseModel, Field, root_validator
 
 from notifications.core.config import get_settings
+from notifications.domain.audience.types import AudienceSegment
+from notifications.integrations.auth.types import UserDetail
 
 settings = get_settings()
 
@@ -53,6 +59,7 @@ class CeleryPeriodicTask(BaseModel):
     crontab: TaskCrontabSchedule
     kwargs: dict | None = Field(default_factory=dict)
     one_off: bool | None = False
+    segment: AudienceSegment | None = None
 
     @root_validator
     def check_required_kwargs(cls, values):
@@ -64,12 +71,55 @@ class CeleryPeriodicTask(BaseModel):
         return values
 
 
-class UserPayload(TypedDict):
-    """Сериализованные данные пользователя."""
+class DigestRecipient(NamedTuple):
+    """Данные подписчика, которые используются в дайджесте.
+
+    Передаются в фоновую задачу позиционной записью и восстанавливаются без валидации.
+    """
 
     pk: uuid.UUID
     email: str
     first_name: str
     last_name: str
-    role: str
-    registration_date: str
+
+    @classmethod
+    def from_user(cls, user: UserDetail, /) -> DigestRecipient:
+        """Получение записи из данных пользователя."""
+        return cls(user.pk, user.email, user.first_name, user.last_name)
+
+
+class RunProgress(BaseModel):
+    """Прогресс запуска периодической задачи.
+
+    Скорость `rate` - количество просмотренных пользователей в секунду, `eta` - оценка оставшегося времени
+    в секундах, `idle` - время с последнего обновления счетчиков в секундах.
+    """
+
+    run_id: str
+    task: str | None = None
+    started_at: datetime.datetime
+    updated_at: datetime.datetime
+    total_users: int | None = None
+    scanned: int = 0
+    suppressed: int = 0
+    spawned: int = 0
+    deduplicated: int = 0
+    sent: int = 0
+    failed: int = 0
+    rate: float = 0
+    eta: float | None = None
+    idle: float = 0
+
+    @classmethod
+    def from_counters(cls, run_id: str, counters: dict[str, Any], /) -> RunProgress:
+        """Получение прогресса из сохраненных счетчиков с расчетом скорости и оставшегося времени."""
+        started_at, updated_at = float(counters["started_at"]), float(counters["updated_at"])
+        scanned = int(counters.get("scanned", 0))
+        rate = scanned / max(updated_at - started_at, 1e-3)
+        eta = None
+        if (total_users := counters.get("total_users")) is not None and rate > 0:
+            eta = max(int(total_users) - scanned, 0) / rate
+        return cls.parse_obj({
+            **counters,
+            "run_id": run_id, "rate": rate, "eta": eta, "idle": max(time.time() - updated_at, 0),
+        })
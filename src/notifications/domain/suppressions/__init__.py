@@ -0,0 +1,7 @@
+from .repositories import SuppressionRepository
+from .services import SuppressionService
+
+__all__ = [
+    "SuppressionRepository",
+    "SuppressionService",
+]
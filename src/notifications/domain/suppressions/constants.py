@@ -0,0 +1,13 @@
+from typing import Final
+
+# Ключ счетчика версий списка подавления.
+SUPPRESSIONS_VERSION_KEY: Final[str] = "suppressions:version"
+
+# Ключ множества хэшей адресов в списке подавления, отсортированного по версии изменения.
+SUPPRESSED_ADDRESSES_KEY: Final[str] = "suppressions:addresses"
+
+# Ключ множества хэшей адресов, удаленных из списка подавления, отсортированного по версии изменения.
+REMOVED_ADDRESSES_KEY: Final[str] = "suppressions:removed"
+
+# Ключ хэш-таблицы с причинами подавления адресов.
+SUPPRESSION_REASONS_KEY: Final[str] = "suppressions:reasons"
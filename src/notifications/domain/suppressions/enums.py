@@ -0,0 +1,9 @@
+import enum
+
+
+class SuppressionReason(str, enum.Enum):
+    """Причина подавления отправки писем на адрес."""
+
+    BOUNCED = "bounced"
+    COMPLAINED = "complained"
+    UNSUBSCRIBED = "unsubscribed"
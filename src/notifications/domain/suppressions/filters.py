@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Iterable
+
+import numpy as np
+
+HASH_DTYPE = np.dtype("<u8")
+
+
+def hash_address(address: str, /) -> int:
+    """Получение 64-битного хэша адреса почты без учета регистра и пробелов по краям."""
+    digest = hashlib.blake2b(address.strip().lower().encode(), digest_size=HASH_DTYPE.itemsize).digest()
+    return int.from_bytes(digest, "little")
+
+
+def hash_addresses(addresses: Iterable[str], /) -> np.ndarray:
+    """Получение массива хэшей адресов почты."""
+    return np.fromiter(map(hash_address, addresses), dtype=HASH_DTYPE)
+
+
+class SuppressionFilter:
+    """Локальная реплика списка подавления: отсортированный массив 64-битных хэшей адресов.
+
+    Проверка адреса - двоичный поиск по массиву. Вероятность ложного срабатывания для списка из N адресов
+    около N / 2^64, поэтому точная проверка по Redis не выполняется.
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._hashes = np.empty(0, dtype=HASH_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def apply(self, version: int, *, added: np.ndarray, removed: np.ndarray) -> None:
+        """Применение изменений списка подавления до версии `version`."""
+        hashes = self._hashes
+        if len(removed):
+            hashes = hashes[~np.isin(hashes, removed)]
+        if len(added):
+            hashes = np.union1d(hashes, added.astype(HASH_DTYPE))
+        self._hashes = hashes
+        self.version = version
+
+    def contains(self, address: str, /) -> bool:
+        """Проверка, что адрес находится в списке подавления."""
+        address_hash = HASH_DTYPE.type(hash_address(address))
+        index = np.searchsorted(self._hashes, address_hash)
+        return index < len(self._hashes) and self._hashes[index] == address_hash
+
+    def contains_many(self, addresses: Iterable[str], /) -> np.ndarray:
+        """Проверка нескольких адресов, возвращает булев массив."""
+        address_hashes = hash_addresses(addresses)
+        if not len(self._hashes):
+            return np.zeros(len(address_hashes), dtype=bool)
+        indexes = np.minimum(np.searchsorted(self._hashes, address_hashes), len(self._hashes) - 1)
+        return self._hashes[indexes] == address_hashes
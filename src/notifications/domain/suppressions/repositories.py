@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+
+from notifications.infrastructure.db.redis import RedisClient
+
+from .constants import (
+    REMOVED_ADDRESSES_KEY, SUPPRESSED_ADDRESSES_KEY, SUPPRESSION_REASONS_KEY, SUPPRESSIONS_VERSION_KEY,
+)
+from .enums import SuppressionReason
+from .filters import HASH_DTYPE, hash_addresses
+from .types import SuppressionChanges
+
+# Добавление хэшей адресов ARGV[2:] с причиной ARGV[1] в список подавления с новой версией.
+ADD_SCRIPT = """
+local version = redis.call("INCR", KEYS[1])
+for i = 2, #ARGV do
+    redis.call("ZADD", KEYS[2], version, ARGV[i])
+    redis.call("ZREM", KEYS[3], ARGV[i])
+    redis.call("HSET", KEYS[4], ARGV[i], ARGV[1])
+end
+return version
+"""
+
+# Удаление хэшей адресов ARGV из списка подавления с новой версией.
+REMOVE_SCRIPT = """
+local version = redis.call("INCR", KEYS[1])
+for i = 1, #ARGV do
+    if redis.call("ZREM", KEYS[2], ARGV[i]) == 1 then
+        redis.call("ZADD", KEYS[3], version, ARGV[i])
+    end
+    redis.call("HDEL", KEYS[4], ARGV[i])
+end
+return version
+"""
+
+# Получение текущей версии и хэшей адресов, добавленных и удаленных после версии ARGV[1].
+CHANGES_SCRIPT = """
+local since = tonumber(ARGV[1])
+local version = tonumber(redis.call("GET", KEYS[1]) or "0")
+if version <= since then
+    return {version, {}, {}}
+end
+local added = redis.call("ZRANGEBYSCORE", KEYS[2], "(" .. since, "+inf")
+local removed = {}
+if since > 0 then
+    removed = redis.call("ZRANGEBYSCORE", KEYS[3], "(" .. since, "+inf")
+end
+return {version, added, removed}
+"""
+
+KEYS = [SUPPRESSIONS_VERSION_KEY, SUPPRESSED_ADDRESSES_KEY, REMOVED_ADDRESSES_KEY, SUPPRESSION_REASONS_KEY]
+
+
+class SuppressionRepository:
+    """Репозиторий списка подавления в Redis.
+
+    Адреса хранятся 64-битными хэшами в сортированных множествах с версией последнего изменения в качестве веса:
+    это позволяет репликам запрашивать только изменения после известной им версии.
+    Изменения выполняются Lua скриптами, поэтому версии возрастают в порядке применения изменений.
+    """
+
+    def __init__(self, redis_client: RedisClient) -> None:
+        assert isinstance(redis_client, RedisClient)
+        self._redis_client = redis_client
+
+    async def add_many(self, addresses: Iterable[str], /, *, reason: SuppressionReason) -> int:
+        """Добавление адресов в список подавления, возвращает новую версию списка."""
+        members = self._to_members(addresses)
+        return await self._redis_client.run_script(ADD_SCRIPT, keys=KEYS, args=[reason.value, *members])
+
+    async def remove_many(self, addresses: Iterable[str], /) -> int:
+        """Удаление адресов из списка подавления, возвращает новую версию списка."""
+        members = self._to_members(addresses)
+        return await self._redis_client.run_script(REMOVE_SCRIPT, keys=KEYS, args=members)
+
+    async def get_changes(self, since: int, /) -> SuppressionChanges:
+        """Получение изменений списка подавления после версии `since`."""
+        version, added, removed = await self._redis_client.run_script(CHANGES_SCRIPT, keys=KEYS, args=[since])
+        return SuppressionChanges(version=version, added=self._from_members(added), removed=self._from_members(removed))
+
+    @staticmethod
+    def _to_members(addresses: Iterable[str], /) -> list[bytes]:
+        return [address_hash.tobytes() for address_hash in hash_addresses(addresses)]
+
+    @staticmethod
+    def _from_members(members: list[bytes], /) -> np.ndarray:
+        return np.frombuffer(b"".join(members), dtype=HASH_DTYPE)
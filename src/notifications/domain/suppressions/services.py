@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Sequence
+
+from notifications.types import seconds
+
+from .enums import SuppressionReason
+from .filters import SuppressionFilter
+from .repositories import SuppressionRepository
+
+
+class SuppressionService:
+    """Сервис для работы со списком подавления: адресами, на которые не отправляются письма.
+
+    Источник истины - Redis, каждый процесс хранит локальную реплику списка и подтягивает из Redis только
+    изменения не чаще, чем раз в `refresh_interval` секунд.
+    """
+
+    def __init__(self, suppression_repository: SuppressionRepository, *, refresh_interval: seconds) -> None:
+        assert isinstance(suppression_repository, SuppressionRepository)
+        self._suppression_repository = suppression_repository
+
+        self._refresh_interval = refresh_interval
+        self._filter = SuppressionFilter()
+        self._refreshed_at: float | None = None
+        self._refresh_lock = asyncio.Lock()
+
+    async def suppress(self, addresses: Sequence[str], /, *, reason: SuppressionReason) -> None:
+        """Добавление адресов в список подавления."""
+        if addresses:
+            await self._suppression_repository.add_many(addresses, reason=reason)
+            await self.refresh(force=True)
+
+    async def unsuppress(self, addresses: Sequence[str], /) -> None:
+        """Удаление адресов из списка подавления."""
+        if addresses:
+            await self._suppression_repository.remove_many(addresses)
+            await self.refresh(force=True)
+
+    async def is_suppressed(self, address: str, /) -> bool:
+        """Проверка, что отправка писем на адрес подавлена."""
+        await self.refresh()
+        return self._filter.contains(address)
+
+    async def filter_allowed(self, addresses: Sequence[str], /) -> list[str]:
+        """Получение адресов, отправка писем на которые не подавлена."""
+        await self.refresh()
+        if not len(self._filter):
+            return list(addresses)
+        suppressed = self._filter.contains_many(addresses).tolist()
+        return [address for address, is_suppressed in zip(addresses, suppressed) if not is_suppressed]
+
+    async def refresh(self, *, force: bool = False) -> None:
+        """Обновление локальной реплики списка подавления изменениями из Redis."""
+        if not force and self._refreshed_at is not None and (
+            time.monotonic() - self._refreshed_at < self._refresh_interval
+        ):
+            return
+        async with self._refresh_lock:
+            changes = await self._suppression_repository.get_changes(self._filter.version)
+            if changes.version < self._filter.version:
+                # список подавления в Redis был пересоздан, реплика загружается заново
+                self._filter = SuppressionFilter()
+                changes = await self._suppression_repository.get_changes(0)
+            self._filter.apply(changes.version, added=changes.added, removed=changes.removed)
+            self._refreshed_at = time.monotonic()
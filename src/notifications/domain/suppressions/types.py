@@ -0,0 +1,11 @@
+from typing import NamedTuple
+
+import numpy as np
+
+
+class SuppressionChanges(NamedTuple):
+    """Изменения списка подавления после заданной версии."""
+
+    version: int
+    added: np.ndarray
+    removed: np.ndarray
@@ -0,0 +1,13 @@
+from typing import Final
+
+# Префикс ключей в кэше, под которыми хранятся отрендеренные шаблоны.
+RENDERED_CONTENT_CACHE_PREFIX: Final[str] = "templates:rendered"
+
+# Длина хеша содержимого отрендеренного шаблона.
+RENDERED_CONTENT_HASH_LENGTH: Final[int] = 32
+
+# Переменная с пространством имен шаблона для кэширования фрагментов.
+FRAGMENT_CACHE_NAMESPACE_VARIABLE: Final[str] = "_fragment_cache_namespace"
+
+# Количество скомпилированных шаблонов, которые хранятся в памяти процесса.
+COMPILED_TEMPLATES_CACHE_SIZE: Final[int] = 128
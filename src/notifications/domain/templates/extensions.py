@@ -0,0 +1,71 @@
+import inspect
+import time
+from typing import Any, Awaitable, Callable
+
+from jinja2 import Environment, nodes
+from jinja2.ext import Extension
+from jinja2.parser import Parser
+from jinja2.runtime import Context
+from jinja2.utils import LRUCache
+
+from .constants import FRAGMENT_CACHE_NAMESPACE_VARIABLE
+
+
+class FragmentCacheExtension(Extension):
+    """Кэширование фрагментов шаблона.
+
+    Результат рендеринга блока сохраняется по названию фрагмента и переданным ключам:
+
+        {% cache "recommendation", recommendation.pk %}
+            ...
+        {% endcache %}
+
+    Кэш общий для всех рендерингов внутри процесса. Ключи фрагментов дополнительно привязываются к пространству
+    имен шаблона из переменной `FRAGMENT_CACHE_NAMESPACE_VARIABLE`: при изменении шаблона старые фрагменты
+    не используются. Если пространство имен не задано, то фрагмент не кэшируется.
+
+    Размер кэша задается атрибутом окружения `fragment_cache_size`, время жизни фрагмента в секундах -
+    атрибутом `fragment_cache_ttl`: по его истечении фрагмент рендерится заново, даже если ключи не изменились.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment: Environment) -> None:
+        super().__init__(environment)
+        environment.extend(fragment_cache_size=1000, fragment_cache_ttl=None, fragment_cache=None)
+
+    def parse(self, parser: Parser) -> nodes.Node:
+        lineno = next(parser.stream).lineno
+        args = [nodes.ContextReference(), parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_cache_support", args), [], [], body).set_lineno(lineno)
+
+    async def _cache_support(self, context: Context, name: str, *keys: Any, caller: Callable[[], Any]) -> str:
+        namespace = context.get(FRAGMENT_CACHE_NAMESPACE_VARIABLE)
+        if namespace is None:
+            return await self._render_fragment(caller)
+        fragment_cache = self._get_fragment_cache()
+        fragment_key = (namespace, name, *map(str, keys))
+        if (cached := fragment_cache.get(fragment_key)) is not None:
+            expires_at, fragment = cached
+            if expires_at is None or expires_at > time.monotonic():
+                return fragment
+        fragment = await self._render_fragment(caller)
+        ttl = self.environment.fragment_cache_ttl
+        fragment_cache[fragment_key] = None if ttl is None else time.monotonic() + ttl, fragment
+        return fragment
+
+    def _get_fragment_cache(self) -> LRUCache:
+        """Получение кэша фрагментов, кэш создается при первом рендеринге фрагмента."""
+        if self.environment.fragment_cache is None:
+            self.environment.fragment_cache = LRUCache(capacity=self.environment.fragment_cache_size)
+        return self.environment.fragment_cache
+
+    @staticmethod
+    async def _render_fragment(caller: Callable[[], str | Awaitable[str]]) -> str:
+        fragment = caller()
+        if inspect.isawaitable(fragment):
+            fragment = await fragment
+        return fragment
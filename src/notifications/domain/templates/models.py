@@ -1,3 +1,6 @@
+from typing import Collection
+
+import orjson
 from aredis_om import Field
 
 from notifications.domain.models import BaseHashModel
@@ -9,3 +12,19 @@ class Template(BaseHashModel):
     name: str
     slug: str = Field(index=True)
     content: str
+
+    # JSON-список переменных контекста, которые использует шаблон. Заполняется при сохранении шаблона.
+    # Пустая строка означает, что шаблон был сохранен до появления этого поля и еще не анализировался.
+    # Читается и записывается через `load_variables` и `dump_variables`.
+    variables: str = ""
+
+    def load_variables(self) -> set[str] | None:
+        """Получение переменных контекста шаблона. Если шаблон еще не анализировался, то возвращается None."""
+        if not self.variables:
+            return None
+        return set(orjson.loads(self.variables))
+
+    @staticmethod
+    def dump_variables(variables: Collection[str], /) -> str:
+        """Преобразование переменных контекста шаблона в значение поля `variables`."""
+        return orjson.dumps(sorted(variables)).decode()
@@ -1,3 +1,5 @@
+from typing import Collection
+
 from aredis_om import NotFoundError as RedisNotFoundError
 
 from notifications.common.exceptions import ConflictError, NotFoundError
@@ -31,7 +33,7 @@ class TemplateRepository:
         Если шаблон не найден, то будет создан новый с заданными названием и содержимым.
         """
         default_template, created = await self._redis_repository.get_or_create(
-            defaults={"content": template.content, "name": template.name},
+            defaults={"content": template.content, "name": template.name, "variables": template.variables},
             slug=template.slug,
         )
         return default_template, created
@@ -43,6 +45,13 @@ class TemplateRepository:
         except RedisNotFoundError:
             raise NotFoundError(f"There is no template with slug <{slug}>.")
 
+    async def get_existing_slugs(self, slugs: Collection[str], /) -> set[str]:
+        """Получение слагов из `slugs`, для которых существуют шаблоны, одним запросом."""
+        if not slugs:
+            return set()
+        templates = await self.model.find(self.model.slug << list(slugs)).all(batch_size=len(slugs))
+        return {template.slug for template in templates}
+
     async def get_all(self) -> list[Template]:
         """Получение списка сохраненных шаблонов уведомлений."""
         return await self._redis_repository.model.find().all()
@@ -1,12 +1,22 @@
-from typing import Any
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Collection, Mapping
 
-from jinja2 import BaseLoader, Environment, TemplateSyntaxError
+from jinja2 import BaseLoader, Environment, TemplateSyntaxError, meta
+from jinja2.environment import Template as JinjaTemplate
 
 from notifications.api.v1.schemas import TemplateUpdate
 from notifications.helpers import SLUG_REGEX
+from notifications.infrastructure.db.cache import BaseCache, CacheKeyBuilder
 from notifications.infrastructure.emails.constants import TEMPLATES_DIR
+from notifications.types import seconds
 
+from .constants import (
+    COMPILED_TEMPLATES_CACHE_SIZE, FRAGMENT_CACHE_NAMESPACE_VARIABLE, RENDERED_CONTENT_CACHE_PREFIX,
+    RENDERED_CONTENT_HASH_LENGTH,
+)
 from .exceptions import InvalidSlugError, InvalidTemplateContentError
+from .extensions import FragmentCacheExtension
 from .models import Template
 from .repositiories import TemplateRepository
 
@@ -14,14 +24,32 @@ from .repositiories import TemplateRepository
 class TemplateService:
     """Сервис для работы с шаблонами уведомлений."""
 
-    def __init__(self, template_repository: TemplateRepository) -> None:
+    def __init__(
+        self,
+        template_repository: TemplateRepository,
+        cache_client: BaseCache,
+        rendered_content_ttl: seconds,
+        fragment_cache_size: int,
+        fragment_cache_ttl: seconds,
+    ) -> None:
         assert isinstance(template_repository, TemplateRepository)
         self._template_repository = template_repository
 
+        assert isinstance(cache_client, BaseCache)
+        self._cache_client = cache_client
+
+        self._rendered_content_ttl = rendered_content_ttl
+
+        self._environment = self._create_environment()
+        self._environment.fragment_cache_size = fragment_cache_size
+        self._environment.fragment_cache_ttl = fragment_cache_ttl
+        self._get_compiled_template = functools.lru_cache(maxsize=COMPILED_TEMPLATES_CACHE_SIZE)(self._compile)
+
     async def create_new(self, template: Template) -> Template:
         """Создание нового шаблона уведомления."""
         self._validate_slug(template.slug)
         await self.validate_content(template.content)
+        template.variables = Template.dump_variables(self.find_template_variables(template.content))
         return await self._template_repository.create(template)
 
     async def create_default_template(self, name: str, slug: str, filename: str) -> Template:
@@ -30,7 +58,9 @@ class TemplateService:
         Если шаблон уже существует, то новый создан не будет.
         """
         self._validate_slug(slug)
-        template = Template(name=name, slug=slug, content=self.extract_content_from_file(filename))
+        content = self.extract_content_from_file(filename)
+        variables = Template.dump_variables(self.find_template_variables(content))
+        template = Template(name=name, slug=slug, content=content, variables=variables)
         default_template, _ = await self._template_repository.get_or_create(template)
         return default_template
 
@@ -43,12 +73,20 @@ class TemplateService:
         self._validate_slug(slug)
         return await self._template_repository.get_by_slug(slug)
 
+    async def get_missing_slugs(self, slugs: Collection[str], /) -> set[str]:
+        """Получение слагов из `slugs`, для которых нет шаблонов."""
+        slugs = set(slugs)
+        for slug in slugs:
+            self._validate_slug(slug)
+        return slugs - await self._template_repository.get_existing_slugs(slugs)
+
     async def update_by_slug(self, slug: str, *, updated_template: TemplateUpdate) -> Template:
         """Обновление шаблона по его слагу."""
         self._validate_slug(slug)
+        fields_to_update = updated_template.dict(exclude_none=True)
         if updated_content := updated_template.content:
             await self.validate_content(updated_content)
-        fields_to_update = updated_template.dict(exclude_none=True)
+            fields_to_update["variables"] = Template.dump_variables(self.find_template_variables(updated_content))
         return await self._template_repository.update_fields_by_slug(slug, update_fields=fields_to_update)
 
     async def delete_by_slug(self, slug: str, /) -> None:
@@ -56,31 +94,101 @@ class TemplateService:
         self._validate_slug(slug)
         await self._template_repository.delete_by_slug(slug)
 
+    async def render_to_cache(self, template: Template, /) -> str:
+        """Рендеринг шаблона без контекста и сохранение результата в кэш.
+
+        Ключ в кэше вычисляется по содержимому отрендеренного шаблона, поэтому повторный рендеринг того же шаблона
+        не создает новых записей.
+
+        Returns:
+            Хеш отрендеренного шаблона, по которому его можно получить из кэша.
+        """
+        content = await self.render_template_from_string(template.content, context={})
+        content_hash = CacheKeyBuilder.make_hash(content, length=RENDERED_CONTENT_HASH_LENGTH)
+        await self._cache_client.set(
+            self._get_rendered_content_key(content_hash), content, ttl=self._rendered_content_ttl)
+        return content_hash
+
+    async def get_rendered_content(self, content_hash: str, /) -> str | None:
+        """Получение отрендеренного шаблона из кэша по хешу содержимого."""
+        content = await self._cache_client.get(self._get_rendered_content_key(content_hash))
+        if isinstance(content, bytes):
+            return content.decode()
+        return content
+
+    async def build_context(
+        self, template: Template, /, *, providers: Mapping[str, Callable[[], Any | Awaitable[Any]]],
+    ) -> dict[str, Any]:
+        """Построение контекста для рендеринга шаблона.
+
+        Провайдеры вызываются только для тех переменных, которые используются в шаблоне.
+        Провайдер может возвращать как значение, так и awaitable объект.
+        """
+        variables = self.get_template_variables(template)
+        context = {}
+        for name, provider in providers.items():
+            if name not in variables:
+                continue
+            value = provider()
+            if inspect.isawaitable(value):
+                value = await value
+            context[name] = value
+        return context
+
+    def is_static(self, template: Template, /) -> bool:
+        """Проверка, что для рендеринга шаблона не нужен контекст."""
+        return not self.get_template_variables(template)
+
+    def get_template_variables(self, template: Template, /) -> set[str]:
+        """Получение названий переменных, которые шаблон ожидает в контексте.
+
+        Используется список переменных, сохраненный вместе с шаблоном.
+        Если шаблон еще не анализировался, то переменные извлекаются из его содержимого.
+        """
+        variables = template.load_variables()
+        if variables is not None:
+            return variables
+        return self.find_template_variables(template.content)
+
+    def find_template_variables(self, content: str, /) -> set[str]:
+        """Статический анализ шаблона: поиск переменных, которые не объявлены в самом шаблоне."""
+        return meta.find_undeclared_variables(self._environment.parse(content))
+
     @staticmethod
     def extract_content_from_file(filename: str, /) -> str:
         """Получение содержимого из файла."""
         with open(TEMPLATES_DIR / filename, "r") as file:
             return file.read()
 
-    @staticmethod
-    async def render_template_from_string(content: str, *, context: dict[str, Any]) -> str:
-        """Рендеринг шаблона/строки с помощью переданного контекста."""
-        rendered_template = (
-            await Environment(loader=BaseLoader(), enable_async=True).from_string(content).render_async(**context)
-        )
-        return rendered_template
+    async def render_template_from_string(self, content: str, *, context: dict[str, Any]) -> str:
+        """Рендеринг шаблона/строки с помощью переданного контекста.
 
-    @staticmethod
-    async def validate_content(content: str, /) -> None:
+        Скомпилированные шаблоны и фрагменты из тегов `{% cache %}` переиспользуются между вызовами.
+        """
+        return await self._get_compiled_template(content).render_async(**context)
+
+    async def validate_content(self, content: str, /) -> None:
         """Валидация содержимого шаблона.
 
         Проверка на совместимость с Jinja2.
         """
         try:
-            await Environment(loader=BaseLoader(), enable_async=True).from_string(content).render_async()
+            await self._environment.from_string(content).render_async()
         except TemplateSyntaxError:
             raise InvalidTemplateContentError()
 
+    def _compile(self, content: str, /) -> JinjaTemplate:
+        namespace = CacheKeyBuilder.make_hash(content, length=RENDERED_CONTENT_HASH_LENGTH)
+        return self._environment.from_string(content, globals={FRAGMENT_CACHE_NAMESPACE_VARIABLE: namespace})
+
+    @staticmethod
+    def _create_environment() -> Environment:
+        return Environment(loader=BaseLoader(), enable_async=True, extensions=[FragmentCacheExtension])
+
+    @staticmethod
+    def _get_rendered_content_key(content_hash: str, /) -> str:
+        return CacheKeyBuilder.make_key_with_affixes(content_hash, prefix=RENDERED_CONTENT_CACHE_PREFIX)
+
     @staticmethod
     def _validate_slug(slug: str, /) -> None:
         if not SLUG_REGEX.match(slug):
@@ -1,7 +1,8 @@
 import asyncio
 import functools
+import itertools
 import re
-from typing import Any, Awaitable, Callable, Coroutine, Iterator
+from typing import Any, AsyncIterator, Awaitable, Callable, Coroutine, Iterable, Iterator, TypeVar
 from zoneinfo import ZoneInfo
 
 SLUG_REGEX = re.compile(r"^[-\w]+$")
@@ -10,6 +11,8 @@ TZ_MOSCOW = ZoneInfo("Europe/Moscow")
 
 sentinel: Any = object()
 
+_T = TypeVar("_T")
+
 
 def delay_tasks(*tasks: Coroutine) -> None:
     """Вспомогательная функция для запуска задач в фоне.
@@ -30,6 +33,25 @@ def resolve_callables(mapping: dict) -> Iterator[tuple[Any, Any]]:
         yield key, value() if callable(value) else value
 
 
+def batched(iterable: Iterable[_T], size: int) -> Iterator[list[_T]]:
+    """Разбиение итерируемого объекта на списки длиной не более `size` элементов."""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+async def abatched(iterable: AsyncIterator[_T], size: int) -> AsyncIterator[list[_T]]:
+    """Разбиение асинхронного итератора на списки длиной не более `size` элементов."""
+    batch = []
+    async for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 def sync_task(func: Callable[..., Awaitable]) -> Callable:
     """Декоратор для запуска celery задач в текущем event loop'е."""
 
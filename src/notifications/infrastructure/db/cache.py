@@ -2,7 +2,7 @@ import base64
 import datetime
 import hashlib
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Mapping, Sequence
 
 from notifications.types import seconds
 
@@ -68,6 +68,18 @@ class BaseCache(ABC):
             Были ли сохранены данные.
         """
 
+    async def get_many(self, keys: Sequence[str], /) -> list[Any]:
+        """Получение данных из кэша по нескольким ключам.
+
+        Для отсутствующих в кэше ключей возвращается None.
+        """
+        return [await self.get(key) for key in keys]
+
+    async def set_many(self, mapping: Mapping[str, Any], *, ttl: seconds | datetime.timedelta | None = None) -> None:
+        """Сохранение нескольких записей с одинаковым ttl."""
+        for key, data in mapping.items():
+            await self.set(key, data, ttl=ttl)
+
     def get_ttl(self, ttl: seconds | datetime.timedelta | None = None) -> seconds | datetime.timedelta | None:
         """Получение `ttl` (таймаута) для записи в кэше."""
         if isinstance(ttl, datetime.timedelta):
@@ -98,6 +110,23 @@ class BaseSyncCache(ABC):
             Были ли сохранены данные.
         """
 
+    def set_many(
+        self,
+        mapping: Mapping[str, Any], *,
+        ttl: seconds | datetime.timedelta | None = None,
+        create_missing: bool = True,
+    ) -> list[bool]:
+        """Сохранение нескольких записей с одинаковым ttl.
+
+        Returns:
+            Были ли сохранены данные для каждого ключа из `mapping`.
+        """
+        return [self.set(key, data, ttl=ttl, create_missing=create_missing) for key, data in mapping.items()]
+
+    @abstractmethod
+    def delete_many(self, keys: Sequence[str], /) -> None:
+        """Удаление записей с заданными ключами."""
+
     def get_ttl(self, ttl: seconds | datetime.timedelta | None = None) -> seconds | datetime.timedelta | None:
         """Получение `ttl` (таймаута) для записи в кэше."""
         if isinstance(ttl, datetime.timedelta):
@@ -120,6 +149,12 @@ class RedisCache(BaseCache):
     ) -> bool:
         return await self._redis_client.set(key, data, timeout=self.get_ttl(ttl), create_missing=create_missing)
 
+    async def get_many(self, keys: Sequence[str], /) -> list[Any]:
+        return await self._redis_client.mget(keys)
+
+    async def set_many(self, mapping: Mapping[str, Any], *, ttl: seconds | datetime.timedelta | None = None) -> None:
+        await self._redis_client.set_many(mapping, timeout=self.get_ttl(ttl))
+
 
 class SyncRedisCache(BaseSyncCache):
     """Синхронный кэш с использованием Redis."""
@@ -135,3 +170,15 @@ class SyncRedisCache(BaseSyncCache):
         self, key: str, data: Any, *, ttl: seconds | datetime.timedelta | None = None, create_missing: bool = True,
     ) -> bool:
         return self._redis_client.set(key, data, timeout=self.get_ttl(ttl), create_missing=create_missing)
+
+    def set_many(
+        self,
+        mapping: Mapping[str, Any], *,
+        ttl: seconds | datetime.timedelta | None = None,
+        create_missing: bool = True,
+    ) -> list[bool]:
+        return self._redis_client.set_many(mapping, timeout=self.get_ttl(ttl), create_missing=create_missing)
+
+    def delete_many(self, keys: Sequence[str], /) -> None:
+        if keys:
+            self._redis_client.delete(*keys)
@@ -1,31 +1,80 @@
 import logging
+import time
 from contextlib import AbstractAsyncContextManager, asynccontextmanager
 from typing import Callable
 
-from sqlalchemy import orm
+from pydantic import BaseModel
+from sqlalchemy import exc, orm
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
+from notifications.types import seconds
+
+
+class DatabasePoolStats(BaseModel):
+    """Состояние и метрики пула соединений с БД.
+
+    Ожидание `waits` - получение соединения, когда все соединения пула и переполнения были заняты.
+    Время указано в секундах.
+    """
+
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    waits: int
+    timeouts: int
+    checkout_time_avg: float
+    checkout_time_max: float
+    wait_time_total: float
+
 
 class AsyncDatabase:
-    """Абстракция над БД и SQLAlchemy."""
-
-    def __init__(self, db_url: str) -> None:
-        self._engine = create_async_engine(db_url)
-        self._session_factory = orm.scoped_session(
-            orm.sessionmaker(
-                bind=self._engine,
-                class_=AsyncSession,
-                autocommit=False,
-                autoflush=False,
-                expire_on_commit=False,
-            ),
+    """Абстракция над БД и SQLAlchemy.
+
+    Каждый контекст `session` получает свою сессию, поэтому конкурентные корутины не делят одну сессию
+    и одно соединение. Соединение получается из пула при входе в контекст, время его получения учитывается
+    в метриках пула.
+    """
+
+    def __init__(
+        self,
+        db_url: str, *,
+        pool_size: int,
+        max_overflow: int,
+        pool_timeout: seconds,
+        pool_pre_ping: bool,
+        pool_recycle: seconds,
+    ) -> None:
+        self._engine = create_async_engine(
+            db_url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_pre_ping=pool_pre_ping,
+            pool_recycle=pool_recycle,
         )
+        self._session_factory = orm.sessionmaker(
+            bind=self._engine,
+            class_=AsyncSession,
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        self._max_overflow = max_overflow
+        self._checkouts_count = 0
+        self._waits_count = 0
+        self._timeouts_count = 0
+        self._checkout_time = 0.0
+        self._checkout_time_max = 0.0
+        self._wait_time = 0.0
 
     @asynccontextmanager
     async def session(self) -> Callable[..., AbstractAsyncContextManager[AsyncSession]]:
         """Контекстный менеджер для работы с сессией БД."""
         session: AsyncSession = self._session_factory()
         try:
+            await self._checkout(session)
             yield session
         except Exception:
             logging.exception("Session rollback because of exception")
@@ -33,3 +82,38 @@ class AsyncDatabase:
             raise
         finally:
             await session.close()
+
+    def get_pool_stats(self) -> DatabasePoolStats:
+        """Получение состояния и метрик пула соединений."""
+        pool = self._engine.pool
+        stats = DatabasePoolStats(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            checkouts=self._checkouts_count,
+            waits=self._waits_count,
+            timeouts=self._timeouts_count,
+            checkout_time_avg=self._checkout_time / self._checkouts_count if self._checkouts_count else 0,
+            checkout_time_max=self._checkout_time_max,
+            wait_time_total=self._wait_time,
+        )
+        return stats
+
+    async def _checkout(self, session: AsyncSession, /) -> None:
+        """Получение соединения для сессии из пула с учетом времени ожидания."""
+        pool = self._engine.pool
+        is_waiting = pool.checkedin() == 0 and pool.checkedout() >= pool.size() + self._max_overflow
+        started_at = time.perf_counter()
+        try:
+            await session.connection()
+        except exc.TimeoutError:
+            self._timeouts_count += 1
+            raise
+        checkout_time = time.perf_counter() - started_at
+        self._checkouts_count += 1
+        self._checkout_time += checkout_time
+        self._checkout_time_max = max(self._checkout_time_max, checkout_time)
+        if is_waiting:
+            self._waits_count += 1
+            self._wait_time += checkout_time
@@ -1,4 +1,4 @@
-from typing import Any, AsyncIterator, Iterator
+from typing import Any, AsyncIterator, Iterator, Mapping, Sequence
 
 import aioredis
 import redis
@@ -45,6 +45,58 @@ class RedisClient:
         }
         return await client.set(key, data, **options)
 
+    async def rpush(self, key: str, *values: Any, timeout: seconds | None = None) -> int:
+        client = self.get_client(write=True)
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, *values)
+            if timeout is not None:
+                pipe.expire(key, timeout)
+            length, *_ = await pipe.execute()
+        return length
+
+    async def lpop(self, key: str, /, *, count: int) -> list[Any]:
+        """Извлечение не более `count` элементов из начала списка.
+
+        LPOP с количеством элементов доступен только с Redis 6.2, поэтому используются LRANGE и LTRIM в транзакции.
+        """
+        client = self.get_client(write=True)
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.lrange(key, 0, count - 1)
+            pipe.ltrim(key, count, -1)
+            values, _ = await pipe.execute()
+        return values
+
+    async def lindex(self, key: str, index: int, /) -> Any:
+        client = self.get_client()
+        return await client.lindex(key, index)
+
+    async def mget(self, keys: Sequence[str], /) -> list[Any]:
+        client = self.get_client()
+        return await client.mget(keys)
+
+    async def set_many(self, mapping: Mapping[str, Any], *, timeout: seconds | None = None) -> None:
+        client = self.get_client(write=True)
+        async with client.pipeline(transaction=False) as pipe:
+            for key, data in mapping.items():
+                pipe.set(key, data, ex=timeout)
+            await pipe.execute()
+
+    async def hset(self, key: str, mapping: Mapping[str, Any], *, timeout: seconds | None = None) -> None:
+        client = self.get_client(write=True)
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=mapping)
+            if timeout is not None:
+                pipe.expire(key, timeout)
+            await pipe.execute()
+
+    async def hgetall(self, key: str, /) -> dict[bytes, Any]:
+        client = self.get_client()
+        return await client.hgetall(key)
+
+    async def run_script(self, script: str, /, *, keys: Sequence[str], args: Sequence[Any] = ()) -> Any:
+        client = self.get_client(write=True)
+        return await client.eval(script, len(keys), *keys, *args)
+
     def _get_client(self, write: bool = False) -> aioredis.Redis:
         return self._redis_client
 
@@ -72,5 +124,51 @@ class SyncRedisClient:
         }
         return client.set(key, data, **options)
 
+    def set_many(
+        self, mapping: Mapping[str, Any], *, timeout: seconds | None = None, create_missing: bool = True,
+    ) -> list[bool]:
+        client = self.get_client(write=True)
+        with client.pipeline(transaction=False) as pipe:
+            for key, data in mapping.items():
+                pipe.set(key, data, ex=timeout, nx=not create_missing)
+            return [bool(result) for result in pipe.execute()]
+
+    def delete(self, *keys: str) -> int:
+        client = self.get_client(write=True)
+        return client.delete(*keys)
+
+    def hgetall(self, key: str, /) -> dict[bytes, Any]:
+        client = self.get_client()
+        return client.hgetall(key)
+
+    def zrevrange(self, key: str, /, *, start: int, end: int) -> list[Any]:
+        client = self.get_client()
+        return client.zrevrange(key, start, end)
+
+    def publish(self, channel: str, message: Any, /) -> int:
+        client = self.get_client(write=True)
+        return client.publish(channel, message)
+
+    def subscribe(self, *channels: str) -> redis.client.PubSub:
+        """Подписка на каналы Redis.
+
+        Сообщения читаются из возвращаемого объекта `PubSub` методом `get_message`.
+        """
+        pubsub = self.get_client().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(*channels)
+        return pubsub
+
+    def run_script(self, script: str, /, *, keys: Sequence[str], args: Sequence[Any] = ()) -> Any:
+        client = self.get_client(write=True)
+        return client.eval(script, len(keys), *keys, *args)
+
+    def run_scripts(self, script: str, /, *, calls: Sequence[tuple[Sequence[str], Sequence[Any]]]) -> list[Any]:
+        """Выполнение Lua скрипта с разными ключами и аргументами одним запросом к БД."""
+        client = self.get_client(write=True)
+        with client.pipeline(transaction=False) as pipe:
+            for keys, args in calls:
+                pipe.eval(script, len(keys), *keys, *args)
+            return pipe.execute()
+
     def _get_client(self, write: bool = False) -> redis.StrictRedis:
         return self._redis_client
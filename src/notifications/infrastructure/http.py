@@ -0,0 +1,42 @@
+import random
+from typing import AsyncIterator, Final, Iterator
+
+import httpx
+
+RETRYABLE_STATUS_CODES: Final[frozenset[int]] = frozenset({429, 500, 502, 503, 504})
+
+
+def init_http_client(base_url: str, *, timeout: float, max_connections: int) -> Iterator[httpx.Client]:
+    """Инициализация синхронного HTTP клиента с пулом keep-alive соединений."""
+    client = httpx.Client(
+        base_url=base_url,
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+    )
+    yield client
+    client.close()
+
+
+async def init_async_http_client(
+    base_url: str, *, timeout: float, max_connections: int,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """Инициализация асинхронного HTTP клиента с пулом keep-alive соединений."""
+    client = httpx.AsyncClient(
+        base_url=base_url,
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+    )
+    yield client
+    await client.aclose()
+
+
+def is_retryable_error(exc: Exception, /) -> bool:
+    """Можно ли повторить запрос после ошибки `exc`."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, httpx.TransportError)
+
+
+def get_retry_delay(attempt: int, /, *, backoff: float) -> float:
+    """Получение паузы перед повторным запросом: экспоненциальная задержка с full jitter."""
+    return random.uniform(0, backoff * 2 ** (attempt - 1))
@@ -1,20 +1,60 @@
-from typing import Iterator
+from __future__ import annotations
 
+import datetime
+import time
+import uuid
+from typing import Any, Iterator
+
+import httpx
+
+from notifications.infrastructure.http import get_retry_delay, is_retryable_error
+
+from .constants import BOUNDARY_REGISTRATION_DATES_URL, NDJSON_CONTENT_TYPE, REGISTRATION_DENSITY_URL, USERS_URL
 from .enums import DefaultRoles
-from .types import BoundaryRegistrationDate, UserDetail
+from .types import BoundaryRegistrationDate, RegistrationDensity, UserDetail
 
 
 class NetflixAuthClient:
-    """Клиент для работы с АПИ сервиса NetflixAuth."""
+    """Клиент для работы с АПИ сервиса NetflixAuth.
+
+    Запросы выполняются через общий пул keep-alive соединений `http_client`.
+    Ошибки соединения и ответы 429/5xx повторяются не более `max_retries` раз с экспоненциальной задержкой.
+    """
 
     # TODO [Дипломный проект]: сделать клиенты ко всем микросервисам и выложить в (закрытый) PyPI репозиторий
     # TODO [Дипломный проект]: добавить репозитории к integrations.auth
 
+    def __init__(self, http_client: httpx.Client, *, page_size: int, max_retries: int, retry_backoff: float) -> None:
+        assert isinstance(http_client, httpx.Client)
+        self._http_client = http_client
+        self._page_size = page_size
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+
     def get_boundary_registration_dates(self, *, user_role: DefaultRoles | None = None) -> BoundaryRegistrationDate:
         """Получение граничных дат - дат регистрации первого и последнего пользователей.
 
         Используется для создания date-based чанков в периодических задачах.
         """
+        response = self._request(BOUNDARY_REGISTRATION_DATES_URL, params=self._get_role_params(user_role))
+        return BoundaryRegistrationDate.parse_raw(response.content)
+
+    def get_registration_density(
+        self, date_range: BoundaryRegistrationDate, /, *, user_role: DefaultRoles | None = None,
+    ) -> RegistrationDensity | None:
+        """Получение гистограммы количества регистраций пользователей по дням.
+
+        Используется для подбора размера чанков в периодических задачах.
+        Возвращает None, если АПИ сервиса не предоставляет гистограмму.
+        """
+        params = {**self._get_date_range_params(date_range), **self._get_role_params(user_role)}
+        try:
+            response = self._request(REGISTRATION_DENSITY_URL, params=params)
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code == httpx.codes.NOT_FOUND:
+                return None
+            raise
+        return RegistrationDensity.parse_raw(response.content)
 
     def get_users_within_registration_date_range_iter(
         self, date_range: BoundaryRegistrationDate, /,
@@ -22,8 +62,69 @@ class NetflixAuthClient:
         """Получение данных пользователей по заданному диапазону дат регистрации.
 
         Возвращает итератор по пользователям.
+        Пользователи запрашиваются страницами по `page_size` с keyset пагинацией по (дате регистрации, pk),
+        каждая страница читается построчно в формате NDJSON. При обрыве соединения чтение продолжается
+        с последнего полученного пользователя.
         """
+        cursor: tuple[datetime.date, uuid.UUID] | None = None
+        attempt = 0
+        while True:
+            page_users_count = 0
+            try:
+                for user in self._iter_users_page(date_range, cursor=cursor):
+                    cursor = user.registration_date, user.pk
+                    page_users_count += 1
+                    attempt = 0
+                    yield user
+            except httpx.HTTPError as exc:
+                attempt += 1
+                if not is_retryable_error(exc) or attempt > self._max_retries:
+                    raise
+                time.sleep(get_retry_delay(attempt, backoff=self._retry_backoff))
+                continue
+            if page_users_count < self._page_size:
+                return
 
     def get_users_within_registration_date_range(self, date_range: BoundaryRegistrationDate, /) -> list[UserDetail]:
         """Получение данных пользователей по заданному диапазону дат регистрации."""
         return list(self.get_users_within_registration_date_range_iter(date_range))
+
+    def _iter_users_page(
+        self, date_range: BoundaryRegistrationDate, /, *, cursor: tuple[datetime.date, uuid.UUID] | None,
+    ) -> Iterator[UserDetail]:
+        """Получение страницы пользователей, зарегистрированных после `cursor`."""
+        params = {**self._get_date_range_params(date_range), "page_size": self._page_size}
+        if cursor is not None:
+            after_registration_date, after_pk = cursor
+            params |= {"after_registration_date": after_registration_date.isoformat(), "after_pk": str(after_pk)}
+        headers = {"Accept": NDJSON_CONTENT_TYPE}
+        with self._http_client.stream("GET", USERS_URL, params=params, headers=headers) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield UserDetail.parse_raw(line)
+
+    def _request(self, url: str, /, *, params: dict[str, Any]) -> httpx.Response:
+        """Выполнение GET запроса с повторами."""
+        attempt = 0
+        while True:
+            try:
+                response = self._http_client.get(url, params=params)
+                response.raise_for_status()
+                return response
+            except httpx.HTTPError as exc:
+                attempt += 1
+                if not is_retryable_error(exc) or attempt > self._max_retries:
+                    raise
+                time.sleep(get_retry_delay(attempt, backoff=self._retry_backoff))
+
+    @staticmethod
+    def _get_date_range_params(date_range: BoundaryRegistrationDate, /) -> dict[str, str]:
+        return {
+            "registration_date_from": date_range.first_registration_date.isoformat(),
+            "registration_date_to": date_range.last_registration_date.isoformat(),
+        }
+
+    @staticmethod
+    def _get_role_params(user_role: DefaultRoles | None, /) -> dict[str, str]:
+        return {} if user_role is None else {"role": user_role.value}
@@ -0,0 +1,7 @@
+from typing import Final
+
+BOUNDARY_REGISTRATION_DATES_URL: Final[str] = "/api/v1/users/registration-boundaries"
+REGISTRATION_DENSITY_URL: Final[str] = "/api/v1/users/registration-density"
+USERS_URL: Final[str] = "/api/v1/users"
+
+NDJSON_CONTENT_TYPE: Final[str] = "application/x-ndjson"
@@ -6,3 +6,11 @@ class DefaultRoles(str, Enum):
 
     VIEWERS = "viewers"
     SUBSCRIBERS = "subscribers"
+
+
+class RegistrationDistribution(str, Enum):
+    """Распределение дат регистрации синтетических пользователей."""
+
+    UNIFORM = "uniform"
+    LINEAR = "linear"
+    EXPONENTIAL = "exponential"
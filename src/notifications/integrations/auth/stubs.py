@@ -1,31 +1,161 @@
+from __future__ import annotations
+
 import datetime
+import itertools
+import math
+import uuid
 from typing import Iterator
 
-from pydantic_factories import ModelFactory
+from .client import NetflixAuthClient
+from .enums import DefaultRoles, RegistrationDistribution
+from .types import BoundaryRegistrationDate, RegistrationDensity, UserDetail
 
-from notifications.helpers import TZ_MOSCOW
+MASK64 = (1 << 64) - 1
 
-from .client import NetflixAuthClient
-from .enums import DefaultRoles
-from .types import BoundaryRegistrationDate, UserDetail
+FIRST_NAMES = ("John", "Jane", "Alex", "Maria", "Ivan", "Olga", "Peter", "Anna")
+EMAIL_DOMAINS = ("gmail.com", "yandex.ru", "mail.ru", "example.com")
+LAST_NAMES = ("Doe", "Smith", "Ivanov", "Petrova", "Brown", "Sidorov", "Miller", "Kuznetsova")
+
+# Маска флагов активности синтетических пользователей.
+ACTIVITY_FLAGS_MASK = 0b111
+
+# Во сколько раз последний день регистраций больше первого в экспоненциальном распределении.
+EXPONENTIAL_GROWTH = 100
+
+
+def mix64(value: int, /) -> int:
+    """Детерминированное перемешивание 64-битного числа (splitmix64)."""
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+def get_distribution_weights(distribution: RegistrationDistribution, days: int, /) -> list[float]:
+    """Получение весов дней регистрации для распределения `distribution`."""
+    if distribution == RegistrationDistribution.LINEAR:
+        return [day + 1 for day in range(days)]
+    if distribution == RegistrationDistribution.EXPONENTIAL:
+        rate = math.log(EXPONENTIAL_GROWTH) / max(days - 1, 1)
+        return [math.exp(rate * day) for day in range(days)]
+    return [1] * days
+
+
+class SyntheticUsers:
+    """Детерминированный генератор синтетических пользователей.
 
-model_factory = ModelFactory()
+    Пользователь с номером `index` однозначно определяется `seed` и не хранится в памяти.
+    Количество пользователей по дням регистрации задается распределением `distribution`,
+    смещения первых пользователей каждого дня рассчитываются заранее - выборка по диапазону дат
+    выполняется за O(размер выборки).
+    """
 
-ALL_USERS: list[UserDetail] = model_factory.create_factory(UserDetail).batch(size=10)
+    def __init__(
+        self,
+        users_count: int, *,
+        first_registration_date: datetime.date,
+        last_registration_date: datetime.date,
+        distribution: RegistrationDistribution = RegistrationDistribution.UNIFORM,
+        subscribers_percent: int = 50,
+        seed: int = 0,
+    ) -> None:
+        assert first_registration_date < last_registration_date
+        self.users_count = users_count
+        self.first_registration_date = first_registration_date
+        self.last_registration_date = last_registration_date
+        self._subscribers_percent = subscribers_percent
+        self._seed = seed
+        days = (last_registration_date - first_registration_date).days
+        cum_weights = list(itertools.accumulate(get_distribution_weights(distribution, days)))
+        self._offsets = [0, *(round(users_count * weight / cum_weights[-1]) for weight in cum_weights)]
+
+    def get_user(self, index: int, /, registration_date: datetime.date) -> UserDetail:
+        """Получение пользователя с номером `index`, зарегистрированного в день `registration_date`."""
+        value = mix64(self._seed << 32 ^ index)
+        return UserDetail.construct(
+            pk=uuid.UUID(int=value << 64 | index, version=4),
+            email=f"user{index}@{EMAIL_DOMAINS[(value >> 8) % len(EMAIL_DOMAINS)]}",
+            first_name=FIRST_NAMES[value % len(FIRST_NAMES)],
+            last_name=LAST_NAMES[(value >> 16) % len(LAST_NAMES)],
+            role=self.get_role(index).value,
+            registration_date=registration_date,
+            activity_flags=value >> 32 & ACTIVITY_FLAGS_MASK,
+        )
+
+    def get_role(self, index: int, /) -> DefaultRoles:
+        """Получение роли пользователя с номером `index`."""
+        return DefaultRoles.SUBSCRIBERS if index % 100 < self._subscribers_percent else DefaultRoles.VIEWERS
+
+    def iter_users(self, start: datetime.date, end: datetime.date, /) -> Iterator[UserDetail]:
+        """Получение пользователей, зарегистрированных в диапазоне [`start`, `end`)."""
+        for day in range(self._get_day(start), self._get_day(end)):
+            registration_date = self.first_registration_date + datetime.timedelta(days=day)
+            for index in range(self._offsets[day], self._offsets[day + 1]):
+                yield self.get_user(index, registration_date)
+
+    def get_density(
+        self, start: datetime.date, end: datetime.date, /, *, user_role: DefaultRoles | None = None,
+    ) -> dict[datetime.date, int]:
+        """Получение количества регистраций по дням в диапазоне [`start`, `end`) без генерации пользователей."""
+        counts = {}
+        for day in range(self._get_day(start), self._get_day(end)):
+            start_index, end_index = self._offsets[day], self._offsets[day + 1]
+            count = self._count_users(end_index, user_role) - self._count_users(start_index, user_role)
+            if count:
+                counts[self.first_registration_date + datetime.timedelta(days=day)] = count
+        return counts
+
+    def _count_users(self, end: int, user_role: DefaultRoles | None, /) -> int:
+        """Количество пользователей с ролью `user_role` среди первых `end`."""
+        if user_role is None:
+            return end
+        subscribers_count = end // 100 * self._subscribers_percent + min(end % 100, self._subscribers_percent)
+        return subscribers_count if user_role == DefaultRoles.SUBSCRIBERS else end - subscribers_count
+
+    def _get_day(self, registration_date: datetime.date, /) -> int:
+        days = len(self._offsets) - 1
+        return min(max((registration_date - self.first_registration_date).days, 0), days)
 
 
 class NetflixAuthClientStub(NetflixAuthClient):
-    """Стаб клиента для работы с АПИ сервиса NetflixAuth."""
+    """Стаб клиента для работы с АПИ сервиса NetflixAuth.
+
+    Пользователи генерируются `SyntheticUsers` и не хранятся в памяти, поэтому стаб подходит для нагрузочного
+    тестирования на миллионах пользователей.
+    """
+
+    def __init__(
+        self,
+        users_count: int = 10, *,
+        first_registration_date: datetime.date = datetime.date(2015, 1, 1),
+        last_registration_date: datetime.date = datetime.date(2023, 1, 1),
+        distribution: RegistrationDistribution | str = RegistrationDistribution.UNIFORM,
+        subscribers_percent: int = 50,
+        seed: int = 0,
+    ) -> None:
+        self._users = SyntheticUsers(
+            users_count,
+            first_registration_date=first_registration_date,
+            last_registration_date=last_registration_date,
+            distribution=RegistrationDistribution(distribution),
+            subscribers_percent=subscribers_percent,
+            seed=seed,
+        )
 
     def get_boundary_registration_dates(self, *, user_role: DefaultRoles | None = None) -> BoundaryRegistrationDate:
         return BoundaryRegistrationDate(
-            first_registration_date=datetime.datetime.min.date(),
-            last_registration_date=datetime.datetime.now(TZ_MOSCOW).date(),
+            first_registration_date=self._users.first_registration_date,
+            last_registration_date=self._users.last_registration_date,
         )
 
+    def get_registration_density(
+        self, date_range: BoundaryRegistrationDate, /, *, user_role: DefaultRoles | None = None,
+    ) -> RegistrationDensity | None:
+        counts = self._users.get_density(
+            date_range.first_registration_date, date_range.last_registration_date, user_role=user_role)
+        return RegistrationDensity(counts=counts)
+
     def get_users_within_registration_date_range_iter(
         self, date_range: BoundaryRegistrationDate, /,
     ) -> Iterator[UserDetail]:
-        for user in ALL_USERS:
-            if date_range.first_registration_date <= user.registration_date < date_range.last_registration_date:
-                yield user
+        yield from self._users.iter_users(date_range.first_registration_date, date_range.last_registration_date)
@@ -20,3 +20,11 @@ class UserDetail(BaseModel):
     last_name: str
     role: str
     registration_date: datetime.date
+    timezone: str | None = None
+    activity_flags: int = 0
+
+
+class RegistrationDensity(BaseModel):
+    """Гистограмма количества регистраций пользователей по дням."""
+
+    counts: dict[datetime.date, int]
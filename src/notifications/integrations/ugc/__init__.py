@@ -1,5 +1,7 @@
 from .client import NetflixUgcClient
+from .repositories import RecommendationRepository
 
 __all__ = [
     "NetflixUgcClient",
+    "RecommendationRepository",
 ]
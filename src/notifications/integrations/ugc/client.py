@@ -1,21 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import time
 import uuid
-from typing import Iterator
+from typing import Sequence
+
+import httpx
+from pydantic import parse_raw_as
+
+from notifications.infrastructure.http import get_retry_delay, is_retryable_error
 
+from .constants import RECOMMENDATIONS_URL
 from .types import RecommendationShortDetail
 
 
 class NetflixUgcClient:
-    """Клиент для работы с АПИ сервиса Netflix UGC."""
+    """Клиент для работы с АПИ сервиса Netflix UGC.
+
+    Запросы выполняются через общий пул keep-alive соединений `http_client`, одновременно выполняется
+    не более `max_concurrency` запросов на процесс. Ответы кэшируются в памяти на `cache_ttl` секунд,
+    одновременные запросы рекомендаций для одного пользователя объединяются в один.
+    """
 
     # TODO [Дипломный проект]: сделать клиенты ко всем микросервисам и выложить в (закрытый) PyPI репозиторий
-    # TODO [Дипломный проект]: добавить репозитории к integrations.ugc
 
-    def get_recommendations_for_user_iter(self, user_pk: uuid.UUID, /) -> Iterator[RecommendationShortDetail]:
-        """Получение рекомендаций для пользователя `user_pk`.
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient, *,
+        max_concurrency: int,
+        cache_ttl: float,
+        cache_size: int,
+        max_retries: int,
+        retry_backoff: float,
+    ) -> None:
+        assert isinstance(http_client, httpx.AsyncClient)
+        self._http_client = http_client
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache_ttl = cache_ttl
+        self._cache_size = cache_size
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        self._cache: dict[uuid.UUID, tuple[float, list[RecommendationShortDetail]]] = {}
+        self._in_flight: dict[uuid.UUID, asyncio.Future[list[RecommendationShortDetail]]] = {}
+
+    async def get_recommendations_for_user(self, user_pk: uuid.UUID, /) -> list[RecommendationShortDetail]:
+        """Получение рекомендаций для пользователя `user_pk`."""
+        if (cached := self._cache.get(user_pk)) is not None:
+            expires_at, recommendations = cached
+            if expires_at > time.monotonic():
+                return recommendations
+            del self._cache[user_pk]
+        if (future := self._in_flight.get(user_pk)) is not None:
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[user_pk] = future
+        try:
+            recommendations = await self._fetch_recommendations(user_pk)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # исключение пробрасывается здесь, ожидающие запросы получат его из `future`
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[user_pk]
+        future.set_result(recommendations)
+        self._save_to_cache(user_pk, recommendations)
+        return recommendations
+
+    async def get_recommendations_for_users(
+        self, user_pks: Sequence[uuid.UUID], /,
+    ) -> dict[uuid.UUID, list[RecommendationShortDetail]]:
+        """Получение рекомендаций для нескольких пользователей.
 
-        Возвращает итератор.
+        Запросы выполняются конкурентно, количество одновременных запросов ограничено `max_concurrency` клиента.
         """
+        async def _get_recommendations(user_pk: uuid.UUID) -> tuple[uuid.UUID, list[RecommendationShortDetail]]:
+            return user_pk, await self.get_recommendations_for_user(user_pk)
 
-    def get_recommendations_for_user(self, user_pk: uuid.UUID, /) -> list[RecommendationShortDetail]:
-        """Получение рекомендаций для пользователя `user_pk`."""
-        return list(self.get_recommendations_for_user_iter(user_pk))
+        recommendations = await asyncio.gather(*map(_get_recommendations, user_pks))
+        return dict(recommendations)
+
+    async def _fetch_recommendations(self, user_pk: uuid.UUID, /) -> list[RecommendationShortDetail]:
+        """Запрос рекомендаций для пользователя `user_pk` к АПИ с повторами."""
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    response = await self._http_client.get(RECOMMENDATIONS_URL.format(user_pk=user_pk))
+                response.raise_for_status()
+                return parse_raw_as(list[RecommendationShortDetail], response.content)
+            except httpx.HTTPError as exc:
+                attempt += 1
+                if not is_retryable_error(exc) or attempt > self._max_retries:
+                    raise
+                await asyncio.sleep(get_retry_delay(attempt, backoff=self._retry_backoff))
+
+    def _save_to_cache(self, user_pk: uuid.UUID, recommendations: list[RecommendationShortDetail], /) -> None:
+        """Сохранение ответа в кэш, при переполнении удаляются самые старые записи."""
+        while len(self._cache) >= self._cache_size:
+            del self._cache[next(iter(self._cache))]
+        self._cache[user_pk] = time.monotonic() + self._cache_ttl, recommendations
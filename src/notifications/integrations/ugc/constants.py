@@ -0,0 +1,6 @@
+from typing import Final
+
+# Префикс ключей в кэше, под которыми хранится информация о рекомендованных фильмах.
+FILMS_CACHE_PREFIX: Final[str] = "ugc:films"
+
+RECOMMENDATIONS_URL: Final[str] = "/api/v1/users/{user_pk}/recommendations"
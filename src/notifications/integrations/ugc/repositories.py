@@ -0,0 +1,44 @@
+import uuid
+from typing import Any, Iterable, Sequence
+
+import orjson
+
+from notifications.infrastructure.db.cache import BaseCache, CacheKeyBuilder
+from notifications.types import seconds
+
+from .constants import FILMS_CACHE_PREFIX
+from .types import RecommendationShortDetail
+
+
+class RecommendationRepository:
+    """Общий кэш с информацией о рекомендованных фильмах.
+
+    Большинство пользователей получают одни и те же популярные фильмы, поэтому информация о фильме хранится
+    один раз по его `pk`, а в задачи передаются только идентификаторы фильмов.
+    """
+
+    def __init__(self, cache_client: BaseCache, ttl: seconds) -> None:
+        assert isinstance(cache_client, BaseCache)
+        self._cache_client = cache_client
+        self._ttl = ttl
+
+    async def save_many(self, recommendations: Iterable[RecommendationShortDetail], /) -> None:
+        """Сохранение информации о фильмах в кэш."""
+        films = {
+            self._get_film_key(recommendation.pk): orjson.dumps(recommendation.dict())
+            for recommendation in recommendations
+        }
+        if films:
+            await self._cache_client.set_many(films, ttl=self._ttl)
+
+    async def get_many(self, film_pks: Sequence[uuid.UUID | str], /) -> list[dict[str, Any] | None]:
+        """Получение сериализованной информации о фильмах по их `pk`.
+
+        Для фильмов, которых нет в кэше, возвращается None.
+        """
+        films = await self._cache_client.get_many([self._get_film_key(film_pk) for film_pk in film_pks])
+        return [None if film is None else orjson.loads(film) for film in films]
+
+    @staticmethod
+    def _get_film_key(film_pk: uuid.UUID | str, /) -> str:
+        return CacheKeyBuilder.make_key_with_affixes(str(film_pk), prefix=FILMS_CACHE_PREFIX)
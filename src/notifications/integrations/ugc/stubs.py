@@ -1,26 +1,55 @@
+import itertools
+import random
 import uuid
-from typing import Iterator
-
-from pydantic_factories import ModelFactory
 
 from .client import NetflixUgcClient
 from .types import RecommendationShortDetail
 
-model_factory = ModelFactory()
-
 PHOTO = (
     "https://occ-0-2794-2219.1.nflxso.net/dnm/api/v6/X194eJsgWBDE2aQbaNdmCXGUP-Y/"
     "AAAABbCZLCs9HAhpPgwyZ1nNNMDxaCYJKy92y48ZEzVgyQDuaPOCNIFaejGFHQyhMlyeMFUjNfXrElhWQQNdK74UAbUF2hNj.jpg?r=d4b"
 )
 
-RECOMMENDATIONS: list[RecommendationShortDetail] = (
-    model_factory.create_factory(RecommendationShortDetail, photo=PHOTO).batch(size=2)
-)
 
+def get_film_catalog(films_count: int, /, *, seed: int = 0) -> list[RecommendationShortDetail]:
+    """Получение детерминированного каталога фильмов, упорядоченного по убыванию популярности."""
+    rng = random.Random(seed)
+    return [
+        RecommendationShortDetail(
+            pk=uuid.UUID(int=rng.getrandbits(128), version=4),
+            title=f"Film #{rank}",
+            description=f"Description of film #{rank}",
+            photo=PHOTO,
+        )
+        for rank in range(1, films_count + 1)
+    ]
 
-class NetflixUgcClientStub(NetflixUgcClient):
-    """Стаб клиента для работы с АПИ сервиса Netflix UGC."""
 
-    def get_recommendations_for_user_iter(self, user_pk: uuid.UUID, /) -> Iterator[RecommendationShortDetail]:
-        for recommendation in RECOMMENDATIONS:
-            yield recommendation
+class NetflixUgcClientStub(NetflixUgcClient):
+    """Стаб клиента для работы с АПИ сервиса Netflix UGC.
+
+    Рекомендации выбираются из каталога `films_count` фильмов с весами по закону Ципфа: вес фильма
+    обратно пропорционален его рангу в степени `popularity_exponent`. Рекомендации пользователя
+    определяются `seed` и pk пользователя.
+    """
+
+    def __init__(
+        self,
+        films_count: int = 2, *,
+        recommendations_count: int = 2,
+        popularity_exponent: float = 1.0,
+        seed: int = 0,
+    ) -> None:
+        self._films = get_film_catalog(films_count, seed=seed)
+        self._cum_weights = list(itertools.accumulate(
+            1 / rank ** popularity_exponent for rank in range(1, films_count + 1)))
+        self._recommendations_count = min(recommendations_count, films_count)
+        self._seed = seed
+
+    async def get_recommendations_for_user(self, user_pk: uuid.UUID, /) -> list[RecommendationShortDetail]:
+        rng = random.Random(self._seed ^ user_pk.int)
+        recommendations: dict[uuid.UUID, RecommendationShortDetail] = {}
+        while len(recommendations) < self._recommendations_count:
+            film, = rng.choices(self._films, cum_weights=self._cum_weights)
+            recommendations.setdefault(film.pk, film)
+        return list(recommendations.values())
@@ -5,6 +5,7 @@ from fastapi.responses import ORJSONResponse
 
 from notifications.api.urls import api_router
 from notifications.common.exceptions import NetflixNotificationsError
+from notifications.core.compression import register_fast_compression
 from notifications.core.config import get_settings
 
 from .celery import create_celery
@@ -40,6 +41,7 @@ def create_app() -> FastAPI:
     async def startup():
         await container.init_resources()
         container.check_dependencies()
+        await container.email_notification_service().create_coalesced_template()
         logging.info("Start server")
 
     @app.on_event("shutdown")
@@ -55,6 +57,7 @@ def create_app() -> FastAPI:
 
 def setup_celery(app: FastAPI, container: Container) -> tuple[FastAPI, Container]:
     """Настройка Celery приложения."""
+    register_fast_compression(container.message_compressor())
     celery_app = create_celery()
     app.celery_app = celery_app
     container = inject_celery_app(container, celery_app)
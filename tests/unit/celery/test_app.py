@@ -0,0 +1,25 @@
+import dataclasses
+import datetime
+
+from kombu.serialization import dumps, loads
+
+from notifications.celery import create_celery
+from notifications.core.serializers import MSGPACK_SERIALIZER
+from notifications.domain.periodic_tasks.chunks import DateChunk
+from notifications.domain.periodic_tasks.tasks import send_emails_with_template
+
+
+def test_task_serializer():
+    """Задачи сериализуются msgpack, аргументы следующего чанка восстанавливаются без потери типов."""
+    app = create_celery()
+    chunk = DateChunk(
+        start=datetime.date(2022, 1, 1), size=datetime.timedelta(days=14), end=datetime.date(2022, 3, 1),
+        run_id="run", lane_users=100,
+    )
+    kwargs = {"template_slug": "slug", "email_subject": "Subject", "chunk": dataclasses.asdict(chunk)}
+
+    content_type, content_encoding, body = dumps(kwargs, serializer=app.conf.task_serializer)
+
+    assert app.conf.task_serializer == MSGPACK_SERIALIZER
+    assert app.tasks[send_emails_with_template.name].serializer == MSGPACK_SERIALIZER
+    assert loads(body, content_type, content_encoding, accept=app.conf.accept_content) == kwargs
@@ -0,0 +1,113 @@
+import json
+
+import orjson
+import pytest
+from celery_sqlalchemy_scheduler.models import CrontabSchedule, PeriodicTask
+from celery_sqlalchemy_scheduler.session import ModelBase
+
+from notifications.celery import DatabaseScheduler
+from notifications.domain.periodic_tasks import BeatLeaderLease
+
+
+class FakePubSub:
+
+    def __init__(self) -> None:
+        self.messages = []
+
+    def get_message(self, timeout: float = 0):
+        return self.messages.pop(0) if self.messages else None
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def pubsub(mocker):
+    pubsub = FakePubSub()
+    redis_client = mocker.Mock()
+    redis_client.subscribe.return_value = pubsub
+    mocker.patch.object(DatabaseScheduler, "redis_client", redis_client)
+    return pubsub
+
+
+@pytest.fixture
+def leader_lease(mocker):
+    leader_lease = mocker.create_autospec(BeatLeaderLease, instance=True)
+    leader_lease.token = 1
+    leader_lease.acquire.return_value = True
+    leader_lease.is_held.return_value = True
+    mocker.patch.object(DatabaseScheduler, "leader_lease", leader_lease)
+    return leader_lease
+
+
+@pytest.fixture
+def scheduler(celery_app, pubsub, leader_lease, tmp_path):
+    celery_app.conf.beat_schedule = {}
+    scheduler = DatabaseScheduler(app=celery_app, dburi=f"sqlite:///{tmp_path / 'beat.db'}", lazy=True)
+    ModelBase.metadata.create_all(scheduler.engine)
+    scheduler.setup_schedule()
+    return scheduler
+
+
+def add_periodic_task(scheduler, name: str, *, enabled: bool = True) -> None:
+    session = scheduler.Session()
+    session.add(PeriodicTask(
+        name=name, task="periodic.task", crontab=CrontabSchedule(), kwargs=json.dumps({}), enabled=enabled))
+    session.commit()
+    session.close()
+
+
+def publish(pubsub, *names: str) -> None:
+    pubsub.messages.append({"type": "message", "data": orjson.dumps(names)})
+
+
+class TestDatabaseScheduler:
+    """Тестирование обновления расписания Beat по уведомлениям."""
+
+    def test_reload_on_notification(self, scheduler, pubsub):
+        """Задачи из уведомления перечитываются из БД, остальные новые задачи не загружаются."""
+        add_periodic_task(scheduler, "first")
+        add_periodic_task(scheduler, "second")
+        assert "first" not in scheduler.schedule
+
+        publish(pubsub, "first")
+
+        assert "first" in scheduler.schedule
+        assert "second" not in scheduler.schedule
+
+    def test_disabled_removed(self, scheduler, pubsub):
+        """Выключенная задача убирается из расписания."""
+        add_periodic_task(scheduler, "first")
+        publish(pubsub, "first")
+        assert "first" in scheduler.schedule
+
+        session = scheduler.Session()
+        session.query(PeriodicTask).filter_by(name="first").update({"enabled": False})
+        session.commit()
+        session.close()
+        publish(pubsub, "first")
+
+        assert "first" not in scheduler.schedule
+
+    def test_follower_does_not_send(self, scheduler, pubsub, leader_lease, mocker):
+        """Реплика без аренды лидерства задачи не отправляет."""
+        apply_async = mocker.patch.object(scheduler, "apply_async")
+        add_periodic_task(scheduler, "first")
+        publish(pubsub, "first")
+        leader_lease.acquire.return_value = False
+
+        interval = scheduler.tick()
+
+        assert interval == scheduler.changes_poll_interval
+        apply_async.assert_not_called()
+
+    def test_fenced_entry_skipped(self, scheduler, pubsub, leader_lease, mocker):
+        """Если аренда с токеном реплики уже не действует, то задача не отправляется."""
+        apply_async = mocker.patch.object(scheduler, "apply_async")
+        add_periodic_task(scheduler, "first")
+        publish(pubsub, "first")
+        leader_lease.is_held.return_value = False
+
+        scheduler.apply_entry(scheduler.schedule["first"])
+
+        apply_async.assert_not_called()
@@ -1,6 +1,8 @@
 import pytest
 from celery.result import AsyncResult
 
+from notifications.core.compression import FAST_COMPRESSION
+
 test_key = "test-key"
 
 
@@ -112,3 +114,14 @@ class TestCeleryTask:
         assert isinstance(result_1, AsyncResult)
         assert isinstance(result_2, AsyncResult)
         assert result_2.get() == 7
+
+    def test_publish_compression(self, mocker, task_factory, celery_app):
+        """Задачи отправляются в брокер с быстрым сжатием, если сжатие не задано явно."""
+        mocker.patch.dict(celery_app.conf, {"task_always_eager": False})
+        send_task = mocker.patch.object(celery_app, "send_task")
+        task = task_factory()
+
+        task.apply_async(args=(1, 2))
+        task.apply_async(args=(3, 4), compression="gzip")
+
+        assert [call.kwargs["compression"] for call in send_task.call_args_list] == [FAST_COMPRESSION, "gzip"]
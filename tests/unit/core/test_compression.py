@@ -0,0 +1,46 @@
+import zlib
+
+import pytest
+from kombu.compression import compress, decompress
+
+from notifications.core.compression import FAST_COMPRESSION, MessageCompressor, register_fast_compression
+
+
+@pytest.fixture
+def message_compressor() -> MessageCompressor:
+    message_compressor = MessageCompressor(threshold=1024)
+    register_fast_compression(message_compressor)
+    return message_compressor
+
+
+class TestMessageCompressor:
+    """Тестирование быстрого сжатия сообщений kombu."""
+
+    def test_compressed(self, message_compressor):
+        """Сообщение от порога сжимается с маркером `content-type` и прозрачно распаковывается."""
+        body = b"<p>Recommended film</p>" * 100
+
+        compressed_body, content_type = compress(body, FAST_COMPRESSION)
+
+        assert len(compressed_body) < len(body)
+        assert decompress(compressed_body, content_type) == body
+        stats = message_compressor.get_stats()
+        assert (stats.messages_count, stats.compressed_count, stats.raw_size) == (1, 1, len(body))
+        assert stats.ratio > 1
+
+    def test_below_threshold(self, message_compressor):
+        """Сообщение меньше порога не сжимается, но учитывается в статистике."""
+        body = b"<p>Recommended film</p>"
+
+        compressed_body, content_type = compress(body, FAST_COMPRESSION)
+
+        assert len(compressed_body) == len(body) + 1
+        assert decompress(compressed_body, content_type) == body
+        stats = message_compressor.get_stats()
+        assert (stats.messages_count, stats.compressed_count, stats.raw_size) == (1, 0, 0)
+
+    def test_legacy_body(self, message_compressor):
+        """Сообщение, сжатое zlib целиком без маркера, распаковывается."""
+        body = b"<p>Recommended film</p>" * 100
+
+        assert message_compressor.decompress(zlib.compress(body, 1)) == body
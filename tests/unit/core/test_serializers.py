@@ -0,0 +1,17 @@
+import datetime
+import uuid
+
+from notifications.core.serializers import dumps, loads
+
+
+def test_msgpack_extension_types():
+    """Даты, интервалы и UUID восстанавливаются после сериализации с сохранением типов."""
+    payload = {
+        "pk": uuid.uuid4(),
+        "registration_date": datetime.date(2022, 5, 17),
+        "created": datetime.datetime(2022, 5, 17, 10, 30, tzinfo=datetime.timezone.utc),
+        "size": datetime.timedelta(days=14, seconds=5),
+        "recipient_list": ["john.doe@gmail.com"],
+    }
+
+    assert loads(dumps(payload)) == payload
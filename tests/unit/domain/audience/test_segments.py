@@ -0,0 +1,96 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from notifications.domain.audience import AudienceSegment, AudienceService, AudienceSnapshotRepository
+from notifications.domain.audience.enums import ActivityFlag
+from notifications.integrations.auth.enums import DefaultRoles
+from notifications.integrations.auth.stubs import NetflixAuthClientStub
+from notifications.integrations.auth.types import BoundaryRegistrationDate
+
+FIRST_REGISTRATION_DATE = datetime.date(2020, 1, 1)
+LAST_REGISTRATION_DATE = datetime.date(2020, 3, 1)
+REBUILD_INTERVAL = 24 * 60 * 60
+
+SEGMENTS = [
+    AudienceSegment(),
+    AudienceSegment(roles=[DefaultRoles.SUBSCRIBERS.value]),
+    AudienceSegment(registration_date_from=datetime.date(2020, 1, 10), registration_date_to=datetime.date(2020, 2, 1)),
+    AudienceSegment(required_flags=ActivityFlag.EMAIL_CONFIRMED | ActivityFlag.RECENTLY_ACTIVE),
+    AudienceSegment(excluded_flags=ActivityFlag.HAS_SUBSCRIPTION),
+    AudienceSegment(allowed_domains=["Gmail.com", "mail.ru", "unknown.org"]),
+    AudienceSegment(
+        roles=[DefaultRoles.VIEWERS.value],
+        registration_date_to=datetime.date(2020, 2, 15),
+        required_flags=ActivityFlag.EMAIL_CONFIRMED,
+        denied_domains=["yandex.ru"],
+    ),
+]
+
+
+@pytest.fixture
+def auth_client() -> NetflixAuthClientStub:
+    return NetflixAuthClientStub(
+        10_000, first_registration_date=FIRST_REGISTRATION_DATE, last_registration_date=LAST_REGISTRATION_DATE)
+
+
+@pytest.fixture
+def audience_service(auth_client, tmp_path) -> AudienceService:
+    snapshot_repository = AudienceSnapshotRepository(tmp_path, snapshots_to_keep=1, batch_size=10_000)
+    audience_service = AudienceService(auth_client, snapshot_repository, rebuild_interval=REBUILD_INTERVAL)
+    audience_service.refresh_snapshot()
+    return audience_service
+
+
+class TestAudienceSegment:
+    """Тестирование сегментов аудитории."""
+
+    @pytest.mark.parametrize("segment", SEGMENTS)
+    def test_select_matches_users(self, auth_client, audience_service, segment):
+        """Векторный отбор пользователей по снимку совпадает с построчной проверкой условий сегмента."""
+        date_range = BoundaryRegistrationDate(
+            first_registration_date=datetime.date(2020, 1, 5), last_registration_date=datetime.date(2020, 2, 20))
+        expected_users = [
+            user
+            for user in auth_client.get_users_within_registration_date_range_iter(date_range)
+            if segment.matches(user)
+        ]
+
+        users = list(audience_service.get_users_within_registration_date_range_iter(date_range, segment=segment))
+
+        assert users == expected_users
+        assert 0 < len(users)
+        density = audience_service.get_registration_density(date_range, segment=segment)
+        assert sum(density.counts.values()) == len(users)
+
+    def test_users_after_snapshot_filtered(self, audience_service, tmp_path):
+        """Пользователи, зарегистрированные после обновления снимка, фильтруются по условиям сегмента."""
+        auth_client = NetflixAuthClientStub(
+            15_000, first_registration_date=FIRST_REGISTRATION_DATE, last_registration_date=datetime.date(2020, 3, 31))
+        snapshot_repository = AudienceSnapshotRepository(tmp_path, snapshots_to_keep=1, batch_size=10_000)
+        segment = AudienceSegment(roles=[DefaultRoles.SUBSCRIBERS.value], denied_domains=["gmail.com"])
+        date_range = BoundaryRegistrationDate(
+            first_registration_date=datetime.date(2020, 2, 20), last_registration_date=datetime.date(2020, 3, 10))
+
+        audience_service = AudienceService(auth_client, snapshot_repository, rebuild_interval=REBUILD_INTERVAL)
+
+        users = list(audience_service.get_users_within_registration_date_range_iter(date_range, segment=segment))
+
+        assert users == [
+            user
+            for user in auth_client.get_users_within_registration_date_range_iter(date_range)
+            if segment.matches(user)
+        ]
+        assert all(user.role == DefaultRoles.SUBSCRIBERS.value for user in users)
+
+    def test_select_returns_sorted_indexes(self, audience_service, tmp_path):
+        """Индексы пользователей сегмента отсортированы и ограничены диапазоном дат."""
+        snapshot = AudienceSnapshotRepository(tmp_path, snapshots_to_keep=1, batch_size=1).get_current()
+        segment = AudienceSegment(registration_date_from=datetime.date(2020, 2, 1))
+
+        indexes = snapshot.select(segment, FIRST_REGISTRATION_DATE, datetime.date(2020, 2, 2))
+
+        assert np.all(np.diff(indexes) == 1)
+        assert indexes.tolist() == list(range(*snapshot.get_index_range(datetime.date(2020, 2, 1),
+                                                                        datetime.date(2020, 2, 2))))
@@ -0,0 +1,113 @@
+import datetime
+
+import pytest
+
+from notifications.domain.audience import AudienceService, AudienceSnapshotRepository
+from notifications.domain.audience.exceptions import UnsortedAudienceError
+from notifications.integrations.auth.stubs import NetflixAuthClientStub
+from notifications.integrations.auth.types import BoundaryRegistrationDate
+
+FIRST_REGISTRATION_DATE = datetime.date(2020, 1, 1)
+USERS_PER_DAY = 200
+REBUILD_INTERVAL = 24 * 60 * 60
+
+
+def get_auth_client(days: int) -> NetflixAuthClientStub:
+    return NetflixAuthClientStub(
+        days * USERS_PER_DAY,
+        first_registration_date=FIRST_REGISTRATION_DATE,
+        last_registration_date=FIRST_REGISTRATION_DATE + datetime.timedelta(days=days),
+    )
+
+
+def get_date_range(start_day: int, end_day: int) -> BoundaryRegistrationDate:
+    return BoundaryRegistrationDate(
+        first_registration_date=FIRST_REGISTRATION_DATE + datetime.timedelta(days=start_day),
+        last_registration_date=FIRST_REGISTRATION_DATE + datetime.timedelta(days=end_day),
+    )
+
+
+@pytest.fixture
+def snapshot_repository(tmp_path) -> AudienceSnapshotRepository:
+    return AudienceSnapshotRepository(tmp_path, snapshots_to_keep=2, batch_size=7_000)
+
+
+class TestAudienceSnapshot:
+    """Тестирование снимков аудитории."""
+
+    def test_snapshot_matches_auth(self, snapshot_repository):
+        """Пользователи из снимка совпадают с пользователями из сервиса Auth."""
+        auth_client = get_auth_client(30)
+        audience_service = AudienceService(auth_client, snapshot_repository, rebuild_interval=REBUILD_INTERVAL)
+
+        snapshot = audience_service.refresh_snapshot()
+
+        assert len(snapshot) == 30 * USERS_PER_DAY
+        date_range = get_date_range(10, 12)
+        index_range = snapshot.get_index_range(date_range.first_registration_date, date_range.last_registration_date)
+        assert index_range == (10 * USERS_PER_DAY, 12 * USERS_PER_DAY)
+        date_range = get_date_range(5, 25)
+        expected_users = list(auth_client.get_users_within_registration_date_range_iter(date_range))
+        assert list(audience_service.get_users_within_registration_date_range_iter(date_range)) == expected_users
+
+    def test_incremental_refresh(self, snapshot_repository, monkeypatch):
+        """При обновлении снимка из сервиса Auth запрашиваются только новые пользователи."""
+        first_snapshot = AudienceService(
+            get_auth_client(30), snapshot_repository, rebuild_interval=REBUILD_INTERVAL).refresh_snapshot()
+        auth_client = get_auth_client(40)
+        requested_ranges = []
+        get_users = auth_client.get_users_within_registration_date_range_iter
+
+        def get_users_spy(date_range):
+            requested_ranges.append(date_range)
+            return get_users(date_range)
+
+        monkeypatch.setattr(auth_client, "get_users_within_registration_date_range_iter", get_users_spy)
+        audience_service = AudienceService(auth_client, snapshot_repository, rebuild_interval=REBUILD_INTERVAL)
+
+        snapshot = audience_service.refresh_snapshot()
+
+        assert requested_ranges == [get_date_range(30, 40)]
+        assert snapshot.version != first_snapshot.version
+        assert len(snapshot) == 40 * USERS_PER_DAY
+        assert len(list(first_snapshot.iter_users(0, len(first_snapshot)))) == 30 * USERS_PER_DAY
+        date_range = get_date_range(25, 35)
+        assert list(audience_service.get_users_within_registration_date_range_iter(date_range)) == list(
+            get_users(date_range))
+
+    def test_users_served_from_auth_after_snapshot(self, snapshot_repository):
+        """Пользователи, зарегистрированные после обновления снимка, запрашиваются из сервиса Auth."""
+        AudienceService(get_auth_client(10), snapshot_repository, rebuild_interval=REBUILD_INTERVAL).refresh_snapshot()
+        auth_client = get_auth_client(20)
+        audience_service = AudienceService(auth_client, snapshot_repository, rebuild_interval=REBUILD_INTERVAL)
+        date_range = get_date_range(5, 15)
+
+        users = list(audience_service.get_users_within_registration_date_range_iter(date_range))
+
+        assert users == list(auth_client.get_users_within_registration_date_range_iter(date_range))
+
+    def test_rebuild(self, snapshot_repository, monkeypatch):
+        """При полной пересборке в снимок попадают измененные данные пользователей, удаленные пользователи пропадают."""
+        auth_client = get_auth_client(30)
+        audience_service = AudienceService(auth_client, snapshot_repository, rebuild_interval=0)
+        audience_service.refresh_snapshot()
+        users = list(auth_client.get_users_within_registration_date_range_iter(get_date_range(0, 30)))
+        changed_user, deleted_user = users[10], users[20]
+        auth_users = [user for user in users if user.pk != deleted_user.pk]
+        auth_users[10] = changed_user.copy(update={"email": "changed@example.com"})
+        monkeypatch.setattr(auth_client, "get_users_within_registration_date_range_iter", lambda _: iter(auth_users))
+
+        snapshot = audience_service.refresh_snapshot()
+
+        snapshot_users = list(audience_service.get_users_within_registration_date_range_iter(get_date_range(0, 30)))
+        assert len(snapshot) == 30 * USERS_PER_DAY - 1
+        assert snapshot_users == auth_users
+        assert deleted_user.pk not in {user.pk for user in snapshot_users}
+        assert snapshot_users[10].email == "changed@example.com"
+
+    def test_unsorted_users(self, snapshot_repository):
+        """Пользователи для снимка должны быть отсортированы по дате регистрации."""
+        users = list(get_auth_client(2).get_users_within_registration_date_range_iter(get_date_range(0, 2)))
+
+        with pytest.raises(UnsortedAudienceError):
+            snapshot_repository.create(reversed(users), synced_until=FIRST_REGISTRATION_DATE)
@@ -0,0 +1,147 @@
+from typing import AsyncIterator
+
+import pytest
+
+from notifications.domain.campaigns import Campaign, CampaignRepository, CampaignService
+from notifications.domain.campaigns.exceptions import InvalidUploadError
+from notifications.domain.campaigns.parsers import iter_csv_recipients, iter_lines, iter_ndjson_recipients
+from notifications.domain.campaigns.types import CampaignRecipient
+from notifications.domain.suppressions import SuppressionService
+from notifications.domain.templates import TemplateService
+
+
+async def stream(data: bytes, *, chunk_size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+async def parse(parser, data: bytes, *, chunk_size: int = 3) -> list[CampaignRecipient | None]:
+    return [recipient async for recipient in parser(iter_lines(stream(data, chunk_size=chunk_size)))]
+
+
+class TestParsers:
+    """Тестирование потокового чтения файлов с получателями."""
+
+    async def test_csv(self):
+        """Запись CSV может содержать перевод строки в кавычках и разрываться между частями потока."""
+        data = '\ufeffemail,name\r\nuser1@gmail.com,"Иван\n""Ваня"""\nuser2@gmail.com\n\nuser3@gmail.com,Петр'.encode()
+
+        recipients = await parse(iter_csv_recipients, data)
+
+        assert recipients == [
+            CampaignRecipient(email="user1@gmail.com", context={"name": 'Иван\n"Ваня"'}),
+            None,
+            CampaignRecipient(email="user3@gmail.com", context={"name": "Петр"}),
+        ]
+
+    async def test_csv_without_email_column(self):
+        """CSV без колонки с адресом не загружается."""
+        with pytest.raises(InvalidUploadError):
+            await parse(iter_csv_recipients, b"name\nuser\n")
+
+    async def test_ndjson(self):
+        """Некорректные строки NDJSON пропускаются."""
+        data = (
+            b'{"email": "user1@gmail.com", "context": {"name": "User"}}\n[1]\n{"email": 1}\n{\n'
+            b'{"email": "user2@gmail.com"}'
+        )
+
+        recipients = await parse(iter_ndjson_recipients, data, chunk_size=7)
+
+        assert recipients == [
+            CampaignRecipient(email="user1@gmail.com", context={"name": "User"}),
+            None,
+            None,
+            None,
+            CampaignRecipient(email="user2@gmail.com", context={}),
+        ]
+
+
+class TestCampaignService:
+    """Тестирование загрузки получателей кампании."""
+
+    async def test_upload_in_batches(self, mocker):
+        """Получатели проверяются и сохраняются пачками, отправка начинается после первой пачки."""
+        campaign_repository = mocker.create_autospec(CampaignRepository, instance=True)
+        suppression_service = mocker.create_autospec(SuppressionService, instance=True)
+        suppression_service.filter_allowed.side_effect = lambda emails: [
+            email for email in emails if email != "user3@gmail.com"
+        ]
+        send_campaign = mocker.patch("notifications.domain.campaigns.tasks.send_campaign")
+        campaign_service = CampaignService(
+            campaign_repository, mocker.create_autospec(TemplateService, instance=True), suppression_service,
+            upload_batch_size=3, upload_timeout=60,
+        )
+        rows = ["email,name", "User1@Gmail.com ,A", "user2@gmail,B", "user3@gmail.com,C", "user4@gmail.com"]
+
+        await campaign_service.upload(
+            stream("\n".join(rows).encode(), chunk_size=5),
+            content_type="text/csv; charset=utf-8", template_slug="slug", email_subject="Subject",
+        )
+
+        batches = [call.args[1:] for call in campaign_repository.push_batch.await_args_list]
+        assert batches == [
+            ([CampaignRecipient(email="user1@gmail.com", context={"name": "A"})], ),
+            ([], ),
+        ]
+        assert [call.kwargs for call in campaign_repository.push_batch.await_args_list] == [
+            {"rows_count": 3, "accepted_count": 1, "invalid_count": 1, "suppressed_count": 1},
+            {"rows_count": 1, "accepted_count": 0, "invalid_count": 1, "suppressed_count": 0},
+        ]
+        send_campaign.delay.assert_called_once()
+
+
+class TestSendBatches:
+    """Тестирование постановки задач на отправку писем кампании."""
+
+    @pytest.fixture
+    def campaign_repository(self, mocker):
+        campaign_repository = mocker.create_autospec(CampaignRepository, instance=True)
+        campaign_repository.get.return_value = Campaign(
+            campaign_id="campaign", template_slug="slug", email_subject="Subject")
+        campaign_repository.get_first_batch.side_effect = [
+            [
+                CampaignRecipient(email="user1@gmail.com", context={}),
+                CampaignRecipient(email="user2@gmail.com", context={}),
+            ],
+            None,
+        ]
+        return campaign_repository
+
+    @pytest.fixture
+    def template_service(self, mocker):
+        return mocker.create_autospec(TemplateService, instance=True)
+
+    @pytest.fixture
+    def campaign_service(self, mocker, campaign_repository, template_service):
+        return CampaignService(
+            campaign_repository, template_service, mocker.create_autospec(SuppressionService, instance=True),
+            upload_batch_size=3, upload_timeout=60,
+        )
+
+    async def test_static_template(self, mocker, campaign_service, campaign_repository, template_service):
+        """Письма по шаблону без переменных ставятся одной задачей на пачку, заблокированные получатели исключаются."""
+        template_service.is_static.return_value = True
+        template_service.render_to_cache.return_value = "hash"
+        send_email = mocker.patch("notifications.domain.messages.tasks.send_email")
+        send_email.acquire_locks.return_value = [False, True]
+        send_email_batch = mocker.patch("notifications.domain.messages.tasks.send_email_batch")
+
+        assert await campaign_service.send_batches("campaign", batches_count=2) == 1
+
+        send_email.apply_async.assert_not_called()
+        (payload, ), = (call.kwargs["args"] for call in send_email_batch.apply_async.call_args_list)
+        assert payload["recipient_list"] == ["user2@gmail.com"]
+        assert payload["content_hash"] == "hash"
+        campaign_repository.ack_first_batch.assert_awaited_once_with("campaign", queued_count=2)
+
+    async def test_acked_after_publish(self, mocker, campaign_service, campaign_repository, template_service):
+        """Пачка удаляется из очереди, только если задачи на отправку писем поставлены."""
+        template_service.is_static.return_value = False
+        send_email = mocker.patch("notifications.domain.messages.tasks.send_email")
+        send_email.apply_async.side_effect = ConnectionError
+
+        with pytest.raises(ConnectionError):
+            await campaign_service.send_batches("campaign", batches_count=2)
+
+        campaign_repository.ack_first_batch.assert_not_called()
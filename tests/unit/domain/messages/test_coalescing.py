@@ -0,0 +1,114 @@
+import datetime
+import logging
+
+from notifications.common.exceptions import NotFoundError
+from notifications.domain.messages import CoalescingRepository, EmailNotificationService, NotificationCoalescingService
+from notifications.domain.messages.constants import COALESCED_SUBJECT
+from notifications.domain.messages.types import CoalescingWindow, NotificationPayload
+from notifications.domain.templates import TemplateService
+from notifications.infrastructure.db.redis import RedisClient
+from notifications.infrastructure.emails.clients import BaseEmailClient
+
+
+def get_payloads(count: int, *, subject: str | None = None) -> list[NotificationPayload]:
+    return [
+        NotificationPayload(
+            subject=subject or f"Subject {index}", recipient_list=["user@gmail.com"], content=str(index))
+        for index in range(count)
+    ]
+
+
+class TestCoalescingRepository:
+    """Тестирование хранилища окон объединения уведомлений."""
+
+    async def test_records_are_compact(self, mocker):
+        """Адрес получателя не хранится в записях окна и восстанавливается при его закрытии."""
+        redis_client = mocker.create_autospec(RedisClient, instance=True)
+        redis_client.run_script.return_value = [b"window", 1, 1]
+        coalescing_repository = CoalescingRepository(redis_client)
+        payload = NotificationPayload(
+            subject="Subject", recipient_list=["User@Gmail.com"], template_slug="slug", context={"name": "User"})
+
+        coalescing_window = await coalescing_repository.append("User@Gmail.com", "likes", payload, ttl=60)
+        record = redis_client.run_script.await_args.kwargs["args"][0]
+        redis_client.run_script.return_value = [record]
+        payloads = await coalescing_repository.pop("User@Gmail.com", "likes", "window")
+
+        assert coalescing_window == CoalescingWindow(window_id="window", notifications_count=1, is_opened=True)
+        assert b"gmail" not in record.lower()
+        assert payloads == [payload]
+        keys = [call.kwargs["keys"] for call in redis_client.run_script.await_args_list]
+        assert keys[0] == keys[1]
+        assert keys[0] == CoalescingRepository._get_keys(" user@gmail.com", "likes")
+
+
+class TestNotificationCoalescingService:
+    """Тестирование сервиса объединения уведомлений."""
+
+    async def test_flush(self, mocker):
+        """Одно уведомление окна отправляется как есть, несколько - одним письмом, закрытое окно - не отправляется."""
+        coalescing_repository = mocker.create_autospec(CoalescingRepository, instance=True)
+        coalescing_repository.pop.side_effect = [[], get_payloads(1), get_payloads(3)]
+        email_service = mocker.create_autospec(EmailNotificationService, instance=True)
+        email_service.send_message.return_value = 1
+        email_service.send_coalesced_message.return_value = 1
+        coalescing_service = NotificationCoalescingService(
+            coalescing_repository, email_service, max_window=60, max_notifications=3, state_ttl_margin=60)
+
+        sent = [await coalescing_service.flush("user@gmail.com", "likes", "window") for _ in range(3)]
+
+        assert sent == [0, 1, 1]
+        email_service.send_message.assert_awaited_once_with(get_payloads(1)[0])
+        email_service.send_coalesced_message.assert_awaited_once_with(get_payloads(3))
+        assert coalescing_service.get_window(120) == 60
+        assert coalescing_service.is_full(CoalescingWindow(window_id="window", notifications_count=3, is_opened=False))
+
+    async def test_late_flush(self, mocker, caplog):
+        """Если окно закрыто позже запаса времени хранения, то пропавшие уведомления записываются в лог."""
+        coalescing_repository = mocker.create_autospec(CoalescingRepository, instance=True)
+        coalescing_repository.pop.return_value = []
+        email_service = mocker.create_autospec(EmailNotificationService, instance=True)
+        coalescing_service = NotificationCoalescingService(
+            coalescing_repository, email_service, max_window=60, max_notifications=3, state_ttl_margin=60)
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        with caplog.at_level(logging.WARNING):
+            await coalescing_service.flush("user@gmail.com", "likes", "in_time", scheduled_at=now)
+            await coalescing_service.flush(
+                "user@gmail.com", "likes", "late", scheduled_at=now - datetime.timedelta(minutes=5))
+
+        assert not any("<in_time>" in record.getMessage() for record in caplog.records)
+        assert any("<late>" in record.getMessage() for record in caplog.records)
+
+    async def test_coalesced_message(self, mocker):
+        """Заголовок объединенного письма совпадает с заголовком уведомлений, только если он у них один."""
+        email_client = mocker.create_autospec(BaseEmailClient, instance=True)
+        template_service = mocker.create_autospec(TemplateService, instance=True)
+        template_service.get_by_slug.return_value = mocker.Mock(content="")
+        template_service.render_template_from_string.return_value = "content"
+        email_service = EmailNotificationService(email_client, template_service)
+
+        await email_service.send_coalesced_message(get_payloads(2, subject="Likes"))
+        await email_service.send_coalesced_message(get_payloads(2))
+
+        subjects = [call.args[0][0].subject for call in email_client.send_messages.call_args_list]
+        assert subjects == ["Likes", COALESCED_SUBJECT]
+        context = template_service.render_template_from_string.await_args.kwargs["context"]
+        assert context == {
+            "notifications": [{"subject": "Subject 0", "content": "0"}, {"subject": "Subject 1", "content": "1"}],
+        }
+        template_service.create_default_template.assert_not_called()
+
+    async def test_coalesced_template_not_found(self, mocker):
+        """Если шаблона объединенных писем нет, то он создается заново."""
+        email_client = mocker.create_autospec(BaseEmailClient, instance=True)
+        template_service = mocker.create_autospec(TemplateService, instance=True)
+        template_service.get_by_slug.side_effect = NotFoundError
+        template_service.create_default_template.return_value = mocker.Mock(content="")
+        template_service.render_template_from_string.return_value = "content"
+        email_service = EmailNotificationService(email_client, template_service)
+
+        await email_service.send_coalesced_message(get_payloads(2))
+
+        template_service.create_default_template.assert_awaited_once()
+        email_client.send_messages.assert_called_once()
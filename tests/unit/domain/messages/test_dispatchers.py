@@ -0,0 +1,41 @@
+from notifications.api.v1.schemas import NotificationIn
+from notifications.domain.messages import (
+    EmailNotificationService, NotificationCoalescingService, NotificationDispatcherService,
+)
+from notifications.domain.messages.enums import NotificationPriority, NotificationType
+from notifications.domain.suppressions import SuppressionService
+from notifications.domain.templates import TemplateService
+
+
+class TestNotificationDispatcherService:
+    """Тестирование распределения уведомлений по очередям."""
+
+    async def test_fan_out_in_batches(self, mocker):
+        """Уведомление нескольким получателям ставится пачками без повторов и уже заблокированных получателей."""
+        suppression_service = mocker.create_autospec(SuppressionService, instance=True)
+        suppression_service.filter_allowed.side_effect = lambda recipient_list: recipient_list
+        send_email = mocker.patch("notifications.domain.messages.tasks.send_email")
+        send_email.get_lock_key.side_effect = lambda args, kwargs: args[0]["recipient_list"][0]
+        send_email.acquire_locks.side_effect = lambda lock_keys: [key != "user3@gmail.com" for key in lock_keys]
+        send_email_batch = mocker.patch("notifications.domain.messages.tasks.send_email_batch")
+        send_email_batch.apply_async.return_value.id = "task"
+        dispatcher_service = NotificationDispatcherService(
+            mocker.create_autospec(EmailNotificationService, instance=True),
+            mocker.create_autospec(TemplateService, instance=True),
+            suppression_service,
+            mocker.create_autospec(NotificationCoalescingService, instance=True),
+            recipients_batch_size=2,
+        )
+        recipient_list = [f"user{index}@gmail.com" for index in range(5)] + [" USER0@gmail.com", "user1@GMAIL.com"]
+        notification = NotificationIn(
+            subject="Subject", content="Content", recipient_list=recipient_list,
+            notification_type=NotificationType.EMAIL, priority=NotificationPriority.URGENT,
+        )
+
+        notification_details = await dispatcher_service.dispatch_notification(notification)
+
+        batches = [call.kwargs["args"][0]["recipient_list"] for call in send_email_batch.apply_async.call_args_list]
+        assert batches == [["user0@gmail.com", "user1@gmail.com"], ["user2@gmail.com"], ["user4@gmail.com"]]
+        assert [len(call.args[0]) for call in send_email.acquire_locks.call_args_list] == [2, 2, 1]
+        send_email.apply_async.assert_not_called()
+        assert notification_details.notification_id == "task"
@@ -0,0 +1,21 @@
+import pytest
+
+from notifications.domain.messages import EmailNotificationService
+from notifications.domain.messages.tasks import send_email, send_email_batch
+from notifications.domain.messages.types import NotificationPayload
+
+
+def test_send_email_batch_failed(mocker):
+    """Если письма пачки не удалось отправить, то блокировки всех получателей снимаются."""
+    release_locks = mocker.patch.object(send_email, "release_locks")
+    email_service = mocker.create_autospec(EmailNotificationService, instance=True)
+    email_service.send_message_to_each.side_effect = ConnectionError
+    notification = NotificationPayload(subject="Subject", recipient_list=["first@gmail.com", "second@gmail.com"])
+
+    with pytest.raises(ConnectionError):
+        send_email_batch.run(notification, email_service=email_service)
+
+    release_locks.assert_called_once_with([
+        send_email.get_lock_key([{**notification, "recipient_list": [recipient]}], {})
+        for recipient in ("first@gmail.com", "second@gmail.com")
+    ])
@@ -0,0 +1,71 @@
+import pytest
+
+from notifications.common.exceptions import ConflictError, NotFoundError
+from notifications.domain.periodic_tasks.exceptions import UnknownCeleryTaskError
+from notifications.domain.periodic_tasks.repositories import TaskRepository
+from notifications.domain.periodic_tasks.types import CeleryPeriodicTask, CeleryTask
+from notifications.domain.templates import TemplateService
+from tests.unit.testlib import make_task_service
+
+REGISTERED_TASK = "periodic.send_email_with_template"
+
+
+@pytest.fixture
+def task_repository(mocker):
+    task_repository = mocker.create_autospec(TaskRepository, instance=True)
+    task_repository.get_all_registered_iter.side_effect = lambda: iter([CeleryTask(name=REGISTERED_TASK)])
+    return task_repository
+
+
+@pytest.fixture
+def template_service(mocker):
+    template_service = mocker.create_autospec(TemplateService, instance=True)
+    template_service.get_missing_slugs.return_value = set()
+    return template_service
+
+
+@pytest.fixture
+def task_service(mocker, task_repository, template_service):
+    return make_task_service(
+        mocker,
+        task_repository=task_repository, template_service=template_service,
+        digest_prefetch_batch_size=1, spawn_batch_size=1, digest_spool_batch_size=1, recent_runs_limit=1,
+    )
+
+
+def make_periodic_task(name: str, *, task: str = REGISTERED_TASK, template_slug: str = "promo") -> CeleryPeriodicTask:
+    kwargs = {"template_slug": template_slug, "email_subject": "Promo"}
+    return CeleryPeriodicTask(task=task, name=name, description="", crontab={}, kwargs=kwargs)
+
+
+class TestCreateManyPeriodic:
+    """Тестирование создания нескольких периодических задач."""
+
+    async def test_created_in_one_call(self, task_service, task_repository, template_service):
+        """Шаблоны проверяются одним запросом, задачи создаются одним вызовом репозитория."""
+        periodic_tasks = [make_periodic_task("first"), make_periodic_task("second", template_slug="digest")]
+
+        await task_service.create_many_periodic(periodic_tasks)
+
+        template_service.get_missing_slugs.assert_awaited_once_with({"promo", "digest"})
+        task_repository.create_many_periodic.assert_awaited_once_with(periodic_tasks)
+        task_repository.get_all_registered_iter.assert_called_once()
+
+    @pytest.mark.parametrize(
+        ("periodic_tasks", "missing_slugs", "error"),
+        [
+            ([make_periodic_task("first"), make_periodic_task("first")], set(), ConflictError),
+            ([make_periodic_task("first", task="periodic.unknown")], set(), UnknownCeleryTaskError),
+            ([make_periodic_task("first")], {"promo"}, NotFoundError),
+        ],
+    )
+    async def test_nothing_created_when_invalid(
+        self, task_service, task_repository, template_service, periodic_tasks, missing_slugs, error,
+    ):
+        """Если хотя бы одна задача не прошла проверку, то не создается ни одна."""
+        template_service.get_missing_slugs.return_value = missing_slugs
+
+        with pytest.raises(error):
+            await task_service.create_many_periodic(periodic_tasks)
+
+        task_repository.create_many_periodic.assert_not_called()
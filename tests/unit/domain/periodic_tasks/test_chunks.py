@@ -0,0 +1,146 @@
+import dataclasses
+import datetime
+
+import pytest
+
+from notifications.domain.periodic_tasks.chunks import (
+    AdaptiveDateChunker, ChunkCheckpoints, ChunkStats, DateChunk, QueueDepthPacer, chunkify_task,
+)
+from notifications.infrastructure.db.cache import BaseSyncCache
+from notifications.integrations.auth.types import RegistrationDensity
+
+START = datetime.date(2022, 1, 1)
+END = datetime.date(2023, 1, 1)
+
+
+@pytest.fixture
+def chunker() -> AdaptiveDateChunker:
+    return AdaptiveDateChunker(target_users=100, target_duration=60)
+
+
+class TestAdaptiveDateChunker:
+    """Тестирование подбора размера чанков дат."""
+
+    def test_initial_chunk_by_density(self, chunker):
+        """Размер начального чанка подбирается по гистограмме регистраций."""
+        density = RegistrationDensity(counts={START: 10, START + datetime.timedelta(days=9): 90})
+
+        chunk = chunker.get_initial_chunk(START, END, density=density)
+
+        assert chunk.range == (START, START + datetime.timedelta(days=10))
+
+    def test_next_chunk_by_users_count(self, chunker):
+        """Чанк уменьшается, если в предыдущем было слишком много пользователей, и растет - если мало."""
+        chunk = DateChunk(start=START, size=datetime.timedelta(days=10), end=END)
+
+        smaller = chunker.get_next_chunk(chunk, ChunkStats(users_count=200, duration=1))
+        larger = chunker.get_next_chunk(chunk, ChunkStats(users_count=50, duration=1))
+
+        assert smaller.start == larger.start == START + datetime.timedelta(days=10)
+        assert smaller.size == datetime.timedelta(days=5)
+        assert larger.size == datetime.timedelta(days=20)
+
+    def test_next_chunk_by_duration(self, chunker):
+        """Чанк уменьшается, если предыдущий обрабатывался дольше `target_duration`."""
+        chunk = DateChunk(start=START, size=datetime.timedelta(days=10), end=END)
+
+        next_chunk = chunker.get_next_chunk(chunk, ChunkStats(users_count=100, duration=120))
+
+        assert next_chunk.size == datetime.timedelta(days=5)
+
+    def test_last_chunk(self, chunker):
+        """После последнего чанка следующий не создается."""
+        chunk = DateChunk(start=END - datetime.timedelta(days=5), size=datetime.timedelta(days=10), end=END)
+
+        assert chunker.get_next_chunk(chunk, ChunkStats(users_count=0, duration=0)) is None
+
+    def test_split_by_density(self, chunker):
+        """Полосы содержат примерно одинаковое количество пользователей."""
+        density = RegistrationDensity(counts={
+            START: 50,
+            START + datetime.timedelta(days=100): 50,
+            START + datetime.timedelta(days=101): 100,
+        })
+
+        chunks = chunker.split(START, END, lanes=2, density=density)
+
+        assert [chunk.range[0] for chunk in chunks] == [START, START + datetime.timedelta(days=101)]
+        assert [chunk.end for chunk in chunks] == [START + datetime.timedelta(days=101), END]
+        assert [chunk.lane for chunk in chunks] == [0, 1]
+        assert [chunk.lane_users for chunk in chunks] == [100, 100]
+
+
+class TestQueueDepthPacer:
+    """Тестирование подбора паузы между чанками по длине очереди."""
+
+    @pytest.fixture
+    def pacer(self) -> QueueDepthPacer:
+        return QueueDepthPacer(queue="common", low_watermark=100, high_watermark=1000, max_delay=60)
+
+    def test_delay(self, pacer):
+        """Пауза равна времени разбора очереди до `low_watermark` и ограничена `max_delay`."""
+        assert pacer.get_delay(depth_before=0, depth_after=100, produced=100, duration=1) == 0
+        assert pacer.get_delay(depth_before=500, depth_after=600, produced=200, duration=10) == 50
+        assert pacer.get_delay(depth_before=500, depth_after=700, produced=200, duration=10) == 60
+        assert pacer.get_delay(depth_before=0, depth_after=1000, produced=2000, duration=1) == 60
+
+
+class InMemorySyncCache(BaseSyncCache):
+
+    def __init__(self) -> None:
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, data, *, ttl=None, create_missing=True):
+        self.data[key] = data.encode() if isinstance(data, str) else data
+        return True
+
+    def delete_many(self, keys, /):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+class TestChunkCheckpoints:
+    """Тестирование контрольных точек обработки чанков."""
+
+    def test_resume_unfinished_lanes(self, chunker):
+        """При повторном запуске обрабатываются только незавершенные полосы, начиная с контрольной точки."""
+        checkpoints = ChunkCheckpoints(InMemorySyncCache(), ttl=60)
+        run_id = checkpoints.get_run_id("task", {"template_slug": "slug"})
+        lane_1, lane_2 = (
+            dataclasses.replace(chunk, run_id=run_id)
+            for chunk in chunker.split(START, END, lanes=2)
+        )
+        checkpoints.save_lanes(run_id, [lane_1, lane_2])
+
+        checkpoints.save(dataclasses.replace(lane_1, start=lane_1.end - datetime.timedelta(days=1)))
+        checkpoints.save(lane_2)
+
+        assert checkpoints.get_lanes("unknown") is None
+        assert checkpoints.get_lanes(run_id) == [dataclasses.replace(lane_2, start=lane_2.range[1])]
+
+
+class TestChunkifyTask:
+    """Тестирование обработки Celery задачи по чанкам дат."""
+
+    def test_given_run_id(self, mocker, chunker):
+        """Заданный идентификатор запуска используется в счетчиках прогресса и передается в чанки полос."""
+        task = mocker.Mock(cache_client=InMemorySyncCache())
+        decorator = chunkify_task(
+            initial_chunks=lambda *args, lanes, **kwargs: chunker.split(START, END, lanes=lanes),
+            chunker=chunker,
+            lanes=2,
+        )
+        wrapper = decorator(mocker.Mock())
+
+        wrapper(task, template_slug="slug", run_id="weekly_digest:2022-10-17")
+
+        task.run_progress.start.assert_called_once_with(
+            "weekly_digest:2022-10-17", task_name=task.name, total_users=None)
+        assert task.apply_async.call_count == 2
+        for call in task.apply_async.call_args_list:
+            assert call.kwargs["kwargs"]["template_slug"] == "slug"
+            assert "run_id" not in call.kwargs["kwargs"]
+            assert call.kwargs["kwargs"]["chunk"]["run_id"] == "weekly_digest:2022-10-17"
@@ -0,0 +1,121 @@
+import datetime
+import uuid
+
+import pytest
+
+from notifications.domain.messages import EmailNotificationService
+from notifications.domain.templates import Template, TemplateService
+from notifications.domain.templates.repositiories import TemplateRepository
+from notifications.infrastructure.db.cache import BaseCache
+from notifications.integrations.auth.types import UserDetail
+from notifications.integrations.ugc import NetflixUgcClient, RecommendationRepository
+from notifications.integrations.ugc.types import RecommendationShortDetail
+from tests.unit.testlib import InMemoryCache, make_task_service
+
+CONTENT = "{% for film in recommendations %}{{ film.title }};{% endfor %}"
+
+
+def make_film(title: str) -> RecommendationShortDetail:
+    return RecommendationShortDetail(pk=uuid.uuid4(), title=title, description="Description", photo="")
+
+
+def make_user() -> UserDetail:
+    return UserDetail(
+        pk=uuid.uuid4(), email="user@gmail.com", first_name="John", last_name="Doe", role="subscriber",
+        registration_date=datetime.date(2022, 1, 1),
+    )
+
+
+@pytest.fixture
+def films() -> list[RecommendationShortDetail]:
+    return [make_film("Popular"), make_film("Rare")]
+
+
+@pytest.fixture
+def cache() -> InMemoryCache:
+    return InMemoryCache()
+
+
+@pytest.fixture
+def ugc_client(mocker, films):
+    ugc_client = mocker.create_autospec(NetflixUgcClient, instance=True)
+    ugc_client.get_recommendations_for_user.return_value = [make_film("Fresh")]
+    ugc_client.get_recommendations_for_users.side_effect = lambda user_pks: {
+        user_pk: films for user_pk in user_pks
+    }
+    return ugc_client
+
+
+@pytest.fixture
+def email_service(mocker):
+    return mocker.create_autospec(EmailNotificationService, instance=True)
+
+
+@pytest.fixture
+def task_service(mocker, cache, ugc_client, email_service):
+    template_repository = mocker.create_autospec(TemplateRepository, instance=True)
+    template_repository.get_by_slug.return_value = Template(
+        name="Weekly Digest", slug="weekly_digest", content=CONTENT,
+        variables=Template.dump_variables({"recommendations"}),
+    )
+    template_service = TemplateService(
+        template_repository, mocker.create_autospec(BaseCache, instance=True),
+        rendered_content_ttl=60, fragment_cache_size=10, fragment_cache_ttl=60,
+    )
+    return make_task_service(
+        mocker,
+        template_service=template_service, ugc_client=ugc_client, email_service=email_service,
+        recommendation_repository=RecommendationRepository(cache, ttl=60),
+    )
+
+
+def get_sent_content(email_service) -> str:
+    return email_service.send_message.await_args.args[0]["content"]
+
+
+class TestDigestRecommendations:
+    """Тестирование получения рекомендаций для дайджеста."""
+
+    async def test_prefetch(self, mocker, task_service, cache, ugc_client, films):
+        """Фильмы пачки сохраняются в общий кэш один раз, пользователям передаются только их идентификаторы."""
+        set_many = mocker.spy(cache, "set_many")
+        cached_film_pks = set()
+        users = [make_user(), make_user()]
+
+        film_pks = await task_service._prefetch_recommendations(users, cached_film_pks=cached_film_pks)
+        await task_service._prefetch_recommendations([make_user()], cached_film_pks=cached_film_pks)
+
+        assert film_pks == {user.pk: [film.pk for film in films] for user in users}
+        assert cached_film_pks == {film.pk for film in films}
+        assert len(cache.data) == 2
+        set_many.assert_awaited_once()
+
+    async def test_cached_films(self, task_service, ugc_client, email_service):
+        """Если все фильмы есть в кэше, то рекомендации берутся из него без запроса к Netflix UGC."""
+        user = make_user()
+        film_pks = await task_service._prefetch_recommendations([user], cached_film_pks=set())
+
+        await task_service.send_digest_email_to_subscriber(user, film_pks=film_pks[user.pk])
+
+        assert get_sent_content(email_service) == "Popular;Rare;"
+        ugc_client.get_recommendations_for_user.assert_not_called()
+
+    async def test_expired_film(self, task_service, cache, ugc_client, email_service):
+        """Если какого-то фильма в кэше уже нет, то рекомендации запрашиваются у Netflix UGC."""
+        user = make_user()
+        film_pks = await task_service._prefetch_recommendations([user], cached_film_pks=set())
+        del cache.data[min(cache.data)]
+
+        await task_service.send_digest_email_to_subscriber(user, film_pks=film_pks[user.pk])
+
+        assert get_sent_content(email_service) == "Fresh;"
+        ugc_client.get_recommendations_for_user.assert_awaited_once_with(user.pk)
+
+    async def test_not_prefetched(self, task_service, ugc_client, email_service):
+        """Если рекомендации не получены заранее, то они запрашиваются у Netflix UGC."""
+        user = make_user()
+
+        await task_service.send_digest_email_to_subscriber(user)
+
+        assert get_sent_content(email_service) == "Fresh;"
+        ugc_client.get_recommendations_for_user.assert_awaited_once_with(user.pk)
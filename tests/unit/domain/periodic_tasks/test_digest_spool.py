@@ -0,0 +1,171 @@
+import datetime
+import uuid
+
+import pytest
+
+from notifications.domain.audience import AudienceService
+from notifications.domain.messages import EmailNotificationService
+from notifications.domain.messages.types import NotificationPayload
+from notifications.domain.periodic_tasks.enums import NotificationSubject, RunCounter
+from notifications.domain.periodic_tasks.progress import RunProgressTracker
+from notifications.domain.periodic_tasks.repositories import DigestSpoolRepository
+from notifications.domain.suppressions import SuppressionService
+from notifications.domain.templates import TemplateService
+from notifications.integrations.auth.types import BoundaryRegistrationDate, UserDetail
+from tests.unit.testlib import make_task_service
+
+RUN_ID = "weekly_digest:2022-10-17"
+
+
+def make_payload(email: str) -> NotificationPayload:
+    return NotificationPayload(
+        subject=NotificationSubject.WEEKLY_DIGEST.value, recipient_list=[email], content=f"<p>{email}</p>")
+
+
+@pytest.fixture
+def payloads() -> list[NotificationPayload]:
+    return [make_payload(email) for email in ("sent@gmail.com", "suppressed@gmail.com", "locked@gmail.com")]
+
+
+@pytest.fixture
+def digest_spool_repository(mocker, payloads):
+    digest_spool_repository = mocker.create_autospec(DigestSpoolRepository, instance=True)
+    digest_spool_repository.pop_many.return_value = payloads
+    return digest_spool_repository
+
+
+@pytest.fixture
+def suppression_service(mocker):
+    suppression_service = mocker.create_autospec(SuppressionService, instance=True)
+    suppression_service.filter_allowed.side_effect = lambda emails: [
+        email for email in emails if email != "suppressed@gmail.com"
+    ]
+    return suppression_service
+
+
+@pytest.fixture
+def email_service(mocker):
+    return mocker.create_autospec(EmailNotificationService, instance=True)
+
+
+@pytest.fixture
+def run_progress(mocker):
+    return mocker.create_autospec(RunProgressTracker, instance=True)
+
+
+@pytest.fixture
+def template_service(mocker):
+    template_service = mocker.create_autospec(TemplateService, instance=True)
+    template_service.get_template_variables.return_value = {"first_name"}
+    template_service.build_context.return_value = {}
+    template_service.render_template_from_string.return_value = "<p>Digest</p>"
+    return template_service
+
+
+@pytest.fixture
+def audience_service(mocker):
+    return mocker.create_autospec(AudienceService, instance=True)
+
+
+@pytest.fixture
+def task_service(
+    mocker, digest_spool_repository, suppression_service, email_service, run_progress, template_service,
+    audience_service,
+):
+    return make_task_service(
+        mocker,
+        digest_spool_repository=digest_spool_repository, suppression_service=suppression_service,
+        email_service=email_service, run_progress=run_progress, template_service=template_service,
+        audience_service=audience_service,
+        digest_prefetch_batch_size=2, spawn_batch_size=1, digest_spool_batch_size=3, recent_runs_limit=1,
+    )
+
+
+def make_user(email: str) -> UserDetail:
+    return UserDetail(
+        pk=uuid.uuid4(), email=email, first_name="John", last_name="Doe", role="subscriber",
+        registration_date=datetime.date(2022, 1, 1),
+    )
+
+
+def acquire_lock(email: str) -> bool:
+    return email != "locked@gmail.com"
+
+
+def release_locks(emails: list[str]) -> None:
+    pass
+
+
+def get_counters(run_progress) -> dict[RunCounter, int]:
+    counters = {}
+    for call in run_progress.increment.call_args_list:
+        run_id, counter, value = call.args
+        assert run_id == RUN_ID
+        counters[counter] = counters.get(counter, 0) + value
+    return counters
+
+
+class TestSendPrerenderedDigestBatch:
+    """Тестирование отправки пачки заранее отрендеренных писем дайджеста."""
+
+    async def test_sent(self, task_service, email_service, run_progress, payloads):
+        """Письма отправляются только неподавленным адресам с установленной блокировкой и учитываются в прогрессе."""
+        popped_count = await task_service.send_prerendered_digest_batch(
+            RUN_ID, acquire_lock=acquire_lock, release_locks=release_locks)
+
+        assert popped_count == 3
+        email_service.send_messages.assert_awaited_once_with([payloads[0]])
+        assert get_counters(run_progress) == {
+            RunCounter.SCANNED: 3, RunCounter.SUPPRESSED: 1, RunCounter.DEDUPLICATED: 1, RunCounter.SENT: 1,
+        }
+
+    async def test_failed(self, mocker, task_service, email_service, digest_spool_repository, run_progress, payloads):
+        """Если письма не удалось отправить, то они возвращаются в очередь, а блокировки снимаются."""
+        email_service.send_messages.side_effect = ConnectionError
+        release_locks_mock = mocker.Mock()
+
+        with pytest.raises(ConnectionError):
+            await task_service.send_prerendered_digest_batch(
+                RUN_ID, acquire_lock=acquire_lock, release_locks=release_locks_mock)
+
+        digest_spool_repository.push_many.assert_awaited_once_with(RUN_ID, [payloads[0]])
+        release_locks_mock.assert_called_once_with(["sent@gmail.com"])
+        assert get_counters(run_progress)[RunCounter.FAILED] == 1
+        assert RunCounter.SENT not in get_counters(run_progress)
+
+
+class TestPrerenderWeeklyDigest:
+    """Тестирование рендеринга писем дайджеста заранее."""
+
+    @pytest.fixture
+    def dates_boundary(self) -> BoundaryRegistrationDate:
+        return BoundaryRegistrationDate(
+            first_registration_date=datetime.date(2022, 1, 1), last_registration_date=datetime.date(2022, 2, 1))
+
+    async def test_prerendered(self, task_service, audience_service, digest_spool_repository, dates_boundary):
+        """Письма неподавленным подписчикам сохраняются в очередь пачками, затем сохраняется обработанная дата."""
+        digest_spool_repository.is_sending_started.return_value = False
+        audience_service.get_users_within_registration_date_range_iter.return_value = iter([
+            make_user("first@gmail.com"), make_user("suppressed@gmail.com"), make_user("second@gmail.com"),
+        ])
+
+        users_count = await task_service.prerender_weekly_digest_by_boundary(dates_boundary, run_id=RUN_ID)
+
+        assert users_count == 2
+        spooled_emails = [
+            payload["recipient_list"][0]
+            for call in digest_spool_repository.push_many.await_args_list
+            for payload in call.args[1]
+        ]
+        assert spooled_emails == ["first@gmail.com", "second@gmail.com"]
+        digest_spool_repository.set_rendered_until.assert_awaited_once_with(RUN_ID, datetime.date(2022, 2, 1))
+
+    async def test_sending_started(self, task_service, audience_service, digest_spool_repository, dates_boundary):
+        """Если отправка писем уже началась, то письма не рендерятся."""
+        digest_spool_repository.is_sending_started.return_value = True
+
+        assert await task_service.prerender_weekly_digest_by_boundary(dates_boundary, run_id=RUN_ID) == 0
+
+        audience_service.get_users_within_registration_date_range_iter.assert_not_called()
+        digest_spool_repository.push_many.assert_not_called()
+        digest_spool_repository.set_rendered_until.assert_not_called()
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from notifications.domain.periodic_tasks import RunProgressRepository, RunProgressTracker
+from notifications.domain.periodic_tasks.enums import RunCounter
+from notifications.domain.periodic_tasks.types import RunProgress
+
+
+class TestRunProgressTracker:
+    """Тестирование буферизации счетчиков прогресса запусков."""
+
+    def test_increments_are_buffered(self, mocker):
+        """Увеличения счетчиков записываются одним запросом после накопления `flush_size` увеличений."""
+        progress_repository = mocker.create_autospec(RunProgressRepository, instance=True)
+        tracker = RunProgressTracker(progress_repository, flush_interval=60, flush_size=3)
+
+        tracker.increment("run", RunCounter.SCANNED, 100)
+        tracker.increment(None, RunCounter.SCANNED, 100)
+        tracker.increment("run", RunCounter.SPAWNED, 0)
+        tracker.increment("run", RunCounter.SPAWNED, 90)
+        progress_repository.increment_many.assert_not_called()
+        tracker.increment("run", RunCounter.SCANNED, 50)
+
+        progress_repository.increment_many.assert_called_once_with(
+            {"run": {RunCounter.SCANNED: 150, RunCounter.SPAWNED: 90}})
+        tracker.flush()
+        progress_repository.increment_many.assert_called_once()
+
+    def test_flushed_when_idle(self, mocker):
+        """Накопленные увеличения записываются фоновым потоком, даже если новых увеличений нет."""
+        monotonic = mocker.patch("notifications.domain.periodic_tasks.progress.time.monotonic", return_value=0)
+
+        def sleep(seconds):
+            if monotonic.return_value >= 120:
+                raise InterruptedError
+            monotonic.return_value += seconds
+
+        mocker.patch("notifications.domain.periodic_tasks.progress.time.sleep", side_effect=sleep)
+        ensure_flusher = mocker.patch.object(RunProgressTracker, "_ensure_flusher")
+        progress_repository = mocker.create_autospec(RunProgressRepository, instance=True)
+        tracker = RunProgressTracker(progress_repository, flush_interval=60, flush_size=1_000)
+        tracker.increment("run", RunCounter.SCANNED, 100)
+        tracker.increment("run", RunCounter.SENT)
+        progress_repository.increment_many.assert_not_called()
+
+        with pytest.raises(InterruptedError):
+            tracker._run_flusher()
+
+        ensure_flusher.assert_called()
+        progress_repository.increment_many.assert_called_once_with(
+            {"run": {RunCounter.SCANNED: 100, RunCounter.SENT: 1}})
+
+
+class TestRunProgress:
+    """Тестирование расчета скорости и оставшегося времени запуска."""
+
+    def test_rate_and_eta(self):
+        """Скорость считается по просмотренным пользователям, оставшееся время - по оценке их общего количества."""
+        now = time.time()
+        counters = {
+            "task": "task", "started_at": str(now - 100), "updated_at": str(now), "total_users": "3000",
+            "scanned": "1000", "spawned": "990",
+        }
+
+        run_progress = RunProgress.from_counters("run", counters)
+
+        assert run_progress.rate == 10
+        assert run_progress.eta == 200
+        assert run_progress.spawned == 990
+        assert run_progress.idle < 1
@@ -0,0 +1,80 @@
+import timeit
+
+import numpy as np
+
+from notifications.domain.suppressions import SuppressionRepository, SuppressionService
+from notifications.domain.suppressions.enums import SuppressionReason
+from notifications.domain.suppressions.filters import SuppressionFilter, hash_addresses
+from notifications.domain.suppressions.types import SuppressionChanges
+
+
+def get_addresses(start: int, end: int) -> list[str]:
+    return [f"user{index}@gmail.com" for index in range(start, end)]
+
+
+class TestSuppressionFilter:
+    """Тестирование локальной реплики списка подавления."""
+
+    def test_apply_changes(self):
+        """Изменения применяются к реплике инкрементально, адреса сравниваются без учета регистра."""
+        suppression_filter = SuppressionFilter()
+
+        suppression_filter.apply(1, added=hash_addresses(get_addresses(0, 100)), removed=np.empty(0))
+        suppression_filter.apply(
+            2, added=hash_addresses(get_addresses(100, 150)), removed=hash_addresses(get_addresses(0, 10)))
+
+        assert suppression_filter.version == 2
+        assert len(suppression_filter) == 140
+        assert suppression_filter.contains(" USER42@Gmail.com ")
+        assert not suppression_filter.contains("user5@gmail.com")
+        assert suppression_filter.contains_many(get_addresses(0, 200)).tolist() == [
+            10 <= index < 150 for index in range(200)
+        ]
+
+    def test_contains_fast(self):
+        """Проверка адреса по реплике из миллиона адресов занимает единицы микросекунд."""
+        suppression_filter = SuppressionFilter()
+        suppression_filter.apply(1, added=hash_addresses(get_addresses(0, 1_000_000)), removed=np.empty(0))
+
+        duration = timeit.timeit(lambda: suppression_filter.contains("user500000@gmail.com"), number=10_000) / 10_000
+
+        assert duration < 20e-6
+
+
+class TestSuppressionService:
+    """Тестирование сервиса списка подавления."""
+
+    async def test_replica_refreshed_incrementally(self, mocker):
+        """Реплика запрашивает из Redis только изменения после известной ей версии."""
+        suppression_repository = mocker.create_autospec(SuppressionRepository, instance=True)
+        suppression_repository.get_changes.side_effect = [
+            SuppressionChanges(version=3, added=hash_addresses(get_addresses(0, 10)), removed=np.empty(0)),
+            SuppressionChanges(version=4, added=np.empty(0), removed=hash_addresses(get_addresses(0, 5))),
+        ]
+        suppression_service = SuppressionService(suppression_repository, refresh_interval=60)
+
+        assert await suppression_service.filter_allowed(get_addresses(0, 20)) == get_addresses(10, 20)
+        assert await suppression_service.is_suppressed("user0@gmail.com")
+        await suppression_service.unsuppress(get_addresses(0, 5))
+
+        suppression_repository.remove_many.assert_awaited_once_with(get_addresses(0, 5))
+        assert [call.args for call in suppression_repository.get_changes.await_args_list] == [(0, ), (3, )]
+        assert not await suppression_service.is_suppressed("user0@gmail.com")
+        allowed_addresses = await suppression_service.filter_allowed(get_addresses(0, 20))
+        assert allowed_addresses == get_addresses(0, 5) + get_addresses(10, 20)
+
+    async def test_replica_reloaded_after_reset(self, mocker):
+        """Если версия списка в Redis меньше версии реплики, то реплика загружается заново."""
+        suppression_repository = mocker.create_autospec(SuppressionRepository, instance=True)
+        suppression_repository.get_changes.side_effect = [
+            SuppressionChanges(version=10, added=hash_addresses(get_addresses(0, 10)), removed=np.empty(0)),
+            SuppressionChanges(version=1, added=np.empty(0), removed=np.empty(0)),
+            SuppressionChanges(version=1, added=hash_addresses(get_addresses(100, 101)), removed=np.empty(0)),
+        ]
+        suppression_service = SuppressionService(suppression_repository, refresh_interval=60)
+        await suppression_service.refresh()
+
+        await suppression_service.suppress(["user100@gmail.com"], reason=SuppressionReason.BOUNCED)
+
+        assert not await suppression_service.is_suppressed("user0@gmail.com")
+        assert await suppression_service.is_suppressed("user100@gmail.com")
@@ -0,0 +1,78 @@
+import pytest
+from jinja2 import BaseLoader, Environment
+
+from notifications.domain.templates.constants import FRAGMENT_CACHE_NAMESPACE_VARIABLE
+from notifications.domain.templates.extensions import FragmentCacheExtension
+
+pytestmark = [pytest.mark.asyncio]
+
+TEMPLATE = (
+    "Hi, {{ name }}!"
+    "{% for film in films %}{% cache 'film', film.pk %}[{{ film.title }}]{% endcache %}{% endfor %}"
+)
+
+
+@pytest.fixture
+def environment() -> Environment:
+    return Environment(loader=BaseLoader(), enable_async=True, extensions=[FragmentCacheExtension])
+
+
+class TestFragmentCacheExtension:
+    """Тестирование расширения Jinja для кэширования фрагментов шаблона."""
+
+    async def test_fragment_cached_by_keys(self, environment):
+        """Фрагмент рендерится один раз для одинаковых ключей, персональные данные рендерятся каждый раз."""
+        template = environment.from_string(TEMPLATE, globals={FRAGMENT_CACHE_NAMESPACE_VARIABLE: "namespace"})
+
+        rendered_1 = await template.render_async(name="Ann", films=[{"pk": 1, "title": "Matrix"}])
+        rendered_2 = await template.render_async(name="Bob", films=[{"pk": 1, "title": "Changed"}])
+        rendered_3 = await template.render_async(name="Bob", films=[{"pk": 2, "title": "Alien"}])
+
+        assert rendered_1 == "Hi, Ann![Matrix]"
+        assert rendered_2 == "Hi, Bob![Matrix]"
+        assert rendered_3 == "Hi, Bob![Alien]"
+
+    async def test_fragments_separated_by_namespace(self, environment):
+        """Фрагменты разных шаблонов не пересекаются."""
+        template_1 = environment.from_string(TEMPLATE, globals={FRAGMENT_CACHE_NAMESPACE_VARIABLE: "first"})
+        template_2 = environment.from_string(TEMPLATE, globals={FRAGMENT_CACHE_NAMESPACE_VARIABLE: "second"})
+
+        await template_1.render_async(name="Ann", films=[{"pk": 1, "title": "Matrix"}])
+        rendered = await template_2.render_async(name="Ann", films=[{"pk": 1, "title": "Alien"}])
+
+        assert rendered == "Hi, Ann![Alien]"
+
+    async def test_no_cache_without_namespace(self, environment):
+        """Без пространства имен фрагменты не кэшируются."""
+        template = environment.from_string(TEMPLATE)
+
+        await template.render_async(name="Ann", films=[{"pk": 1, "title": "Matrix"}])
+        rendered = await template.render_async(name="Ann", films=[{"pk": 1, "title": "Alien"}])
+
+        assert rendered == "Hi, Ann![Alien]"
+        assert not environment.fragment_cache
+
+    async def test_fragment_expired(self, mocker, environment):
+        """По истечении `fragment_cache_ttl` фрагмент рендерится заново."""
+        monotonic = mocker.patch("notifications.domain.templates.extensions.time.monotonic", return_value=0)
+        environment.fragment_cache_ttl = 60
+        template = environment.from_string(TEMPLATE, globals={FRAGMENT_CACHE_NAMESPACE_VARIABLE: "namespace"})
+
+        await template.render_async(name="Ann", films=[{"pk": 1, "title": "Matrix"}])
+        monotonic.return_value = 59
+        rendered_1 = await template.render_async(name="Ann", films=[{"pk": 1, "title": "Changed"}])
+        monotonic.return_value = 61
+        rendered_2 = await template.render_async(name="Ann", films=[{"pk": 1, "title": "Changed"}])
+
+        assert rendered_1 == "Hi, Ann![Matrix]"
+        assert rendered_2 == "Hi, Ann![Changed]"
+
+    async def test_fragment_cache_size(self, environment):
+        """Размер кэша фрагментов задается атрибутом окружения `fragment_cache_size`."""
+        environment.fragment_cache_size = 1
+        template = environment.from_string(TEMPLATE, globals={FRAGMENT_CACHE_NAMESPACE_VARIABLE: "namespace"})
+
+        await template.render_async(name="Ann", films=[{"pk": 1, "title": "Matrix"}, {"pk": 2, "title": "Alien"}])
+
+        assert environment.fragment_cache.capacity == 1
+        assert len(environment.fragment_cache) == 1
@@ -0,0 +1,65 @@
+import pytest
+
+from notifications.domain.templates import Template, TemplateService
+from notifications.domain.templates.repositiories import TemplateRepository
+from notifications.infrastructure.db.cache import BaseCache
+
+
+@pytest.fixture
+def template_service(mocker) -> TemplateService:
+    return TemplateService(
+        mocker.create_autospec(TemplateRepository, instance=True),
+        mocker.create_autospec(BaseCache, instance=True),
+        rendered_content_ttl=60,
+        fragment_cache_size=10,
+        fragment_cache_ttl=60,
+    )
+
+
+def make_template(content: str, *, variables: str = "") -> Template:
+    return Template(name="Digest", slug="digest", content=content, variables=variables)
+
+
+class TestTemplateVariables:
+    """Тестирование хранения переменных контекста шаблона."""
+
+    def test_dump_and_load(self):
+        """Переменные сохраняются в поле модели отсортированным JSON-списком."""
+        variables = Template.dump_variables({"name", "films"})
+        template = make_template("", variables=variables)
+
+        assert variables == '["films","name"]'
+        assert template.load_variables() == {"films", "name"}
+        assert make_template("").load_variables() is None
+
+    def test_not_analyzed_template(self, template_service):
+        """Переменные шаблона, который еще не анализировался, извлекаются из содержимого."""
+        template = make_template("{% for film in films %}{{ film }}{% endfor %}, {{ name }}")
+
+        assert template_service.get_template_variables(template) == {"films", "name"}
+
+
+class TestBuildContext:
+    """Тестирование построения контекста для рендеринга шаблона."""
+
+    async def test_lazy_providers(self, mocker, template_service):
+        """Провайдеры вызываются только для переменных шаблона, awaitable значения ожидаются."""
+        template = make_template("{{ name }}: {{ films }}", variables=Template.dump_variables({"name", "films"}))
+        films_provider = mocker.AsyncMock(return_value=["Matrix"])
+        email_provider = mocker.Mock(return_value="user@gmail.com")
+
+        context = await template_service.build_context(
+            template, providers={"name": lambda: "Ann", "films": films_provider, "email": email_provider})
+
+        assert context == {"name": "Ann", "films": ["Matrix"]}
+        films_provider.assert_awaited_once()
+        email_provider.assert_not_called()
+
+    async def test_static_template(self, mocker, template_service):
+        """Для шаблона без переменных провайдеры не вызываются."""
+        template = make_template("Hello!", variables=Template.dump_variables(()))
+        provider = mocker.Mock()
+
+        assert await template_service.build_context(template, providers={"name": provider}) == {}
+        provider.assert_not_called()
+        assert template_service.is_static(template)
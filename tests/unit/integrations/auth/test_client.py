@@ -0,0 +1,156 @@
+import datetime
+import json
+import threading
+import tracemalloc
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+
+from notifications.integrations.auth import NetflixAuthClient
+from notifications.integrations.auth.types import BoundaryRegistrationDate
+
+FIRST_REGISTRATION_DATE = datetime.date(2015, 1, 1)
+USERS_PER_DAY = 1_000
+USERS_COUNT = 3_000_000
+
+
+def get_user(index: int) -> dict:
+    return {
+        "pk": str(uuid.UUID(int=index)),
+        "email": f"user{index}@gmail.com",
+        "first_name": "John",
+        "last_name": "Doe",
+        "role": "subscriber",
+        "registration_date": get_registration_date(index).isoformat(),
+    }
+
+
+def get_registration_date(index: int) -> datetime.date:
+    return FIRST_REGISTRATION_DATE + datetime.timedelta(days=index // USERS_PER_DAY)
+
+
+def get_first_index(registration_date: datetime.date) -> int:
+    return min(max((registration_date - FIRST_REGISTRATION_DATE).days * USERS_PER_DAY, 0), USERS_COUNT)
+
+
+class AuthRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов к АПИ сервиса Auth с синтетическими пользователями."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.server.requests_count += 1
+        if url.path == "/api/v1/users/registration-boundaries":
+            self._send_json({
+                "first_registration_date": FIRST_REGISTRATION_DATE.isoformat(),
+                "last_registration_date": get_registration_date(USERS_COUNT - 1).isoformat(),
+            })
+        elif url.path == "/api/v1/users":
+            self._send_users_page(params)
+        else:
+            self._send_json({"detail": "Not found"}, status=404)
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send_users_page(self, params: dict[str, str]) -> None:
+        start = get_first_index(datetime.date.fromisoformat(params["registration_date_from"]))
+        end = get_first_index(datetime.date.fromisoformat(params["registration_date_to"]))
+        if "after_pk" in params:
+            start = max(start, uuid.UUID(params["after_pk"]).int + 1)
+        end = min(end, start + int(params["page_size"]))
+        body = b"".join(json.dumps(get_user(index)).encode() + b"\n" for index in range(start, end))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.server.requests_count in self.server.broken_requests:
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def _send_json(self, data: dict, *, status: int = 200) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def auth_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), AuthRequestHandler)
+    server.requests_count = 0
+    server.broken_requests = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def auth_client(auth_server) -> NetflixAuthClient:
+    host, port = auth_server.server_address
+    with httpx.Client(base_url=f"http://{host}:{port}", timeout=5) as http_client:
+        yield NetflixAuthClient(http_client, page_size=1_000, max_retries=3, retry_backoff=0)
+
+
+class TestNetflixAuthClient:
+    """Тестирование клиента АПИ сервиса Auth."""
+
+    def test_users_streamed_with_flat_memory(self, auth_client):
+        """Пользователи получаются постранично по порядку, без накопления в памяти."""
+        date_range = BoundaryRegistrationDate(
+            first_registration_date=datetime.date(2020, 1, 1),
+            last_registration_date=datetime.date(2020, 1, 11),
+        )
+        expected_indexes = range(get_first_index(date_range.first_registration_date),
+                                 get_first_index(date_range.last_registration_date))
+
+        tracemalloc.start()
+        users_count = 0
+        for index, user in zip(expected_indexes, auth_client.get_users_within_registration_date_range_iter(date_range)):
+            assert user.pk.int == index
+            users_count += 1
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert users_count == len(expected_indexes) == 10_000
+        assert peak < 2 * 1024 * 1024
+
+    def test_users_resumed_after_connection_drop(self, auth_server, auth_client):
+        """При обрыве соединения страница запрашивается повторно с последнего полученного пользователя."""
+        auth_server.broken_requests = {1, 3, 4}
+        date_range = BoundaryRegistrationDate(
+            first_registration_date=datetime.date(2020, 1, 1),
+            last_registration_date=datetime.date(2020, 1, 4),
+        )
+
+        users = auth_client.get_users_within_registration_date_range(date_range)
+
+        first_index = get_first_index(date_range.first_registration_date)
+        assert [user.pk.int for user in users] == list(range(first_index, first_index + 3_000))
+
+    def test_boundary_registration_dates(self, auth_client):
+        """Граничные даты регистрации получаются из АПИ."""
+        boundaries = auth_client.get_boundary_registration_dates()
+
+        assert boundaries.first_registration_date == FIRST_REGISTRATION_DATE
+        assert boundaries.last_registration_date == get_registration_date(USERS_COUNT - 1)
+
+    def test_registration_density_not_supported(self, auth_client):
+        """Если АПИ не предоставляет гистограмму регистраций, то возвращается None."""
+        date_range = BoundaryRegistrationDate(
+            first_registration_date=datetime.date(2020, 1, 1),
+            last_registration_date=datetime.date(2020, 1, 4),
+        )
+
+        assert auth_client.get_registration_density(date_range) is None
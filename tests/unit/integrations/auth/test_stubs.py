@@ -0,0 +1,77 @@
+import datetime
+import time
+
+import pytest
+
+from notifications.integrations.auth.enums import DefaultRoles, RegistrationDistribution
+from notifications.integrations.auth.stubs import NetflixAuthClientStub
+from notifications.integrations.auth.types import BoundaryRegistrationDate
+
+FIRST_REGISTRATION_DATE = datetime.date(2015, 1, 1)
+LAST_REGISTRATION_DATE = datetime.date(2023, 1, 1)
+USERS_COUNT = 5_000_000
+
+
+def get_auth_client(distribution: RegistrationDistribution, *, seed: int = 0) -> NetflixAuthClientStub:
+    return NetflixAuthClientStub(
+        USERS_COUNT,
+        first_registration_date=FIRST_REGISTRATION_DATE,
+        last_registration_date=LAST_REGISTRATION_DATE,
+        distribution=distribution,
+        seed=seed,
+    )
+
+
+class TestNetflixAuthClientStub:
+    """Тестирование стаба клиента АПИ сервиса Auth с синтетическими пользователями."""
+
+    @pytest.mark.parametrize("distribution", list(RegistrationDistribution))
+    def test_density_covers_all_users(self, distribution):
+        """Гистограмма регистраций покрывает всех пользователей и соответствует распределению."""
+        auth_client = get_auth_client(distribution)
+
+        counts = auth_client.get_registration_density(auth_client.get_boundary_registration_dates()).counts
+
+        assert sum(counts.values()) == USERS_COUNT
+        assert min(counts) == FIRST_REGISTRATION_DATE
+        assert max(counts) < LAST_REGISTRATION_DATE
+        if distribution == RegistrationDistribution.UNIFORM:
+            assert max(counts.values()) - min(counts.values()) <= 1
+        else:
+            assert counts[max(counts)] > 50 * counts[min(counts)]
+
+    def test_users_deterministic(self):
+        """Пользователи определяются `seed` и совпадают с гистограммой регистраций."""
+        date_range = BoundaryRegistrationDate(
+            first_registration_date=datetime.date(2020, 1, 1),
+            last_registration_date=datetime.date(2020, 1, 8),
+        )
+        auth_client = get_auth_client(RegistrationDistribution.EXPONENTIAL)
+
+        users = list(auth_client.get_users_within_registration_date_range_iter(date_range))
+
+        assert users == list(auth_client.get_users_within_registration_date_range_iter(date_range))
+        assert users != list(get_auth_client(RegistrationDistribution.EXPONENTIAL, seed=1)
+                             .get_users_within_registration_date_range_iter(date_range))
+        assert len({user.pk for user in users}) == len(users)
+        subscribers_counts = auth_client.get_registration_density(date_range, user_role=DefaultRoles.SUBSCRIBERS)
+        assert len(users) == sum(auth_client.get_registration_density(date_range).counts.values())
+        assert sum(subscribers_counts.counts.values()) == sum(user.role == DefaultRoles.SUBSCRIBERS for user in users)
+
+    def test_range_query_independent_of_users_count(self):
+        """Выборка по диапазону дат не зависит от общего количества пользователей."""
+        date_range = BoundaryRegistrationDate(
+            first_registration_date=datetime.date(2022, 12, 31),
+            last_registration_date=datetime.date(2023, 1, 1),
+        )
+        auth_client = NetflixAuthClientStub(
+            1_000_000_000,
+            first_registration_date=FIRST_REGISTRATION_DATE,
+            last_registration_date=LAST_REGISTRATION_DATE,
+        )
+
+        started_at = time.monotonic()
+        user = next(auth_client.get_users_within_registration_date_range_iter(date_range))
+
+        assert time.monotonic() - started_at < 0.1
+        assert user.registration_date == date_range.first_registration_date
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from notifications.integrations.ugc import NetflixUgcClient
+
+
+class UgcRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов к АПИ сервиса UGC с настраиваемой задержкой ответа."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802
+        server = self.server
+        with server.lock:
+            server.requests_count += 1
+            server.active_requests += 1
+            server.max_active_requests = max(server.max_active_requests, server.active_requests)
+        time.sleep(server.latency)
+        with server.lock:
+            server.active_requests -= 1
+        user_pk = self.path.split("/")[-2]
+        body = json.dumps([
+            {"pk": str(uuid.uuid4()), "title": f"Film for {user_pk}", "description": "Description", "photo": ""},
+        ]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def ugc_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), UgcRequestHandler)
+    server.latency = 0.05
+    server.lock = threading.Lock()
+    server.requests_count = 0
+    server.active_requests = 0
+    server.max_active_requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+async def ugc_client(ugc_server) -> NetflixUgcClient:
+    host, port = ugc_server.server_address
+    async with httpx.AsyncClient(base_url=f"http://{host}:{port}", timeout=5) as http_client:
+        yield NetflixUgcClient(
+            http_client, max_concurrency=4, cache_ttl=60, cache_size=1_000, max_retries=0, retry_backoff=0)
+
+
+class TestNetflixUgcClient:
+    """Тестирование клиента АПИ сервиса UGC."""
+
+    async def test_concurrent_requests_coalesced(self, ugc_server, ugc_client):
+        """Одновременные запросы рекомендаций для одного пользователя объединяются в один."""
+        user_pk = uuid.uuid4()
+
+        results = await asyncio.gather(*(ugc_client.get_recommendations_for_user(user_pk) for _ in range(10)))
+
+        assert ugc_server.requests_count == 1
+        assert all(recommendations == results[0] for recommendations in results)
+
+    async def test_response_cached(self, ugc_server, ugc_client):
+        """Повторный запрос рекомендаций для пользователя берется из кэша."""
+        user_pk = uuid.uuid4()
+
+        first = await ugc_client.get_recommendations_for_user(user_pk)
+        second = await ugc_client.get_recommendations_for_user(user_pk)
+
+        assert ugc_server.requests_count == 1
+        assert first == second
+
+    async def test_concurrency_limited(self, ugc_server, ugc_client):
+        """Одновременно выполняется не больше `max_concurrency` запросов, несмотря на задержку ответов."""
+        user_pks = [uuid.uuid4() for _ in range(20)]
+
+        started_at = time.monotonic()
+        recommendations = await ugc_client.get_recommendations_for_users(user_pks)
+        duration = time.monotonic() - started_at
+
+        assert recommendations.keys() == set(user_pks)
+        assert ugc_server.requests_count == 20
+        assert ugc_server.max_active_requests == 4
+        assert duration < 20 * ugc_server.latency
@@ -0,0 +1,39 @@
+import uuid
+
+import orjson
+
+from notifications.integrations.ugc import RecommendationRepository
+from notifications.integrations.ugc.types import RecommendationShortDetail
+from tests.unit.testlib import InMemoryCache
+
+
+def make_film(title: str) -> RecommendationShortDetail:
+    return RecommendationShortDetail(pk=uuid.uuid4(), title=title, description="Description", photo="")
+
+
+class TestRecommendationRepository:
+    """Тестирование общего кэша рекомендованных фильмов."""
+
+    async def test_save_and_get(self):
+        """Фильм хранится один раз по `pk` и возвращается сериализованным, отсутствующие фильмы - None."""
+        cache = InMemoryCache()
+        recommendation_repository = RecommendationRepository(cache, ttl=60)
+        first, second = make_film("First"), make_film("Second")
+
+        await recommendation_repository.save_many([first, second, first])
+        films = await recommendation_repository.get_many([second.pk, uuid.uuid4(), str(first.pk)])
+
+        assert len(cache.data) == 2
+        assert films == [orjson.loads(second.json()), None, orjson.loads(first.json())]
+
+    async def test_save_with_ttl(self, mocker):
+        """Фильмы сохраняются одним запросом с ttl кэша, пустая пачка не сохраняется."""
+        cache = InMemoryCache()
+        set_many = mocker.spy(cache, "set_many")
+        recommendation_repository = RecommendationRepository(cache, ttl=60)
+
+        await recommendation_repository.save_many([])
+        await recommendation_repository.save_many([make_film("First"), make_film("Second")])
+
+        set_many.assert_awaited_once()
+        assert set_many.await_args.kwargs == {"ttl": 60}
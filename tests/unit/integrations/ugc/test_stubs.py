@@ -0,0 +1,20 @@
+import collections
+import uuid
+
+from notifications.integrations.ugc.stubs import NetflixUgcClientStub
+
+
+class TestNetflixUgcClientStub:
+    """Тестирование стаба клиента АПИ сервиса UGC."""
+
+    async def test_recommendations_weighted_by_popularity(self):
+        """Рекомендации пользователя детерминированы, популярные фильмы рекомендуются чаще."""
+        ugc_client = NetflixUgcClientStub(1_000, recommendations_count=5)
+        user_pks = [uuid.UUID(int=index) for index in range(2_000)]
+
+        recommendations = [await ugc_client.get_recommendations_for_user(user_pk) for user_pk in user_pks]
+
+        assert recommendations[0] == await ugc_client.get_recommendations_for_user(user_pks[0])
+        assert all(len({film.pk for film in films}) == 5 for films in recommendations)
+        counts = collections.Counter(film.title for films in recommendations for film in films)
+        assert counts["Film #1"] > 10 * counts["Film #100"]
@@ -5,8 +5,12 @@ from typing import TYPE_CHECKING, Any, Union
 import orjson
 from httpx import AsyncClient
 
+from notifications.domain.periodic_tasks import TaskService
+from notifications.infrastructure.db.cache import BaseCache
+
 if TYPE_CHECKING:
     from httpx import Response
+    from pytest_mock import MockerFixture
 
     APIResponse = Union[dict, str, list[dict], dict[str, Any]]
 
@@ -60,3 +64,25 @@ class APIClient(AsyncClient):
         if content_type is None:
             return False
         return "json" in content_type
+
+
+class InMemoryCache(BaseCache):
+    """Асинхронный кэш в памяти для тестов. Время жизни записей не учитывается."""
+
+    def __init__(self) -> None:
+        self.data = {}
+
+    async def get(self, key, /, *, default=None):
+        return self.data.get(key, default)
+
+    async def set(self, key, data, *, ttl=None, create_missing=True):
+        self.data[key] = data
+        return True
+
+
+def make_task_service(mocker: MockerFixture, **fields) -> TaskService:
+    """Создание сервиса периодических задач для тестов. Незаданные поля заменяются моками."""
+    return TaskService(**{
+        field: fields.get(field, mocker.Mock())
+        for field in TaskService.__dataclass_fields__
+    })